@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+
+"""
+Cold start benchmarks
+
+For each lambda in app/lambdas, and for the bssh_tool_kit layer on its own, record
+
+* The import time of the handler module, and the -X importtime breakdown by top level package
+* The latency of the first call to the handler (a cold start), and the median of the warm calls after it
+* The peak RSS after the import, and after all calls
+
+Each cold start is a fresh interpreter, run offline against the fake services in ./fakes
+with the representative event in ./events/<lambda module>.json.
+Lambdas without an event are only imported.
+
+Results are compared against the JSON baseline, a metric regresses if it is more than
+the tolerance (plus a small absolute slack) above the baseline.
+The layer also has an import budget, importing bssh_tool_kit alone must not load any third-party module
+and must take less than the budget.
+
+Usage (from the app directory):
+
+    # Compare against the baseline, exit 1 on a regression or if the layer is over its import budget
+    python benchmarks/cold_start.py
+
+    # Write a new baseline
+    python benchmarks/cold_start.py --update-baseline
+
+    # Only some lambdas
+    python benchmarks/cold_start.py --targets find_workflow update_workflow_run_object
+
+Numbers are only comparable between runs on the same machine and python version,
+the baseline records both.
+"""
+
+# Standard library imports
+import argparse
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+from copy import deepcopy
+from importlib import import_module
+from os import environ, pathsep
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Dict, List, Optional, TypedDict
+
+# Globals
+BENCHMARKS_DIR = Path(__file__).absolute().parent
+APP_DIR = BENCHMARKS_DIR.parent
+LAMBDAS_DIR = APP_DIR / "lambdas"
+LAYER_SRC_DIR = APP_DIR / "layers" / "bssh_tool_kit" / "src"
+FAKES_DIR = BENCHMARKS_DIR / "fakes"
+EVENTS_DIR = BENCHMARKS_DIR / "events"
+DEFAULT_BASELINE_PATH = BENCHMARKS_DIR / "baselines" / "cold_start.json"
+
+LAYER_PACKAGE_NAME = "bssh_tool_kit"
+
+DEFAULT_REPEAT = 5
+DEFAULT_WARM_CALLS = 5
+DEFAULT_TOLERANCE = 0.25
+# Absolute slack on top of the tolerance, so that small numbers do not flap
+METRIC_SLACK: Dict[str, float] = {
+    "importMs": 5,
+    "firstCallMs": 5,
+    "warmCallMs": 2,
+    "peakRssMb": 5,
+}
+DEFAULT_LAYER_IMPORT_BUDGET_MS = 50
+IMPORT_TIME_BREAKDOWN_SIZE = 15
+
+# ru_maxrss is in kilobytes on linux, bytes on macOS
+RU_MAXRSS_BYTES = 1 if sys.platform == "darwin" else 1024
+
+
+class ColdStartResult(TypedDict, total=False):
+    importMs: float
+    firstCallMs: Optional[float]
+    warmCallMs: Optional[float]
+    rssAfterImportMb: float
+    peakRssMb: float
+    modulesLoadedOnImport: List[str]
+    importTimeBreakdownMs: Dict[str, float]
+
+
+def get_lambda_dirs() -> Dict[str, Path]:
+    """
+    Get the directory of each lambda, keyed by the handler module name
+    :return:
+    """
+    return dict(sorted(map(
+        lambda lambda_dir_iter_: (lambda_dir_iter_.name[:-len("_py")], lambda_dir_iter_),
+        filter(
+            lambda lambda_dir_iter_: lambda_dir_iter_.is_dir() and lambda_dir_iter_.name.endswith("_py"),
+            LAMBDAS_DIR.iterdir()
+        )
+    )))
+
+
+def add_fakes_to_path():
+    """
+    Put the fakes on our own path, i.e. to read the fake world's globals
+    :return:
+    """
+    if str(FAKES_DIR) not in sys.path:
+        sys.path.insert(0, str(FAKES_DIR))
+
+
+def get_child_env(target: str, tmp_dir: Path) -> Dict[str, str]:
+    """
+    Get the environment of a cold start, the fakes are first on the path so that they shadow
+    any real orcabus_api_tools / wrapica / icav2_tools that happen to be installed
+    :param target:
+    :param tmp_dir: Stands in for the lambda's /tmp
+    :return:
+    """
+    # Imported here as the fakes are not on our own path
+    add_fakes_to_path()
+    from fake_world import FAKE_ENVIRONMENT
+
+    python_path = [str(FAKES_DIR), str(LAYER_SRC_DIR)]
+    if target != LAYER_PACKAGE_NAME:
+        python_path.insert(1, str(get_lambda_dirs()[target]))
+
+    return {
+        **environ,
+        **FAKE_ENVIRONMENT,
+        "PYTHONPATH": pathsep.join(python_path),
+        "TMPDIR": str(tmp_dir),
+        "BASESPACE_RUN_INDEX_PATH": str(tmp_dir / "basespace_run_index.json"),
+    }
+
+
+def get_peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RU_MAXRSS_BYTES / (1024 * 1024)
+
+
+def is_third_party_module(module_name: str) -> bool:
+    """
+    Whether a loaded module is a third-party module (or one of our own),
+    rather than part of the standard library, a module created at runtime (i.e. __mp_main__)
+    or one of the fake_* helpers that route calls to the fake world
+    :param module_name:
+    :return:
+    """
+    package_name = module_name.split(".")[0]
+    return (
+        package_name not in sys.stdlib_module_names and
+        not package_name.startswith("fake_") and
+        getattr(sys.modules.get(module_name), "__spec__", None) is not None
+    )
+
+
+def parse_import_time(import_time_output: str, module_name: str) -> Dict[str, float]:
+    """
+    Parse the output of python -X importtime, summing the self time (in ms) of every module
+    imported by the module, grouped by top level package.
+
+    Each module is logged after the modules it imports, indented by its depth,
+    so the modules imported by a top level import are the lines since the previous top level import.
+    :param import_time_output:
+    :param module_name:
+    :return:
+    """
+    block: List[Dict] = []
+    for line in import_time_output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, _, imported_name = line[len("import time:"):].split("|")
+        block.append({
+            "name": imported_name.strip(),
+            "selfUs": int(self_us),
+        })
+
+        # Top level imports have a single space of indentation
+        if not imported_name.startswith("  "):
+            if imported_name.strip() == module_name:
+                break
+            block = []
+    else:
+        raise ValueError(f"Could not find '{module_name}' in the import time output")
+
+    self_ms_by_package: Dict[str, float] = {}
+    for module_item in block:
+        package_name = module_item["name"].split(".")[0]
+        self_ms_by_package[package_name] = self_ms_by_package.get(package_name, 0) + module_item["selfUs"] / 1000
+
+    return dict(map(
+        lambda package_iter_: (package_iter_[0], round(package_iter_[1], 2)),
+        sorted(self_ms_by_package.items(), key=lambda package_iter_: -package_iter_[1])[:IMPORT_TIME_BREAKDOWN_SIZE]
+    ))
+
+
+def get_import_time_breakdown(target: str) -> Dict[str, float]:
+    """
+    Import the target in a fresh interpreter with -X importtime
+    :param target:
+    :return:
+    """
+    with TemporaryDirectory() as tmp_dir:
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+            env=get_child_env(target, Path(tmp_dir)),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+    return parse_import_time(process.stderr, target)
+
+
+def run_cold_start(target: str, warm_calls: int) -> ColdStartResult:
+    """
+    Run a single cold start of the target in a fresh interpreter
+    :param target:
+    :param warm_calls:
+    :return:
+    """
+    with TemporaryDirectory() as tmp_dir:
+        output_path = Path(tmp_dir) / "result.json"
+        process = subprocess.run(
+            [
+                sys.executable, __file__,
+                "--child", target,
+                "--child-output", str(output_path),
+                "--warm-calls", str(warm_calls),
+            ],
+            env=get_child_env(target, Path(tmp_dir)),
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode != 0:
+            raise RuntimeError(f"Cold start of '{target}' failed\n{process.stderr}")
+
+        return json.loads(output_path.read_text())
+
+
+def child_main(target: str, warm_calls: int, output_path: Path):
+    """
+    A single cold start, run in a fresh interpreter
+    :param target:
+    :param warm_calls:
+    :param output_path:
+    :return:
+    """
+    # Route HTTP and AWS calls to the fake world as the handler imports them
+    import fake_world
+    fake_world.install()
+
+    modules_before_import = set(sys.modules)
+
+    start_time = perf_counter()
+    module = import_module(target)
+    import_ms = (perf_counter() - start_time) * 1000
+
+    result: ColdStartResult = {
+        "importMs": import_ms,
+        "firstCallMs": None,
+        "warmCallMs": None,
+        "rssAfterImportMb": get_peak_rss_mb(),
+        "modulesLoadedOnImport": sorted(set(map(
+            lambda module_name_iter_: module_name_iter_.split(".")[0],
+            filter(
+                is_third_party_module,
+                set(sys.modules) - modules_before_import
+            )
+        )) - {target}),
+    }
+
+    event_path = EVENTS_DIR / f"{target}.json"
+    if target != LAYER_PACKAGE_NAME and event_path.is_file():
+        event = json.loads(event_path.read_text())
+
+        call_ms: List[float] = []
+        for _ in range(warm_calls + 1):
+            start_time = perf_counter()
+            module.handler(deepcopy(event), None)
+            call_ms.append((perf_counter() - start_time) * 1000)
+
+        result["firstCallMs"] = call_ms[0]
+        if warm_calls > 0:
+            result["warmCallMs"] = statistics.median(call_ms[1:])
+
+    result["peakRssMb"] = get_peak_rss_mb()
+
+    output_path.write_text(json.dumps(result))
+
+
+def benchmark_target(target: str, repeat: int, warm_calls: int) -> ColdStartResult:
+    """
+    Run repeat cold starts of the target, and take the median of each metric
+    :param target:
+    :param repeat:
+    :param warm_calls:
+    :return:
+    """
+    cold_start_results = [run_cold_start(target, warm_calls) for _ in range(repeat)]
+
+    result: ColdStartResult = {}
+    for metric in ["importMs", "firstCallMs", "warmCallMs", "rssAfterImportMb", "peakRssMb"]:
+        metric_values = list(filter(
+            lambda value_iter_: value_iter_ is not None,
+            map(lambda result_iter_: result_iter_.get(metric), cold_start_results)
+        ))
+        result[metric] = round(statistics.median(metric_values), 2) if len(metric_values) > 0 else None
+
+    result["modulesLoadedOnImport"] = cold_start_results[0]["modulesLoadedOnImport"]
+    result["importTimeBreakdownMs"] = get_import_time_breakdown(target)
+
+    return result
+
+
+def compare_to_baseline(
+        results: Dict[str, ColdStartResult],
+        baseline: Dict[str, ColdStartResult],
+        tolerance: float,
+) -> List[str]:
+    """
+    Get a message for each metric that has regressed against the baseline
+    :param results:
+    :param baseline:
+    :param tolerance:
+    :return:
+    """
+    regressions: List[str] = []
+    for target, result in results.items():
+        if target not in baseline:
+            continue
+
+        for metric, slack in METRIC_SLACK.items():
+            if result.get(metric) is None or baseline[target].get(metric) is None:
+                continue
+
+            limit = baseline[target][metric] * (1 + tolerance) + slack
+            if result[metric] > limit:
+                regressions.append(
+                    f"{target} {metric} is {result[metric]} (baseline {baseline[target][metric]}, limit {limit:.2f})"
+                )
+
+    return regressions
+
+
+def check_layer_import_budget(result: ColdStartResult, budget_ms: float) -> List[str]:
+    """
+    Importing the layer alone should not load any third-party module, and should be within budget
+    :param result:
+    :param budget_ms:
+    :return:
+    """
+    errors: List[str] = []
+    if len(result["modulesLoadedOnImport"]) > 0:
+        errors.append(
+            f"Importing {LAYER_PACKAGE_NAME} loads third-party modules "
+            f"{', '.join(result['modulesLoadedOnImport'])}"
+        )
+    if result["importMs"] > budget_ms:
+        errors.append(
+            f"Importing {LAYER_PACKAGE_NAME} takes {result['importMs']} ms, over the budget of {budget_ms} ms"
+        )
+    return errors
+
+
+def print_results(results: Dict[str, ColdStartResult]):
+    def _format(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value:.1f}"
+
+    print(f"{'target':<50}{'import ms':>12}{'first call ms':>16}{'warm call ms':>15}{'peak rss mb':>14}")
+    for target, result in results.items():
+        print(
+            f"{target:<50}"
+            f"{_format(result['importMs']):>12}"
+            f"{_format(result['firstCallMs']):>16}"
+            f"{_format(result['warmCallMs']):>15}"
+            f"{_format(result['peakRssMb']):>14}"
+        )
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Cold start and import time benchmarks for the lambdas")
+    parser.add_argument(
+        "--targets", nargs="+",
+        help=f"Lambda module names (and / or {LAYER_PACKAGE_NAME}), defaults to every lambda and the layer"
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Cold starts per target")
+    parser.add_argument("--warm-calls", type=int, default=DEFAULT_WARM_CALLS, help="Warm calls per cold start")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results to the baseline")
+    parser.add_argument("--output", type=Path, help="Also write the results to this path")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--layer-import-budget-ms", type=float, default=DEFAULT_LAYER_IMPORT_BUDGET_MS)
+
+    # Used internally to run a single cold start
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--child-output", type=Path, help=argparse.SUPPRESS)
+
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    if args.child is not None:
+        child_main(args.child, args.warm_calls, args.child_output)
+        return
+
+    targets = args.targets or [*get_lambda_dirs(), LAYER_PACKAGE_NAME]
+
+    results: Dict[str, ColdStartResult] = {}
+    for target in targets:
+        if target != LAYER_PACKAGE_NAME and target not in get_lambda_dirs():
+            raise ValueError(f"Unknown target '{target}', expected one of {', '.join(get_lambda_dirs())}")
+        print(f"Benchmarking {target}", file=sys.stderr)
+        results[target] = benchmark_target(target, repeat=args.repeat, warm_calls=args.warm_calls)
+
+    print_results(results)
+
+    output = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "warmCalls": args.warm_calls,
+        "targets": results,
+    }
+
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(output, indent=2) + "\n")
+
+    errors: List[str] = []
+    if LAYER_PACKAGE_NAME in results:
+        errors.extend(check_layer_import_budget(results[LAYER_PACKAGE_NAME], args.layer_import_budget_ms))
+
+    if args.update_baseline or not args.baseline.is_file():
+        # Keep the baseline of any target we did not run this time
+        if args.baseline.is_file():
+            output["targets"] = {**json.loads(args.baseline.read_text())["targets"], **results}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(output, indent=2) + "\n")
+        print(f"Wrote baseline to {args.baseline}", file=sys.stderr)
+    else:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline["python"] != output["python"] or baseline["platform"] != output["platform"]:
+            print(
+                f"Warning: the baseline was written on python {baseline['python']} ({baseline['platform']}), "
+                f"numbers may not be comparable",
+                file=sys.stderr
+            )
+        errors.extend(compare_to_baseline(results, baseline["targets"], args.tolerance))
+
+    for error in errors:
+        print(f"FAIL: {error}", file=sys.stderr)
+
+    if len(errors) > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
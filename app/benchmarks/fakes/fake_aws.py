@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+"""
+Fake AWS
+
+Answer SSM, Secrets Manager and EventBridge schema registry calls from the fake world.
+
+We hook into botocore's 'before-call' event, which lets a handler return the parsed response
+in place of sending the request. The real clients are still created, so client creation
+is still part of the handler's first call.
+
+Only imported once the handler has imported boto3.
+"""
+
+# Standard library imports
+from types import ModuleType, SimpleNamespace
+from typing import Dict, Tuple
+
+# Local imports
+from fake_world import get_fake_world
+
+# Globals
+API_PARAMS_CONTEXT_KEY = "fakeWorldApiParams"
+# Service id -> fake world dependency
+DEPENDENCY_BY_SERVICE_ID = {
+    "ssm": "ssm",
+    "secrets-manager": "secretsManager",
+    "schemas": "schemaRegistry",
+}
+
+
+def _get_error_response(status_code: int, code: str, message: str) -> Tuple[SimpleNamespace, Dict]:
+    return (
+        SimpleNamespace(status_code=status_code, headers={}),
+        {
+            "Error": {
+                "Code": code,
+                "Message": message,
+            },
+            "ResponseMetadata": {
+                "HTTPStatusCode": status_code,
+            }
+        }
+    )
+
+
+def _get_response(response: Dict) -> Tuple[SimpleNamespace, Dict]:
+    return (
+        SimpleNamespace(status_code=200, headers={}),
+        {
+            **response,
+            "ResponseMetadata": {
+                "HTTPStatusCode": 200,
+            }
+        }
+    )
+
+
+def get_fake_aws_response(service_id: str, operation_name: str, api_params: Dict) -> Tuple[SimpleNamespace, Dict]:
+    """
+    Get the (http response, parsed response) for an AWS call
+    :param service_id: The hyphenated service id, i.e. 'secrets-manager'
+    :param operation_name:
+    :param api_params:
+    :return:
+    """
+    fake_world = get_fake_world()
+    fake_world.record_call(DEPENDENCY_BY_SERVICE_ID.get(service_id, service_id))
+
+    if (service_id, operation_name) == ("ssm", "GetParameter"):
+        if api_params["Name"] not in fake_world.ssm_parameters:
+            return _get_error_response(400, "ParameterNotFound", f"Parameter {api_params['Name']} not found")
+        return _get_response({
+            "Parameter": {
+                "Name": api_params["Name"],
+                "Type": "String",
+                "Value": fake_world.ssm_parameters[api_params["Name"]],
+            }
+        })
+
+    if (service_id, operation_name) == ("secrets-manager", "GetSecretValue"):
+        if api_params["SecretId"] not in fake_world.secrets:
+            return _get_error_response(400, "ResourceNotFoundException", f"Secret {api_params['SecretId']} not found")
+        return _get_response({
+            "Name": api_params["SecretId"],
+            "SecretString": fake_world.secrets[api_params["SecretId"]],
+        })
+
+    if (service_id, operation_name) == ("schemas", "DescribeSchema"):
+        schema_content = fake_world.schemas.get(api_params["RegistryName"], {}).get(api_params["SchemaName"])
+        if schema_content is None:
+            return _get_error_response(404, "NotFoundException", f"Schema {api_params['SchemaName']} not found")
+        return _get_response({
+            "Content": schema_content,
+            "SchemaName": api_params["SchemaName"],
+            "SchemaVersion": "1",
+            "Type": "JSONSchemaDraft4",
+        })
+
+    raise NotImplementedError(f"No fake for {service_id} {operation_name}")
+
+
+def _capture_api_params(params: Dict, context: Dict, **kwargs):
+    # The request dict in 'before-call' is already serialised, so keep hold of the api params
+    context[API_PARAMS_CONTEXT_KEY] = dict(params)
+
+
+def _answer_api_call(model, context: Dict, **kwargs) -> Tuple[SimpleNamespace, Dict]:
+    return get_fake_aws_response(
+        service_id=model.service_model.service_id.hyphenize(),
+        operation_name=model.name,
+        api_params=context.get(API_PARAMS_CONTEXT_KEY, {}),
+    )
+
+
+def install_fake_aws_hooks(boto3_session_module: ModuleType):
+    """
+    Register the fake hooks on every boto3 session created from now on
+    (clients take a copy of their session's hooks when created)
+    :param boto3_session_module: The boto3.session module
+    :return:
+    """
+    session_class = boto3_session_module.Session
+    session_init = session_class.__init__
+
+    def _init(self, *args, **kwargs):
+        session_init(self, *args, **kwargs)
+        self.events.register("provide-client-params", _capture_api_params)
+        self.events.register("before-call", _answer_api_call)
+
+    session_class.__init__ = _init
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+"""
+Fake HTTP transport
+
+A requests transport adapter that answers the BaseSpace /v2/runs and /v2/runs/{id} endpoints and ICAv2 presigned downloads
+from the fake world, mounted on every HttpClient the layer creates.
+
+Only imported once the handler has imported the layer's HTTP client, so requests is already loaded.
+"""
+
+# Standard library imports
+import json
+from io import BytesIO
+from types import ModuleType
+from urllib.parse import parse_qs, urlparse
+
+# Requests imports
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Local imports
+from fake_world import BASESPACE_URL, ICAV2_DOWNLOAD_URL, get_fake_world
+
+
+def _get_response(
+        request: PreparedRequest,
+        status_code: int,
+        content: bytes,
+        content_type: str = "application/json",
+) -> Response:
+    response = Response()
+    response.status_code = status_code
+    response.reason = "OK" if status_code < 300 else "Error"
+    response.headers = CaseInsensitiveDict({
+        "Content-Type": content_type,
+        "Content-Length": str(len(content)),
+    })
+    response.raw = BytesIO(content)
+    response.url = request.url
+    response.request = request
+    return response
+
+
+def _get_basespace_runs_page(request: PreparedRequest) -> Response:
+    params = dict(map(
+        lambda param_iter_: (param_iter_[0], param_iter_[1][0]),
+        parse_qs(urlparse(request.url).query).items()
+    ))
+
+    runs = sorted(
+        get_fake_world().basespace_runs,
+        key=lambda run_iter_: run_iter_[params.get("SortBy", "DateCreated")],
+        reverse=params.get("SortDir", "Desc") == "Desc",
+    )
+    offset = int(params.get("Offset", 0))
+    limit = int(params.get("Limit", 10))
+
+    return _get_response(
+        request,
+        200,
+        json.dumps({"Items": runs[offset:offset + limit]}).encode(),
+    )
+
+
+def _get_basespace_run(request: PreparedRequest) -> Response:
+    # Run urls are <BASESPACE_URL>/v2/runs/<run id>
+    run_id = urlparse(request.url).path.rstrip("/").rsplit("/", 1)[-1]
+    try:
+        basespace_run = next(filter(
+            lambda run_iter_: run_iter_["Id"] == run_id,
+            get_fake_world().basespace_runs
+        ))
+    except StopIteration:
+        return _get_response(request, 404, b"Not Found", content_type="text/plain")
+
+    return _get_response(request, 200, json.dumps(basespace_run).encode())
+
+
+def _get_icav2_file(request: PreparedRequest) -> Response:
+    # Download urls are <ICAV2_DOWNLOAD_URL>/<project id>/<data id>
+    data_id = urlparse(request.url).path.rstrip("/").rsplit("/", 1)[-1]
+    content = get_fake_world().file_contents.get(data_id)
+    if content is None:
+        return _get_response(request, 404, b"Not Found", content_type="text/plain")
+
+    # Ranged reads, i.e. 'bytes=0-4095'
+    if request.headers.get("Range", "").startswith("bytes="):
+        start, end = request.headers["Range"][len("bytes="):].split("-")
+        content = content[int(start):int(end) + 1 if end else None]
+        return _get_response(request, 206, content, content_type="application/octet-stream")
+
+    return _get_response(request, 200, content, content_type="application/octet-stream")
+
+
+class FakeHttpAdapter(BaseAdapter):
+    """
+    Answer requests from the fake world, never touching the network
+    """
+
+    def send(self, request: PreparedRequest, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if request.url.startswith(f"{BASESPACE_URL}/v2/runs/"):
+            get_fake_world().record_call("basespace")
+            return _get_basespace_run(request)
+        if request.url.startswith(f"{BASESPACE_URL}/v2/runs"):
+            get_fake_world().record_call("basespace")
+            return _get_basespace_runs_page(request)
+        if request.url.startswith(ICAV2_DOWNLOAD_URL):
+            get_fake_world().record_call("icav2Download")
+            return _get_icav2_file(request)
+
+        raise ConnectionError(f"No fake service for '{request.url}'")
+
+    def close(self):
+        pass
+
+
+def install_fake_http_adapter(http_client_module: ModuleType):
+    """
+    Mount the fake adapter on every HttpClient created from now on
+    :param http_client_module: The bssh_tool_kit.http_client module
+    :return:
+    """
+    http_client_class = http_client_module.HttpClient
+    http_client_init = http_client_class.__init__
+
+    def _init(self, *args, **kwargs):
+        http_client_init(self, *args, **kwargs)
+        self.session.mount("https://", FakeHttpAdapter())
+        self.session.mount("http://", FakeHttpAdapter())
+
+    http_client_class.__init__ = _init
@@ -0,0 +1,596 @@
+#!/usr/bin/env python3
+
+"""
+Fake world
+
+In-process stand-ins for the services the lambdas talk to, so that the handlers can be run offline.
+
+* The workflow manager, SRM, metadata service and the ICAv2 project data / analysis APIs
+  are answered by the fake orcabus_api_tools, wrapica and icav2_tools packages alongside this module
+* BaseSpace /v2/runs, /v2/runs/{id} and ICAv2 presigned downloads are answered by a requests transport adapter
+  mounted on the layer's shared HTTP client (see fake_http)
+* SSM, Secrets Manager and the EventBridge schema registry are answered by a botocore 'before-call' hook
+  (see fake_aws), so the real boto3 clients are still created
+
+All of them read from a single FakeWorld, one bclconvert run (the 'current' run) and its history.
+The size of the history and the latency of each dependency are configurable,
+and every call to a dependency is counted (see FakeWorld.record_call).
+
+This module only uses the standard library, so installing the fakes does not import anything
+the handler would not import itself.
+"""
+
+# Standard library imports
+import hashlib
+import sys
+from copy import deepcopy
+from datetime import datetime, timedelta, timezone
+from importlib.abc import MetaPathFinder
+from math import ceil
+from pathlib import Path
+from threading import Lock
+from time import sleep
+from types import ModuleType, SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+# Globals
+PROJECT_ID = "00000000-0000-4000-8000-000000000001"
+PIPELINE_ID = "00000000-0000-4000-8000-000000000002"
+ANALYSIS_ID = "00000000-0000-4000-8000-000000000003"
+
+INSTRUMENT_RUN_ID = "250101_A01052_0100_BHFAKEDSX7"
+INSTRUMENT_ID = "A01052"
+FLOWCELL_ID = "HFAKEDSX7"
+EXPERIMENT_RUN_NAME = "FakeExperiment0100"
+BASESPACE_RUN_ID = 300000100
+
+WORKFLOW_NAME = "bclconvert"
+WORKFLOW_VERSION = "4.4.4"
+CURRENT_PORTAL_RUN_ID = "20250101abcdef01"
+CURRENT_RUN_DATE = datetime(2025, 1, 1, 1, tzinfo=timezone.utc)
+
+BASESPACE_URL = "https://fake-basespace.local"
+ICAV2_DOWNLOAD_URL = "https://fake-icav2-download.local"
+
+# Parameter / secret names, as set in the lambda environment
+SSM_PARAMETER_PREFIX = "/orcabus/workflows/bclconvert"
+BASESPACE_URL_SSM_PARAMETER_NAME = "/manual/BaseSpaceApiUrl"
+BASESPACE_ACCESS_TOKEN_SECRET_ID = "/manual/BaseSpaceAccessTokenSecret"  # pragma: allowlist secret
+DEFAULT_WORKFLOW_VERSION_SSM_PARAMETER_NAME = f"{SSM_PARAMETER_PREFIX}/workflow-version"
+SSM_REGISTRY_NAME = f"{SSM_PARAMETER_PREFIX}/schemas/registry"
+SSM_SCHEMA_NAME = f"{SSM_PARAMETER_PREFIX}/schemas/complete-data-draft/latest"
+SCHEMA_REGISTRY_NAME = "orcabus.workflows"
+SCHEMA_NAME = "orcabus.workflows.bclconvert@CompleteDataDraft"
+COMPLETE_DATA_DRAFT_SCHEMA_PATH = (
+    Path(__file__).absolute().parents[2] / "event-schemas" / "complete-data-draft-schema.json"
+)
+
+# Finished workflow runs that ended more than this many days before the current run
+# are evicted from the workflow run cache
+FAKE_WORKFLOW_RUN_CACHE_TERMINAL_WINDOW_DAYS = 90
+
+FAKE_ENVIRONMENT: Dict[str, str] = {
+    "AWS_DEFAULT_REGION": "ap-southeast-2",
+    # Never used to sign a request, every AWS call is answered by fake_aws
+    "AWS_ACCESS_KEY_ID": "fake",  # pragma: allowlist secret
+    "AWS_SECRET_ACCESS_KEY": "fake",  # pragma: allowlist secret
+    "AWS_EC2_METADATA_DISABLED": "true",
+    "BASESPACE_URL_SSM_PARAMETER_NAME": BASESPACE_URL_SSM_PARAMETER_NAME,
+    "BASESPACE_ACCESS_TOKEN_SECRET_ID": BASESPACE_ACCESS_TOKEN_SECRET_ID,  # pragma: allowlist secret
+    "DEFAULT_WORKFLOW_VERSION_SSM_PARAMETER_NAME": DEFAULT_WORKFLOW_VERSION_SSM_PARAMETER_NAME,
+    "SSM_REGISTRY_NAME": SSM_REGISTRY_NAME,
+    "SSM_SCHEMA_NAME": SSM_SCHEMA_NAME,
+    # The window is relative to now, so measure it from the current run
+    "WORKFLOW_RUN_CACHE_TERMINAL_WINDOW_DAYS": str(
+        (datetime.now(timezone.utc) - CURRENT_RUN_DATE).days + FAKE_WORKFLOW_RUN_CACHE_TERMINAL_WINDOW_DAYS
+    ),
+}
+
+# Number of samplesheet libraries and lanes of the current run
+DEFAULT_LIBRARY_COUNT = 96
+DEFAULT_LANE_COUNT = 2
+# Number of historical bclconvert workflow runs / BaseSpace runs alongside the current run
+DEFAULT_HISTORICAL_RUN_COUNT = 20
+
+# The services the fake world stands in for, each call to one of them is counted
+FAKE_DEPENDENCIES = [
+    "basespace",
+    "icav2",
+    "icav2Download",
+    "workflowManager",
+    "srm",
+    "metadata",
+    "ssm",
+    "secretsManager",
+    "schemaRegistry",
+]
+# List endpoints of the orcabus apis return pages of this size, one call per page
+ORCABUS_API_PAGE_SIZE = 100
+
+# Module -> callbacks to run once the module has been imported
+_POST_IMPORT_CALLBACKS: Dict[str, List[Callable[[ModuleType], None]]] = {}
+
+# Globals
+_FAKE_WORLD: Optional['FakeWorld'] = None
+
+
+def get_instrument_run_id(runs_ago: int) -> str:
+    """
+    Get the instrument run id of a run, one run a day going back from the current run
+    :param runs_ago:
+    :return:
+    """
+    if runs_ago == 0:
+        return INSTRUMENT_RUN_ID
+    return "_".join([
+        (CURRENT_RUN_DATE - timedelta(days=runs_ago)).strftime("%y%m%d"),
+        INSTRUMENT_ID,
+        f"{runs_ago % 10000:04d}",
+        f"BH{runs_ago:05d}X7",
+    ])
+
+
+def get_experiment_run_name(runs_ago: int) -> str:
+    if runs_ago == 0:
+        return EXPERIMENT_RUN_NAME
+    return f"FakeExperiment{runs_ago:05d}"
+
+
+def get_run_date(runs_ago: int) -> str:
+    """
+    Get the BaseSpace date of a run, one run a day going back from the current run
+    :param runs_ago:
+    :return:
+    """
+    return (CURRENT_RUN_DATE - timedelta(days=runs_ago)).strftime("%Y-%m-%dT%H:%M:%S.0000000Z")
+
+
+def build_run_info_xml(instrument_run_id: str, lane_count: int = DEFAULT_LANE_COUNT) -> bytes:
+    """
+    Build a RunInfo.xml file, with the (long) flowcell layout after the fields we read
+    :param instrument_run_id:
+    :param lane_count:
+    :return:
+    """
+    tiles = "".join(
+        f"<Tile>{lane}_{tile}</Tile>"
+        for lane in range(1, lane_count + 1)
+        for tile in range(1101, 1179)
+    )
+    return (
+        '<?xml version="1.0"?>\n'
+        '<RunInfo Version="6">\n'
+        f'  <Run Id="{instrument_run_id}" Number="{int(instrument_run_id.split("_")[2])}">\n'
+        f'    <Flowcell>{FLOWCELL_ID}</Flowcell>\n'
+        f'    <Instrument>{INSTRUMENT_ID}</Instrument>\n'
+        '    <Date>1/1/2025 1:00:00 AM</Date>\n'
+        '    <Reads>\n'
+        '      <Read Number="1" NumCycles="151" IsIndexedRead="N"/>\n'
+        '      <Read Number="2" NumCycles="10" IsIndexedRead="Y"/>\n'
+        '      <Read Number="3" NumCycles="10" IsIndexedRead="Y"/>\n'
+        '      <Read Number="4" NumCycles="151" IsIndexedRead="N"/>\n'
+        '    </Reads>\n'
+        f'    <FlowcellLayout LaneCount="{lane_count}" SurfaceCount="2" SwathCount="6" TileCount="78">'
+        f'<TileSet TileNamingConvention="FourDigit"><Tiles>{tiles}</Tiles></TileSet></FlowcellLayout>\n'
+        '  </Run>\n'
+        '</RunInfo>\n'
+    ).encode()
+
+
+def get_library_ids(library_count: int = DEFAULT_LIBRARY_COUNT) -> List[str]:
+    """
+    Get the library ids on the current run
+    :param library_count:
+    :return:
+    """
+    return [f"L25{library_iter:05d}" for library_iter in range(1, library_count + 1)]
+
+
+def build_samplesheet(
+        library_ids: List[str],
+        lane_count: int = DEFAULT_LANE_COUNT,
+) -> bytes:
+    """
+    Build a v2 samplesheet with every library on every lane
+    :param library_ids:
+    :param lane_count:
+    :return:
+    """
+    bclconvert_data_rows = [
+        ",".join([
+            str(lane),
+            library_id,
+            # Unique 10 base indexes from the binary library number
+            format(library_iter, "010b").replace("0", "A").replace("1", "C"),
+            format(library_iter, "010b").replace("0", "G").replace("1", "T"),
+        ])
+        for lane in range(1, lane_count + 1)
+        for library_iter, library_id in enumerate(library_ids)
+    ]
+    return "\n".join([
+        "[Header]",
+        "FileFormatVersion,2",
+        f"RunName,{EXPERIMENT_RUN_NAME}",
+        "InstrumentType,NovaSeq",
+        "",
+        "[Reads]",
+        "Read1Cycles,151",
+        "Read2Cycles,151",
+        "Index1Cycles,10",
+        "Index2Cycles,10",
+        "",
+        "[BCLConvert_Settings]",
+        "SoftwareVersion,4.4.4",
+        "",
+        "[BCLConvert_Data]",
+        "Lane,Sample_ID,index,index2",
+        *bclconvert_data_rows,
+        "",
+        "[Cloud_Settings]",
+        "GeneratedVersion,0.0.0",
+        "",
+    ]).encode()
+
+
+def get_project_data_obj(
+        project_id: str,
+        data_id: str,
+        path: str,
+        data_type: str,
+        time_modified: str = "2025-01-01T01:00:00Z",
+) -> SimpleNamespace:
+    """
+    A project data object, with the attributes of a libica ProjectData object that we use
+    :param project_id:
+    :param data_id:
+    :param path:
+    :param data_type:
+    :param time_modified:
+    :return:
+    """
+    return SimpleNamespace(
+        project_id=project_id,
+        data=SimpleNamespace(
+            id=data_id,
+            details=SimpleNamespace(
+                path=path,
+                name=path.rstrip("/").rsplit("/", 1)[-1],
+                data_type=data_type,
+                time_modified=time_modified,
+            )
+        )
+    )
+
+
+class FakeWorld:
+    """
+    The state behind every fake service
+    """
+
+    def __init__(
+            self,
+            library_count: int = DEFAULT_LIBRARY_COUNT,
+            workflow_run_count: int = DEFAULT_HISTORICAL_RUN_COUNT,
+            basespace_run_count: int = DEFAULT_HISTORICAL_RUN_COUNT,
+            current_workflow_run_status: str = "DRAFT",
+            latency_ms: Optional[Dict[str, float]] = None,
+    ):
+        """
+        :param library_count: Libraries on the current run
+        :param workflow_run_count: Historical bclconvert workflow runs, all succeeded
+        :param basespace_run_count: Historical BaseSpace runs
+        :param current_workflow_run_status: DRAFT if only the SRM event has been handled,
+          otherwise the current run is already linked to the ICAv2 analysis
+        :param latency_ms: Latency added to each call, keyed by dependency (or 'default')
+        """
+        # Calls to each dependency
+        self.latency_ms: Dict[str, float] = dict(latency_ms or {})
+        self.call_counts: Dict[str, int] = {}
+        self._call_counts_lock = Lock()
+
+        # Files and folders on ICAv2, keyed by data id
+        self.project_data: Dict[str, SimpleNamespace] = {}
+        self.file_contents: Dict[str, bytes] = {}
+
+        # Current run
+        self.library_ids = get_library_ids(library_count)
+        self.samplesheet = build_samplesheet(self.library_ids)
+        self.samplesheet_md5sum = hashlib.md5(self.samplesheet).hexdigest()
+
+        run_folder_path = f"/primary_data/{INSTRUMENT_RUN_ID}/"
+        self.add_folder("fol.run00100", run_folder_path)
+        self.add_file("fil.runinfo00100", run_folder_path + "RunInfo.xml", build_run_info_xml(INSTRUMENT_RUN_ID))
+        self.add_file("fil.samplesheet00100", run_folder_path + "SampleSheet.csv", self.samplesheet)
+        self.add_folder("fol.output00100", f"/analysis/bclconvert/{CURRENT_PORTAL_RUN_ID}/")
+
+        # ICAv2 analyses, keyed by analysis id
+        self.analyses: Dict[str, Dict] = {
+            ANALYSIS_ID: {
+                "status": "SUCCEEDED",
+                "inputs": {
+                    "run_folder": "fol.run00100",
+                    "sample_sheet": "fil.samplesheet00100",
+                },
+                "outputs": {
+                    "Output": "fol.output00100",
+                }
+            }
+        }
+
+        # BaseSpace runs, newest first
+        self.basespace_runs: List[Dict] = [
+            {
+                "Id": str(BASESPACE_RUN_ID - run_iter),
+                "Name": get_instrument_run_id(run_iter),
+                "ExperimentName": get_experiment_run_name(run_iter),
+                "V1Pre3Id": str(BASESPACE_RUN_ID - run_iter),
+                "Status": "Complete",
+                "DateCreated": get_run_date(run_iter),
+                "DateModified": get_run_date(run_iter),
+            }
+            for run_iter in range(basespace_run_count + 1)
+        ]
+
+        # SRM samplesheets and library ids, keyed by instrument run id
+        self.srm_samplesheets: Dict[str, str] = {
+            INSTRUMENT_RUN_ID: self.samplesheet.decode()
+        }
+        self.srm_library_ids: Dict[str, List[str]] = {
+            INSTRUMENT_RUN_ID: list(self.library_ids)
+        }
+        self.srm_added_samplesheets: List[Dict] = []
+
+        # Metadata service libraries, keyed by library id
+        self.libraries: Dict[str, Dict] = {
+            library_id: {
+                "orcabusId": f"lib.{library_id}",
+                "libraryId": library_id,
+            }
+            for library_id in self.library_ids
+        }
+
+        # Workflow manager
+        self.workflows: List[Dict] = [{
+            "orcabusId": "wfl.bclconvert0000000000001",
+            "name": WORKFLOW_NAME,
+            "version": WORKFLOW_VERSION,
+        }]
+        self.workflow_runs: Dict[str, Dict] = {}
+        self.workflow_run_payloads: Dict[str, Dict] = {}
+
+        # The current run, a draft created from the SRM event
+        current_payload_data = {
+            "tags": {
+                "instrumentRunId": INSTRUMENT_RUN_ID,
+                "experimentRunName": EXPERIMENT_RUN_NAME,
+                "basespaceRunId": BASESPACE_RUN_ID,
+                "samplesheetChecksum": self.samplesheet_md5sum,
+                "samplesheetChecksumType": "md5",
+            }
+        }
+        # Or already linked to the ICAv2 analysis
+        if current_workflow_run_status != "DRAFT":
+            current_payload_data["inputs"] = {
+                "inputUri": f"icav2://{PROJECT_ID}{run_folder_path}",
+                "sampleSheetUri": f"icav2://{PROJECT_ID}{run_folder_path}SampleSheet.csv",
+            }
+            current_payload_data["engineParameters"] = {
+                "projectId": PROJECT_ID,
+                "pipelineId": PIPELINE_ID,
+                "analysisId": ANALYSIS_ID,
+            }
+        self.add_workflow_run(
+            portal_run_id=CURRENT_PORTAL_RUN_ID,
+            status=current_workflow_run_status,
+            payload_data=current_payload_data,
+        )
+
+        # Historical runs, that have all succeeded, one a day going back from the current run
+        for run_iter in range(1, workflow_run_count + 1):
+            self.add_workflow_run(
+                portal_run_id=f"20241231{run_iter:08x}",
+                status="SUCCEEDED",
+                state_timestamp=CURRENT_RUN_DATE - timedelta(days=run_iter),
+                payload_data={
+                    "tags": {
+                        "instrumentRunId": get_instrument_run_id(run_iter),
+                        "experimentRunName": get_experiment_run_name(run_iter),
+                        "basespaceRunId": BASESPACE_RUN_ID - run_iter,
+                        "samplesheetChecksum": hashlib.md5(str(run_iter).encode()).hexdigest(),
+                        "samplesheetChecksumType": "md5",
+                    },
+                    "engineParameters": {
+                        "projectId": PROJECT_ID,
+                        "pipelineId": PIPELINE_ID,
+                        "analysisId": f"00000000-0000-4000-9000-{run_iter:012d}",
+                    }
+                }
+            )
+
+        # AWS
+        self.ssm_parameters: Dict[str, str] = {
+            BASESPACE_URL_SSM_PARAMETER_NAME: BASESPACE_URL,
+            DEFAULT_WORKFLOW_VERSION_SSM_PARAMETER_NAME: WORKFLOW_VERSION,
+            SSM_REGISTRY_NAME: SCHEMA_REGISTRY_NAME,
+            SSM_SCHEMA_NAME: (
+                '{"registryName": "%s", "schemaName": "%s", "schemaVersion": "1"}' %
+                (SCHEMA_REGISTRY_NAME, SCHEMA_NAME)
+            ),
+        }
+        self.secrets: Dict[str, str] = {
+            BASESPACE_ACCESS_TOKEN_SECRET_ID: "fake-basespace-access-token",  # pragma: allowlist secret
+        }
+        # Registry name -> schema name -> schema content
+        self.schemas: Dict[str, Dict[str, str]] = {
+            SCHEMA_REGISTRY_NAME: {
+                SCHEMA_NAME: COMPLETE_DATA_DRAFT_SCHEMA_PATH.read_text(),
+            }
+        }
+
+    def record_call(self, dependency: str, count: int = 1):
+        """
+        Count a call to a dependency, and wait for its latency.
+        May be called from several threads at once, as the layer makes some calls concurrently.
+        :param dependency: One of FAKE_DEPENDENCIES
+        :param count: i.e. the number of pages a list endpoint would return
+        :return:
+        """
+        with self._call_counts_lock:
+            self.call_counts[dependency] = self.call_counts.get(dependency, 0) + count
+
+        latency_ms = self.latency_ms.get(dependency, self.latency_ms.get("default", 0))
+        if latency_ms > 0:
+            sleep(latency_ms * count / 1000)
+
+    def record_list_call(self, dependency: str, item_count: int):
+        """
+        Count the calls to list items from an orcabus api, one call per page
+        :param dependency:
+        :param item_count:
+        :return:
+        """
+        self.record_call(dependency, count=max(1, ceil(item_count / ORCABUS_API_PAGE_SIZE)))
+
+    def pop_call_counts(self) -> Dict[str, int]:
+        """
+        Get the calls made to each dependency since the last pop, and reset the counts
+        :return:
+        """
+        with self._call_counts_lock:
+            call_counts = self.call_counts
+            self.call_counts = {}
+        return call_counts
+
+    def add_folder(self, data_id: str, path: str):
+        self.project_data[data_id] = get_project_data_obj(PROJECT_ID, data_id, path, "FOLDER")
+
+    def add_file(self, data_id: str, path: str, content: bytes):
+        self.project_data[data_id] = get_project_data_obj(PROJECT_ID, data_id, path, "FILE")
+        self.file_contents[data_id] = content
+
+    def add_workflow_run(
+            self,
+            portal_run_id: str,
+            status: str,
+            payload_data: Dict,
+            state_timestamp: datetime = CURRENT_RUN_DATE,
+    ):
+        orcabus_id = f"wfr.{portal_run_id.upper():0>26}"
+        self.workflow_runs[orcabus_id] = {
+            "orcabusId": orcabus_id,
+            "portalRunId": portal_run_id,
+            "workflowRunName": f"bssh--{WORKFLOW_NAME}--{WORKFLOW_VERSION.replace('.', '-')}--{portal_run_id}",
+            "workflow": deepcopy(self.workflows[0]),
+            "currentState": {
+                "status": status,
+                "timestamp": state_timestamp.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            },
+            "libraries": [],
+        }
+        self.workflow_run_payloads[orcabus_id] = {
+            "version": "2025.10.10",
+            "data": payload_data,
+        }
+
+    def get_project_data_obj_by_path(self, project_id: str, path: str) -> SimpleNamespace:
+        try:
+            return next(filter(
+                lambda project_data_iter_: (
+                    project_data_iter_.project_id == project_id and
+                    project_data_iter_.data.details.path.rstrip("/") == path.rstrip("/")
+                ),
+                self.project_data.values()
+            ))
+        except StopIteration:
+            raise FileNotFoundError(f"Could not find '{path}' in project '{project_id}'")
+
+
+def get_fake_world() -> FakeWorld:
+    """
+    Get the fake world for this process
+    :return:
+    """
+    global _FAKE_WORLD
+
+    if _FAKE_WORLD is None:
+        _FAKE_WORLD = FakeWorld()
+
+    return _FAKE_WORLD
+
+
+def set_fake_world(fake_world: Optional[FakeWorld]):
+    """
+    Override the fake world for this process, set to None to reset to the default.
+    :param fake_world:
+    :return:
+    """
+    global _FAKE_WORLD
+    _FAKE_WORLD = fake_world
+
+
+class _PostImportFinder(MetaPathFinder):
+    """
+    Run callbacks on a module once it has been imported, without importing it ourselves
+    """
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname not in _POST_IMPORT_CALLBACKS:
+            return None
+
+        # Find the module with the remaining finders
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        exec_module = spec.loader.exec_module
+
+        def _exec_module(module: ModuleType):
+            exec_module(module)
+            for callback in _POST_IMPORT_CALLBACKS.pop(fullname, []):
+                callback(module)
+
+        spec.loader.exec_module = _exec_module
+        return spec
+
+
+_POST_IMPORT_FINDER = _PostImportFinder()
+
+
+def when_imported(module_name: str, callback: Callable[[ModuleType], None]):
+    """
+    Run the callback on the module now if it has already been imported,
+    otherwise as soon as it has been imported
+    :param module_name:
+    :param callback:
+    :return:
+    """
+    if module_name in sys.modules:
+        callback(sys.modules[module_name])
+        return
+
+    _POST_IMPORT_CALLBACKS.setdefault(module_name, []).append(callback)
+    if _POST_IMPORT_FINDER not in sys.meta_path:
+        sys.meta_path.insert(0, _POST_IMPORT_FINDER)
+
+
+def install():
+    """
+    Route the layer's HTTP client and every boto3 client to the fake world,
+    as and when the handler imports them
+    :return:
+    """
+    def _install_fake_http(http_client_module: ModuleType):
+        from fake_http import install_fake_http_adapter
+        install_fake_http_adapter(http_client_module)
+
+    def _install_fake_aws(boto3_session_module: ModuleType):
+        from fake_aws import install_fake_aws_hooks
+        install_fake_aws_hooks(boto3_session_module)
+
+    when_imported("bssh_tool_kit.http_client", _install_fake_http)
+    when_imported("boto3.session", _install_fake_aws)
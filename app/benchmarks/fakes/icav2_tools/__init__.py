@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+
+"""
+Fake icav2_tools, sets the ICAv2 env vars without reading the ICAv2 access token secret,
+the call to Secrets Manager is only counted
+"""
+
+# Standard library imports
+from os import environ
+
+# Local imports
+from fake_world import get_fake_world
+
+
+def set_icav2_env_vars():
+    get_fake_world().record_call("secretsManager")
+    environ["ICAV2_BASE_URL"] = "https://fake-icav2.local/ica/rest"
+    environ["ICAV2_ACCESS_TOKEN"] = "fake-icav2-access-token"  # pragma: allowlist secret
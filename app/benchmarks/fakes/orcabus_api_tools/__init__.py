@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+
+"""
+Fake orcabus_api_tools, answered from the fake world.
+
+Only the functions the lambdas and the bssh_tool_kit layer use are provided.
+"""
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+
+"""
+Fake metadata service
+"""
+
+# Standard library imports
+from copy import deepcopy
+from typing import Dict, List
+
+# Local imports
+from fake_world import get_fake_world
+
+
+def get_libraries_list_from_library_id_list(
+        library_id_list: List[str],
+        accept_missing: bool = False,
+) -> List[Dict]:
+    get_fake_world().record_list_call("metadata", len(library_id_list))
+    libraries = get_fake_world().libraries
+
+    missing_library_ids = list(filter(
+        lambda library_id_iter_: library_id_iter_ not in libraries,
+        library_id_list
+    ))
+    if len(missing_library_ids) > 0 and not accept_missing:
+        raise ValueError(f"Could not find libraries {', '.join(missing_library_ids)}")
+
+    return deepcopy(list(map(
+        lambda library_id_iter_: libraries[library_id_iter_],
+        filter(
+            lambda library_id_iter_: library_id_iter_ in libraries,
+            library_id_list
+        )
+    )))
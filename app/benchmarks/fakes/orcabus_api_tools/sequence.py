@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+"""
+Fake sequence run manager (SRM)
+"""
+
+# Standard library imports
+from pathlib import Path
+from typing import Dict, List, Union
+
+# Local imports
+from fake_world import get_fake_world
+
+
+def get_sample_sheet_from_instrument_run_id(instrument_run_id: str) -> Dict:
+    get_fake_world().record_call("srm")
+    return {
+        "sampleSheetName": "SampleSheet.csv",
+        "sampleSheetContentOriginal": get_fake_world().srm_samplesheets[instrument_run_id],
+    }
+
+
+def get_library_id_list_from_instrument_run_id(instrument_run_id: str) -> List[str]:
+    get_fake_world().record_call("srm")
+    return list(get_fake_world().srm_library_ids[instrument_run_id])
+
+
+def add_samplesheet(
+        instrument_run_id: str,
+        samplesheet_path: Union[Path, str],
+        created_by: str,
+        comment: str,
+):
+    get_fake_world().record_call("srm")
+    get_fake_world().srm_added_samplesheets.append({
+        "instrumentRunId": instrument_run_id,
+        "sampleSheetContent": Path(samplesheet_path).read_text(),
+        "createdBy": created_by,
+        "comment": comment,
+    })
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+"""
+Fake workflow manager
+"""
+
+# Standard library imports
+from copy import deepcopy
+from typing import Dict, List, Optional
+
+# Local imports
+from fake_world import get_fake_world
+
+
+def list_workflows(
+        workflow_name: Optional[str] = None,
+        workflow_version: Optional[str] = None,
+) -> List[Dict]:
+    workflows = list(filter(
+        lambda workflow_iter_: (
+            (workflow_name is None or workflow_iter_['name'] == workflow_name) and
+            (workflow_version is None or workflow_iter_['version'] == workflow_version)
+        ),
+        get_fake_world().workflows
+    ))
+    get_fake_world().record_list_call("workflowManager", len(workflows))
+    return deepcopy(workflows)
+
+
+def list_workflow_runs(
+        workflow_name: Optional[str] = None,
+        current_status: Optional[str] = None,
+) -> List[Dict]:
+    workflow_runs = list(filter(
+        lambda workflow_run_iter_: (
+            (workflow_name is None or workflow_run_iter_['workflow']['name'] == workflow_name) and
+            (current_status is None or workflow_run_iter_['currentState']['status'] == current_status)
+        ),
+        get_fake_world().workflow_runs.values()
+    ))
+    get_fake_world().record_list_call("workflowManager", len(workflow_runs))
+    return deepcopy(workflow_runs)
+
+
+def get_workflow_run_from_portal_run_id(portal_run_id: str) -> Dict:
+    get_fake_world().record_call("workflowManager")
+    try:
+        return deepcopy(next(filter(
+            lambda workflow_run_iter_: workflow_run_iter_['portalRunId'] == portal_run_id,
+            get_fake_world().workflow_runs.values()
+        )))
+    except StopIteration:
+        raise ValueError(f"Could not find workflow run with portal run id '{portal_run_id}'")
+
+
+def get_latest_payload_from_workflow_run(workflow_run_orcabus_id: str) -> Optional[Dict]:
+    get_fake_world().record_call("workflowManager")
+    return deepcopy(get_fake_world().workflow_run_payloads.get(workflow_run_orcabus_id))
@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+
+"""
+Fake wrapica, answered from the fake world.
+
+Only the functions the lambdas and the bssh_tool_kit layer use are provided.
+Project data and analysis objects only have the attributes of the libica models that we use.
+"""
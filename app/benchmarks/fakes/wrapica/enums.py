@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+
+"""
+Fake wrapica enums
+"""
+
+# Standard library imports
+from enum import Enum
+
+
+class DataType(Enum):
+    FILE = "FILE"
+    FOLDER = "FOLDER"
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+"""
+Fake ICAv2 project analysis API
+"""
+
+# Standard library imports
+from types import SimpleNamespace
+from typing import Dict, List
+
+# Local imports
+from fake_world import get_fake_world
+
+
+def _get_analysis(project_id: str, analysis_id: str) -> Dict:
+    get_fake_world().record_call("icav2")
+    analysis = get_fake_world().analyses.get(analysis_id)
+    if analysis is None:
+        raise ValueError(f"Could not find analysis '{analysis_id}' in project '{project_id}'")
+    return analysis
+
+
+def get_project_analysis_inputs(project_id: str, analysis_id: str) -> List[SimpleNamespace]:
+    return list(map(
+        lambda input_iter_: SimpleNamespace(
+            code=input_iter_[0],
+            analysis_data=[SimpleNamespace(data_id=input_iter_[1])],
+        ),
+        _get_analysis(project_id, analysis_id)["inputs"].items()
+    ))
+
+
+def get_analysis_obj_from_analysis_id(project_id: str, analysis_id: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=analysis_id,
+        status=_get_analysis(project_id, analysis_id)["status"],
+    )
+
+
+def get_analysis_output_object_from_analysis_output_code(
+        project_id: str,
+        analysis_id: str,
+        analysis_output_code: str,
+) -> SimpleNamespace:
+    return SimpleNamespace(
+        code=analysis_output_code,
+        project_id=project_id,
+        data=[SimpleNamespace(
+            data_id=_get_analysis(project_id, analysis_id)["outputs"][analysis_output_code]
+        )],
+    )
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+"""
+Fake ICAv2 project data API
+"""
+
+# Standard library imports
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional, Union
+from urllib.parse import urlparse
+
+# Local imports
+from fake_world import ICAV2_DOWNLOAD_URL, get_fake_world
+from .enums import DataType
+
+
+def get_project_data_obj_by_id(project_id: str, data_id: str) -> SimpleNamespace:
+    get_fake_world().record_call("icav2")
+    project_data_obj = get_fake_world().project_data.get(data_id)
+    if project_data_obj is None or project_data_obj.project_id != project_id:
+        raise FileNotFoundError(f"Could not find '{data_id}' in project '{project_id}'")
+    return project_data_obj
+
+
+def get_project_data_obj_from_project_id_and_path(
+        project_id: str,
+        data_path: Union[Path, str],
+        data_type: Optional[DataType] = None,
+) -> SimpleNamespace:
+    get_fake_world().record_call("icav2")
+    return get_fake_world().get_project_data_obj_by_path(project_id, str(data_path))
+
+
+def convert_project_data_obj_to_uri(project_data_obj: SimpleNamespace) -> str:
+    return f"icav2://{project_data_obj.project_id}{project_data_obj.data.details.path}"
+
+
+def convert_uri_to_project_data_obj(uri: str) -> SimpleNamespace:
+    get_fake_world().record_call("icav2")
+    uri_obj = urlparse(uri)
+    return get_fake_world().get_project_data_obj_by_path(uri_obj.netloc, uri_obj.path)
+
+
+def create_download_url(project_id: str, file_id: str) -> str:
+    get_fake_world().record_call("icav2")
+    return f"{ICAV2_DOWNLOAD_URL}/{project_id}/{file_id}"
+
+
+def read_icav2_file_contents(project_id: str, data_id: str, output_path: Optional[Path] = None):
+    content = get_fake_world().file_contents[get_project_data_obj_by_id(project_id, data_id).data.id]
+    get_fake_world().record_call("icav2Download")
+    if output_path is None:
+        return content.decode()
+    Path(output_path).write_bytes(content)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+
+"""
+Handler service call benchmarks
+
+Drive every handler in app/lambdas through its representative event (./events/<lambda module>.json)
+against the fake services, with a configurable volume of data and latency per dependency,
+and report the wall time of each call to the handler and the number of calls it made to each dependency.
+
+Each handler runs in a fresh interpreter (a new lambda container), one cold call followed by warm calls,
+so that the effect of the warm container caches is visible.
+
+Calls are counted as one per request the real client would make,
+list endpoints of the orcabus apis as one call per page (see fake_world.ORCABUS_API_PAGE_SIZE).
+
+Usage (from the app directory):
+
+    # 5,000 historical bclconvert runs, 3,000 BaseSpace runs and 50 ms per call
+    python benchmarks/service_calls.py --workflow-runs 5000 --basespace-runs 3000 --latency-ms 50
+
+    # A slower BaseSpace, for some handlers only
+    python benchmarks/service_calls.py --latency-ms 20 --latency basespace=300 icav2Download=100 \\
+        --targets find_workflow create_new_workflow_run_object
+
+    # The current run has already been linked to its ICAv2 analysis, so is no longer a draft
+    python benchmarks/service_calls.py --current-workflow-run-status RUNNING
+"""
+
+# Standard library imports
+import argparse
+import json
+import subprocess
+import sys
+from copy import deepcopy
+from importlib import import_module
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Dict, List, Optional, TypedDict
+
+# Local imports
+from cold_start import (
+    EVENTS_DIR,
+    add_fakes_to_path,
+    get_child_env,
+    get_lambda_dirs,
+)
+
+# Globals
+DEFAULT_WARM_CALLS = 1
+
+
+class HandlerCallResult(TypedDict):
+    wallMs: float
+    totalCalls: int
+    callCounts: Dict[str, int]
+
+
+class HandlerResult(TypedDict):
+    calls: List[HandlerCallResult]
+    error: Optional[str]
+
+
+def run_handler(target: str, world_kwargs: Dict, warm_calls: int) -> HandlerResult:
+    """
+    Run the handler in a fresh interpreter
+    :param target:
+    :param world_kwargs: Passed through to the FakeWorld
+    :param warm_calls:
+    :return:
+    """
+    with TemporaryDirectory() as tmp_dir:
+        output_path = Path(tmp_dir) / "result.json"
+        process = subprocess.run(
+            [
+                sys.executable, __file__,
+                "--child", target,
+                "--child-world", json.dumps(world_kwargs),
+                "--child-output", str(output_path),
+                "--warm-calls", str(warm_calls),
+            ],
+            env=get_child_env(target, Path(tmp_dir)),
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode != 0:
+            raise RuntimeError(f"Running '{target}' failed\n{process.stderr}")
+
+        return json.loads(output_path.read_text())
+
+
+def child_main(target: str, world_kwargs: Dict, warm_calls: int, output_path: Path):
+    """
+    Run the handler against the fake world, in a fresh interpreter
+    :param target:
+    :param world_kwargs:
+    :param warm_calls:
+    :param output_path:
+    :return:
+    """
+    import fake_world
+
+    # Build the world before we start the clock
+    fake_world.set_fake_world(fake_world.FakeWorld(**world_kwargs))
+    fake_world.install()
+
+    module = import_module(target)
+    event = json.loads((EVENTS_DIR / f"{target}.json").read_text())
+
+    result: HandlerResult = {
+        "calls": [],
+        "error": None,
+    }
+
+    # Nothing should be called on import, but don't count it against the first call if it is
+    fake_world.get_fake_world().pop_call_counts()
+
+    for _ in range(warm_calls + 1):
+        start_time = perf_counter()
+        try:
+            module.handler(deepcopy(event), None)
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        wall_ms = (perf_counter() - start_time) * 1000
+
+        call_counts = fake_world.get_fake_world().pop_call_counts()
+        result["calls"].append({
+            "wallMs": round(wall_ms, 2),
+            "totalCalls": sum(call_counts.values()),
+            "callCounts": dict(sorted(call_counts.items())),
+        })
+
+        if result["error"] is not None:
+            break
+
+    output_path.write_text(json.dumps(result))
+
+
+def print_results(results: Dict[str, HandlerResult], dependencies: List[str]):
+    # Only show the dependencies that were called
+    called_dependencies = list(filter(
+        lambda dependency_iter_: any(
+            call_iter_["callCounts"].get(dependency_iter_, 0) > 0
+            for result_iter_ in results.values()
+            for call_iter_ in result_iter_["calls"]
+        ),
+        dependencies
+    ))
+
+    print(
+        f"{'target':<48}{'call':<6}{'wall ms':>10}{'calls':>7}" +
+        "".join(f"{dependency:>{len(dependency) + 2}}" for dependency in called_dependencies)
+    )
+    for target, result in results.items():
+        for call_index, call in enumerate(result["calls"]):
+            print(
+                f"{target if call_index == 0 else '':<48}"
+                f"{'cold' if call_index == 0 else 'warm':<6}"
+                f"{call['wallMs']:>10.1f}{call['totalCalls']:>7}" +
+                "".join(
+                    f"{call['callCounts'].get(dependency, 0):>{len(dependency) + 2}}"
+                    for dependency in called_dependencies
+                )
+            )
+        if result["error"] is not None:
+            print(f"{'':<48}error {result['error']}")
+
+
+def get_latency_ms(latency_ms: float, latency_overrides: List[str], dependencies: List[str]) -> Dict[str, float]:
+    """
+    Get the latency of each dependency from the default latency and the DEPENDENCY=MS overrides
+    :param latency_ms:
+    :param latency_overrides:
+    :param dependencies:
+    :return:
+    """
+    latency_by_dependency = {"default": latency_ms}
+    for latency_override in latency_overrides:
+        dependency, _, dependency_latency_ms = latency_override.partition("=")
+        if dependency not in dependencies:
+            raise ValueError(f"Unknown dependency '{dependency}', expected one of {', '.join(dependencies)}")
+        latency_by_dependency[dependency] = float(dependency_latency_ms)
+    return latency_by_dependency
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Wall time and calls per dependency for each handler")
+    parser.add_argument("--targets", nargs="+", help="Lambda module names, defaults to every lambda with an event")
+    parser.add_argument("--warm-calls", type=int, default=DEFAULT_WARM_CALLS)
+    parser.add_argument("--workflow-runs", type=int, help="Historical bclconvert workflow runs")
+    parser.add_argument("--basespace-runs", type=int, help="Historical BaseSpace runs")
+    parser.add_argument("--libraries", type=int, help="Libraries on the current run")
+    parser.add_argument("--current-workflow-run-status", help="Status of the current bclconvert workflow run")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latency of every call")
+    parser.add_argument(
+        "--latency", nargs="+", default=[], metavar="DEPENDENCY=MS",
+        help="Latency of the calls to a dependency, overrides --latency-ms"
+    )
+    parser.add_argument("--output", type=Path, help="Write the results to this path")
+
+    # Used internally to run a single handler
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--child-world", help=argparse.SUPPRESS)
+    parser.add_argument("--child-output", type=Path, help=argparse.SUPPRESS)
+
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    if args.child is not None:
+        child_main(args.child, json.loads(args.child_world), args.warm_calls, args.child_output)
+        return
+
+    add_fakes_to_path()
+    from fake_world import FAKE_DEPENDENCIES
+
+    world_kwargs = dict(filter(
+        lambda kwarg_iter_: kwarg_iter_[1] is not None,
+        {
+            "workflow_run_count": args.workflow_runs,
+            "basespace_run_count": args.basespace_runs,
+            "library_count": args.libraries,
+            "current_workflow_run_status": args.current_workflow_run_status,
+            "latency_ms": get_latency_ms(args.latency_ms, args.latency, FAKE_DEPENDENCIES),
+        }.items()
+    ))
+
+    targets = args.targets or list(filter(
+        lambda target_iter_: (EVENTS_DIR / f"{target_iter_}.json").is_file(),
+        get_lambda_dirs()
+    ))
+
+    results: Dict[str, HandlerResult] = {}
+    for target in targets:
+        if target not in get_lambda_dirs():
+            raise ValueError(f"Unknown target '{target}', expected one of {', '.join(get_lambda_dirs())}")
+        print(f"Running {target}", file=sys.stderr)
+        results[target] = run_handler(target, world_kwargs, warm_calls=args.warm_calls)
+
+    print_results(results, FAKE_DEPENDENCIES)
+
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({
+            "world": world_kwargs,
+            "warmCalls": args.warm_calls,
+            "targets": results,
+        }, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,14 +9,16 @@ This may happen if the BCLConvert analysis was requeued from BaseSpace
 """
 
 # Standard imports
-from pathlib import Path
-from tempfile import NamedTemporaryFile
 from textwrap import dedent
 
 # Layer imports
 from orcabus_api_tools.sequence import add_samplesheet
-from icav2_tools import set_icav2_env_vars
-from bssh_tool_kit import download_samplesheet_to_path_from_uri
+from bssh_tool_kit import (
+    instrument_handler,
+    dependency_call,
+    set_cached_icav2_env_vars,
+    get_samplesheet_from_uri,
+)
 
 # Globals
 DEFAULT_COMMENT = dedent(
@@ -28,6 +30,7 @@ when running analysis id '{__ANALYSIS_ID__}'.
 DEFAULT_CREATOR = "service-bclconvert-manager"
 
 
+@instrument_handler
 def handler(event, context):
     """
     Add samplesheet to SRM manager
@@ -36,22 +39,18 @@ def handler(event, context):
     :return:
     """
     # Set icav2 env vars
-    set_icav2_env_vars()
+    set_cached_icav2_env_vars()
 
     # Inputs
     instrument_run_id = event.get("instrumentRunId")
     samplesheet_uri = event.get("samplesheetUri")
     analysis_id = event.get("analysisId")
 
-    with NamedTemporaryFile(suffix=".csv") as temp_samplesheet_file:
-        # Download the samplesheet to a temporary file
-        samplesheet_path = Path(temp_samplesheet_file.name)
-        download_samplesheet_to_path_from_uri(
-            samplesheet_uri=samplesheet_uri,
-            output_path=samplesheet_path
-        )
+    # Download the samplesheet
+    samplesheet_path = get_samplesheet_from_uri(samplesheet_uri).path
 
-        # Add samplesheet to SRM
+    # Add samplesheet to SRM
+    with dependency_call("srm"):
         add_samplesheet(
             instrument_run_id=instrument_run_id,
             samplesheet_path=samplesheet_path,
@@ -2,8 +2,10 @@
 
 """
 Check if the samplesheet exists in the SRM manager for the given instrument run id.
+
+If the analysis context (from the create new workflow run object lambda) has the checksum
+of the same samplesheet, we use it rather than downloading the samplesheet again.
 """
-from icav2_tools import set_icav2_env_vars
 
 #!/usr/bin/env python3
 
@@ -27,11 +29,15 @@ We do not intend to set the inputs or the engine parameters here
 # Standard library imports
 
 # Layer imports
-from bssh_tool_kit.basespace_helpers import (
+from bssh_tool_kit import (
+    instrument_handler,
+    set_cached_icav2_env_vars,
+    read_analysis_context,
     get_samplesheet_md5sum_from_instrument_run_id,
-    get_samplesheet_md5sum_from_samplesheet_uri
+    get_samplesheet_md5sum_from_samplesheet_uri,
 )
 
+@instrument_handler
 def handler(event, context):
     """
     Given the input event, update the workflow run object accordingly.
@@ -40,17 +46,25 @@ def handler(event, context):
     :return:
     """
     # Set ica env vars
-    set_icav2_env_vars()
+    set_cached_icav2_env_vars()
 
     # ICA Mode
     instrument_run_id = event.get("instrumentRunId")
     samplesheet_uri = event.get("samplesheetUri")
+    analysis_context = read_analysis_context(event.get("analysisContext"))
 
     # Compare the samplesheet checksum from the event with the one from SRM
-    srm_samplesheet_checksum = get_samplesheet_md5sum_from_instrument_run_id(instrument_run_id),
-    bclconvert_samplesheet_checksum = get_samplesheet_md5sum_from_samplesheet_uri(
-        samplesheet_uri=samplesheet_uri
-    )
+    srm_samplesheet_checksum = get_samplesheet_md5sum_from_instrument_run_id(instrument_run_id)
+    if (
+        analysis_context is not None and
+        analysis_context['sampleSheetUri'] == samplesheet_uri and
+        analysis_context['samplesheetChecksum'] is not None
+    ):
+        bclconvert_samplesheet_checksum = analysis_context['samplesheetChecksum']
+    else:
+        bclconvert_samplesheet_checksum = get_samplesheet_md5sum_from_samplesheet_uri(
+            samplesheet_uri=samplesheet_uri
+        )
 
     return {
         "srmHasSamplesheet": (
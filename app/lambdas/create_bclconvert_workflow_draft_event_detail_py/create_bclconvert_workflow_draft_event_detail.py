@@ -24,17 +24,20 @@ from os import environ
 from datetime import datetime, timezone
 
 # Layer imports
-from orcabus_api_tools.utils.aws_helpers import get_ssm_value
 from orcabus_api_tools.sequence import (
     get_library_id_list_from_instrument_run_id,
 )
 from orcabus_api_tools.workflow import list_workflows
 from orcabus_api_tools.metadata import get_libraries_list_from_library_id_list
 
-from bssh_tool_kit.basespace_helpers import get_samplesheet_md5sum_from_instrument_run_id
 from bssh_tool_kit import (
-    get_experiment_name_from_instrument_run_id,
-    get_basespace_run_id_from_instrument_run_id, DEFAULT_SAMPLESHEET_CHECKSUM_TYPE,
+    instrument_handler,
+    dependency_call,
+    get_samplesheet_md5sum_from_instrument_run_id,
+    get_cached_ssm_value,
+    get_basespace_run_info_from_instrument_run_id,
+    get_workflow_run_index,
+    DEFAULT_SAMPLESHEET_CHECKSUM_TYPE,
 )
 
 # Globals
@@ -81,6 +84,7 @@ def create_workflow_name(
     ])
 
 
+@instrument_handler
 def handler(event, context):
     """
     Given the input event, update the workflow run object accordingly.
@@ -94,18 +98,25 @@ def handler(event, context):
     # Generate the portal run id
     portal_run_id = create_portal_run_id()
 
+    # Get the default workflow version
+    workflow_version = get_cached_ssm_value(environ[DEFAULT_WORKFLOW_VERSION_SSM_PARAMETER_NAME_ENV_VAR])
+
+    # Get the experiment name and basespace run id in a single lookup
+    basespace_run_info = get_basespace_run_info_from_instrument_run_id(instrument_run_id)
+
     # Get the bclconvert workflow object from the workflow manager
     try:
-        workflow_object = next(iter(
-            list_workflows(
-                workflow_name=WORKFLOW_NAME,
-                workflow_version=get_ssm_value(environ[DEFAULT_WORKFLOW_VERSION_SSM_PARAMETER_NAME_ENV_VAR]),
-            )
-        ))
+        with dependency_call("workflowManager"):
+            workflow_object = next(iter(
+                list_workflows(
+                    workflow_name=WORKFLOW_NAME,
+                    workflow_version=workflow_version,
+                )
+            ))
     except StopIteration:
         workflow_object = {
             "name": WORKFLOW_NAME,
-            "version": get_ssm_value(environ[DEFAULT_WORKFLOW_VERSION_SSM_PARAMETER_NAME_ENV_VAR]),
+            "version": workflow_version,
         }
 
     # Generate the workflow run object
@@ -116,7 +127,7 @@ def handler(event, context):
         "workflowRunName": create_workflow_name(
             workflow_prefix=WORKFLOW_PREFIXES,
             workflow_name=WORKFLOW_NAME,
-            workflow_version=get_ssm_value(environ[DEFAULT_WORKFLOW_VERSION_SSM_PARAMETER_NAME_ENV_VAR]),
+            workflow_version=workflow_version,
             portal_run_id=portal_run_id,
         ),
         "payload": {
@@ -124,8 +135,8 @@ def handler(event, context):
             "data": {
                 "tags": {
                     "instrumentRunId": instrument_run_id,
-                    "experimentRunName": get_experiment_name_from_instrument_run_id(instrument_run_id),
-                    "basespaceRunId": int(get_basespace_run_id_from_instrument_run_id(instrument_run_id)),
+                    "experimentRunName": basespace_run_info['experimentRunName'],
+                    "basespaceRunId": basespace_run_info['basespaceRunId'],
                     "samplesheetChecksum": get_samplesheet_md5sum_from_instrument_run_id(instrument_run_id),
                     "samplesheetChecksumType": DEFAULT_SAMPLESHEET_CHECKSUM_TYPE,
                 }
@@ -134,9 +145,17 @@ def handler(event, context):
     }
 
     # Use the SRM
-    library_id_list_srm = get_library_id_list_from_instrument_run_id(
-        instrument_run_id=instrument_run_id
-    )
+    with dependency_call("srm"):
+        library_id_list_srm = get_library_id_list_from_instrument_run_id(
+            instrument_run_id=instrument_run_id
+        )
+
+    # Get the libraries from the metadata manager
+    with dependency_call("metadata"):
+        libraries_list = get_libraries_list_from_library_id_list(
+            library_id_list_srm,
+            accept_missing=True
+        )
 
     # Update libraries
     workflow_run_object['libraries'] = list(map(
@@ -144,12 +163,12 @@ def handler(event, context):
             "libraryId": library_obj_['libraryId'],
             "orcabusId": library_obj_['orcabusId'],
         },
-        get_libraries_list_from_library_id_list(
-            library_id_list_srm,
-            accept_missing=True
-        )
+        libraries_list
     ))
 
+    # Record the workflow run so that later events can be linked to it without a scan
+    get_workflow_run_index().record_workflow_run(workflow_run_object)
+
     return {
         "eventDetail": workflow_run_object
     }
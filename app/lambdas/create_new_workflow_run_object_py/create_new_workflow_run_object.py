@@ -10,6 +10,7 @@ Create a new workflow run update object with one of the following inputs:
 * projectId
 * pipelineId
 * analysisId
+* analysisContext (optional, from the find workflow lambda)
 
 This should only occur after a retry given SRM doesn't produce a new event if a new bclconvert workflow run is initiated
 
@@ -39,6 +40,9 @@ If the following don't exist in the existing payload, they will be created:
   * pipelineId
   * analysisId
 
+We use the analysis context for the inputs, instrument run id and BaseSpace tags if we are given one,
+and return it along with the samplesheet checksum so that the samplesheet is not downloaded again
+when we check it against the SRM.
 """
 
 # Standard library imports
@@ -47,26 +51,20 @@ from typing import List, Literal
 from os import environ
 from datetime import datetime, timezone
 
-# Wrapica imports
-from wrapica.project_analysis import (
-    get_project_analysis_inputs,
-)
-
 # Layer imports
-from orcabus_api_tools.utils.aws_helpers import get_ssm_value
 from orcabus_api_tools.workflow import list_workflows
 from orcabus_api_tools.metadata import get_libraries_list_from_library_id_list
-from icav2_tools import set_icav2_env_vars
 
 # BSSH Imports
 from bssh_tool_kit import (
-    get_instrument_run_id_from_run_info_xml,
-    get_experiment_name_from_instrument_run_id,
-    get_basespace_run_id_from_instrument_run_id,
-    get_run_folder_input_uri_from_ica_inputs,
-    get_sample_sheet_uri_from_ica_inputs,
-    get_library_ids_from_samplesheet_uri,
-    get_samplesheet_md5sum_from_samplesheet_uri,
+    instrument_handler,
+    dependency_call,
+    get_cached_ssm_value,
+    set_cached_icav2_env_vars,
+    get_analysis_context,
+    read_analysis_context,
+    get_samplesheet_from_uri,
+    get_workflow_run_index,
 )
 
 # Globals
@@ -117,6 +115,7 @@ def create_workflow_name(
     ])
 
 
+@instrument_handler
 def handler(event, context):
     """
     Given the input event, update the workflow run object accordingly.
@@ -130,6 +129,10 @@ def handler(event, context):
     project_id = event.get("projectId")
     pipeline_id = event.get("pipelineId")
     analysis_id = event.get("analysisId")
+    analysis_context = read_analysis_context(
+        event.get("analysisContext"),
+        analysis_id=analysis_id,
+    )
 
     # Check one mode is used
     if not (
@@ -140,50 +143,51 @@ def handler(event, context):
         raise ValueError("Must provide either projectId + pipelineId + analysisId")
 
     # Set ICAv2 env vars
-    set_icav2_env_vars()
+    set_cached_icav2_env_vars()
 
     # Generate the portal run id
     portal_run_id = create_portal_run_id()
 
+    # Get the default workflow version
+    workflow_version = get_cached_ssm_value(environ[DEFAULT_WORKFLOW_VERSION_SSM_PARAMETER_NAME_ENV_VAR])
+
     # Get the bclconvert workflow object from the workflow manager
     try:
-        workflow_object = next(iter(
-            list_workflows(
-                workflow_name=WORKFLOW_NAME,
-                workflow_version=get_ssm_value(environ[DEFAULT_WORKFLOW_VERSION_SSM_PARAMETER_NAME_ENV_VAR]),
-            )
-        ))
+        with dependency_call("workflowManager"):
+            workflow_object = next(iter(
+                list_workflows(
+                    workflow_name=WORKFLOW_NAME,
+                    workflow_version=workflow_version,
+                )
+            ))
     except StopIteration:
         workflow_object = {
             "name": WORKFLOW_NAME,
-            "version": get_ssm_value(environ[DEFAULT_WORKFLOW_VERSION_SSM_PARAMETER_NAME_ENV_VAR]),
+            "version": workflow_version,
         }
 
-    # ICA Inputs
-    ica_inputs = get_project_analysis_inputs(
-        project_id=project_id,
-        analysis_id=analysis_id,
-    )
-
-    # Run folder input
-    input_uri = get_run_folder_input_uri_from_ica_inputs(
-        ica_inputs,
-        project_id=project_id,
-    )
-    samplesheet_uri = get_sample_sheet_uri_from_ica_inputs(
-        ica_inputs,
-        project_id=project_id,
-    )
-
-    # Get the instrument run id, used to get tags and libraries
-    instrument_run_id = get_instrument_run_id_from_run_info_xml(
-        run_info_xml_uri=(input_uri + 'RunInfo.xml')
-    )
-
-    # Query libraries from the sample sheet
-    library_id_list = get_library_ids_from_samplesheet_uri(
-        samplesheet_uri=samplesheet_uri
-    )
+    # Resolve the analysis inputs, instrument run id and basespace run id, unless we already have them
+    if analysis_context is None:
+        analysis_context = get_analysis_context(
+            project_id=project_id,
+            analysis_id=analysis_id,
+        )
+
+    # Download the sample sheet once, for both the libraries and the checksum
+    samplesheet = get_samplesheet_from_uri(analysis_context['sampleSheetUri'])
+
+    # Query libraries from the sample sheet,
+    # before the checksum so that the checksum is taken over the downloaded samplesheet
+    # rather than streamed from ICAv2 a second time
+    library_id_list = samplesheet.library_ids
+    analysis_context['samplesheetChecksum'] = samplesheet.checksum
+
+    # Get the libraries from the metadata manager
+    with dependency_call("metadata"):
+        libraries_list = get_libraries_list_from_library_id_list(
+            library_id_list,
+            accept_missing=True
+        )
 
     # Generate the workflow run object
     workflow_run_object = {
@@ -193,23 +197,21 @@ def handler(event, context):
         "workflowRunName": create_workflow_name(
             workflow_prefix=WORKFLOW_PREFIXES,
             workflow_name=WORKFLOW_NAME,
-            workflow_version=get_ssm_value(environ[DEFAULT_WORKFLOW_VERSION_SSM_PARAMETER_NAME_ENV_VAR]),
+            workflow_version=workflow_version,
             portal_run_id=portal_run_id,
         ),
         "payload": {
             "version": DEFAULT_PAYLOAD_VERSION,
             "data": {
                 "inputs": {
-                    "inputUri": input_uri,
-                    "sampleSheetUri": samplesheet_uri,
+                    "inputUri": analysis_context['inputUri'],
+                    "sampleSheetUri": analysis_context['sampleSheetUri'],
                 },
                 "tags": {
-                    "instrumentRunId": instrument_run_id,
-                    "experimentRunName": get_experiment_name_from_instrument_run_id(instrument_run_id),
-                    "basespaceRunId": int(get_basespace_run_id_from_instrument_run_id(instrument_run_id)),
-                    "samplesheetChecksum": get_samplesheet_md5sum_from_samplesheet_uri(
-                        samplesheet_uri=samplesheet_uri
-                    ),
+                    "instrumentRunId": analysis_context['instrumentRunId'],
+                    "experimentRunName": analysis_context['experimentRunName'],
+                    "basespaceRunId": analysis_context['basespaceRunId'],
+                    "samplesheetChecksum": samplesheet.checksum,
                     "samplesheetChecksumType": DEFAULT_SAMPLESHEET_CHECKSUM_TYPE
                 },
                 "engineParameters": {
@@ -224,13 +226,14 @@ def handler(event, context):
                 "libraryId": library_obj_['libraryId'],
                 "orcabusId": library_obj_['orcabusId'],
             },
-            get_libraries_list_from_library_id_list(
-                library_id_list,
-                accept_missing=True
-            )
+            libraries_list
         ))
     }
 
+    # Record the workflow run so that later events can be linked to it without a scan
+    get_workflow_run_index().record_workflow_run(workflow_run_object)
+
     return {
-        "workflowRunObject": workflow_run_object
+        "workflowRunObject": workflow_run_object,
+        "analysisContext": analysis_context,
     }
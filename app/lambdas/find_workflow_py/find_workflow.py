@@ -14,29 +14,95 @@ There are two modes for input in this lambda:
 
 * analysisId
 
-For both events we must query the workflow manager for all bclconvert workflows and filter to the one we want
+For both events we must query the workflow manager for all bclconvert workflows and filter to the one we want,
+we keep the bclconvert workflow runs (and the tags and engine parameters of their payloads) in a cache
+that is refreshed incrementally on each call
+
+# Match tiers
+
+We try the cheapest matches first, and only resolve the analysis (ICA inputs, RunInfo.xml and BaseSpace)
+if the analysis has not already been linked to a workflow run by a previous event:
+
+1. analysisIdIndex: the analysis id in the workflow run index
+2. analysisIdActiveScan: the analysis id in the payloads of the active (DRAFT -> RUNNING) workflow runs
+3. basespaceRunIdIndex: the basespace run id of the analysis in the workflow run index, DRAFT runs only
+4. basespaceRunIdScan: the basespace run id of the analysis in the payloads of the DRAFT workflow runs
+5. analysisIdTerminalScan: the analysis id in the payloads of all other workflow runs
+
+So every ICA event after the first for an analysis is matched without resolving the analysis.
+
+We record a MatchTier.<tier> metric for every tier (and MatchTier.none) on each invocation,
+1 for the tier that matched and 0 for the others, so the average of each metric is the hit rate of its tier.
+We also return the tier that matched.
+
+We also return the analysis context (the resolved analysis inputs, instrument run id and BaseSpace run)
+if we had to resolve it, so that the lambdas after us in the state machine don't need to look it all up again
 """
 
-# Wrapica imports
-from wrapica.project_analysis import get_project_analysis_inputs
+# Standard library imports
+from typing import Dict, Optional
 
 # Layer
-from icav2_tools import set_icav2_env_vars
-from orcabus_api_tools.workflow import (
-    list_workflow_runs,
-    get_latest_payload_from_workflow_run,
-)
-
 from bssh_tool_kit import (
-    get_instrument_run_id_from_run_info_xml,
-    get_basespace_run_id_from_instrument_run_id,
-    get_run_folder_input_uri_from_ica_inputs,
+    AnalysisContext,
+    instrument_handler,
+    record_metric,
+    set_cached_icav2_env_vars,
+    get_analysis_context,
+    get_workflow_run_index,
+    get_workflow_run_cache,
 )
 
 # Globals
 WORKFLOW_RUN_NAME = 'bclconvert'
 
+# Workflow runs that may still receive ICA events for a new analysis
+ACTIVE_STATUSES = [
+    "DRAFT",
+    "READY",
+    "STARTING",
+    "RUNNING",
+]
+
+# In the order we try them
+MATCH_TIERS = [
+    "analysisIdIndex",
+    "analysisIdActiveScan",
+    "basespaceRunIdIndex",
+    "basespaceRunIdScan",
+    "analysisIdTerminalScan",
+]
+NO_MATCH_TIER = "none"
+
+
+def record_match_tier(match_tier: Optional[str]):
+    """
+    Record 1 for the tier that matched and 0 for every other tier
+    :param match_tier: None if no tier matched
+    :return:
+    """
+    for tier in MATCH_TIERS + [NO_MATCH_TIER]:
+        record_metric(f"MatchTier.{tier}", 1 if tier == (match_tier or NO_MATCH_TIER) else 0)
+
+
+def get_match_response(
+        workflow_run_object: Optional[Dict],
+        match_tier: Optional[str],
+        analysis_context: Optional[AnalysisContext] = None,
+) -> Dict:
+    record_match_tier(match_tier)
+    return {
+        "workflowRunObject": workflow_run_object,
+        "analysisContext": analysis_context,
+        "matchTier": match_tier,
+    }
+
+
+def get_workflow_run_status(workflow_run_object: Dict) -> Optional[str]:
+    return workflow_run_object.get("currentState", {}).get("status")
 
+
+@instrument_handler
 def handler(event, context):
     # Get inputs
     project_id = event.get('projectId')
@@ -48,88 +114,80 @@ def handler(event, context):
     ):
         raise ValueError("Must provide projectId + analysisId")
 
-    # Get bclconvert workflow objects
-    bclconvert_workflow_list = list_workflow_runs(
-        workflow_name=WORKFLOW_RUN_NAME,
+    # Tier 1, the analysis has already been linked to a workflow run by a previous event
+    workflow_run_object = get_workflow_run_index().find_workflow_run(
+        key_type="analysisId",
+        value=analysis_id,
     )
+    if workflow_run_object is not None:
+        return get_match_response(workflow_run_object, "analysisIdIndex")
+
+    # Get bclconvert workflow objects
+    workflow_run_cache = get_workflow_run_cache(WORKFLOW_RUN_NAME)
+    workflow_run_cache.refresh()
+    bclconvert_workflow_list = workflow_run_cache.list_workflow_runs()
 
     if len(bclconvert_workflow_list) == 0:
+        record_match_tier(None)
         return None
 
-    # ICA Mode
-    set_icav2_env_vars()
+    active_workflow_list = list(filter(
+        lambda workflow_run_iter_: get_workflow_run_status(workflow_run_iter_) in ACTIVE_STATUSES,
+        bclconvert_workflow_list
+    ))
+
+    # Tier 2, as tier 1 but the link is not in the index (i.e. made before the index existed)
+    workflow_run_object = workflow_run_cache.find_first_workflow_run_by_payload(
+        active_workflow_list,
+        lambda payload_iter_: (
+            payload_iter_.get("data", {}).get("engineParameters", {}).get("analysisId") == analysis_id
+        ),
+    )
+    if workflow_run_object is not None:
+        return get_match_response(workflow_run_object, "analysisIdActiveScan")
 
-    # ICA Inputs
-    ica_inputs = get_project_analysis_inputs(
+    # The first event for this analysis, resolve the analysis inputs, instrument run id and basespace run id
+    set_cached_icav2_env_vars()
+    analysis_context = get_analysis_context(
         project_id=project_id,
         analysis_id=analysis_id,
     )
+    basespace_run_id = analysis_context['basespaceRunId']
 
-    # Run folder input
-    input_uri = get_run_folder_input_uri_from_ica_inputs(
-        ica_inputs,
-        project_id=project_id,
+    # Tier 3, the draft created from the SRM event
+    workflow_run_object = get_workflow_run_index().find_workflow_run(
+        key_type="basespaceRunId",
+        value=basespace_run_id,
+        statuses=["DRAFT"],
     )
-
-    # Get the instrument run id from the RunInfo.xml file
-    instrument_run_id = get_instrument_run_id_from_run_info_xml(
-        run_info_xml_uri=(input_uri + 'RunInfo.xml')
+    if workflow_run_object is not None:
+        return get_match_response(workflow_run_object, "basespaceRunIdIndex", analysis_context)
+
+    # Tier 4, as tier 3 but the draft is not in the index
+    workflow_run_object = workflow_run_cache.find_first_workflow_run_by_payload(
+        filter(
+            lambda workflow_run_iter_: get_workflow_run_status(workflow_run_iter_) == "DRAFT",
+            active_workflow_list
+        ),
+        lambda payload_iter_: (
+            payload_iter_.get("data", {}).get("tags", {}).get("basespaceRunId") == basespace_run_id
+        ),
     )
-
-    # Get the basespace run id from the API endpoint
-    basespace_run_id = get_basespace_run_id_from_instrument_run_id(instrument_run_id)
-
-    # From SRM event
-    bclconvert_draft_workflow_list = list_workflow_runs(
-        workflow_name=WORKFLOW_RUN_NAME,
-        current_status="DRAFT"
+    if workflow_run_object is not None:
+        return get_match_response(workflow_run_object, "basespaceRunIdScan", analysis_context)
+
+    # Tier 5, a late event for an analysis whose workflow run has already finished,
+    # the workflow runs are listed in full before we answer that there is none
+    workflow_run_object = workflow_run_cache.search_workflow_runs_by_payload(
+        lambda payload_iter_: (
+            payload_iter_.get("data", {}).get("engineParameters", {}).get("analysisId") == analysis_id
+        ),
+        workflow_run_filter=lambda workflow_run_iter_: (
+            get_workflow_run_status(workflow_run_iter_) not in ACTIVE_STATUSES
+        ),
     )
-    # Try link on the basespace run id tag
-    if len(bclconvert_draft_workflow_list) > 0:
-        try:
-            workflow_run_object = next(filter(
-                lambda workflow_iter_: (
-                    False
-                    if get_latest_payload_from_workflow_run(workflow_iter_['orcabusId']) is None
-                    else
-                    (
-                        get_latest_payload_from_workflow_run(workflow_iter_['orcabusId'])
-                        .get("data", {})
-                        .get("tags", {})
-                        .get("basespaceRunId")
-                    ) == basespace_run_id
-                ),
-                bclconvert_draft_workflow_list
-            ))
-        except StopIteration:
-            workflow_run_object = None
-
-        if workflow_run_object is not None:
-            return {
-                "workflowRunObject": workflow_run_object
-            }
-
-    # We have a running workflow, link on that using the analysis id
-    # ICA mode
-    try:
-        workflow_run_object = next(filter(
-            lambda workflow_iter_: (
-                False
-                if get_latest_payload_from_workflow_run(workflow_iter_['orcabusId']) is None
-                else
-                (
-                    get_latest_payload_from_workflow_run(workflow_iter_['orcabusId'])
-                    .get("data", {})
-                    .get("engineParameters", {})
-                    .get("analysisId")
-                ) == analysis_id
-            ),
-            bclconvert_workflow_list
-        ))
-    except StopIteration:
-        return None
+    if workflow_run_object is not None:
+        return get_match_response(workflow_run_object, "analysisIdTerminalScan", analysis_context)
 
-    # Return the workflow run object
-    return {
-        "workflowRunObject": workflow_run_object
-    }
+    # No workflow run for this analysis yet, return the analysis context for the new workflow run
+    return get_match_response(None, None, analysis_context)
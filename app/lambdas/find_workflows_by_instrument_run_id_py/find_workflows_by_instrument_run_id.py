@@ -9,23 +9,30 @@ a key 'instrumentRunId' with the given value and where we have a matching sample
 If we have a matching samplesheet, chances are we have a link with this BCLConvert run already.
 
 Otherwise return an empty list
-"""
 
-# Standard library imports
-from functools import reduce
-from operator import concat
+The bclconvert workflow runs (and the tags of their payloads) are kept in a cache that is refreshed incrementally on each call
+"""
 
 # Layer
-from orcabus_api_tools.workflow import (
-    list_workflow_runs,
-    get_latest_payload_from_workflow_run,
+from bssh_tool_kit import (
+    instrument_handler,
+    get_workflow_run_index,
+    get_workflow_run_cache,
+    get_samplesheet_md5sum_from_instrument_run_id,
 )
-from bssh_tool_kit.basespace_helpers import get_samplesheet_md5sum_from_instrument_run_id
 
 # Globals
 WORKFLOW_RUN_NAME = 'bclconvert'
+WORKFLOW_RUN_STATUSES = [
+    "DRAFT",
+    "READY",
+    "STARTING",
+    "RUNNING",
+    "SUCCEEDED",
+]
 
 
+@instrument_handler
 def handler(event, context):
     # Get inputs
     instrument_run_id = event.get('instrumentRunId')
@@ -33,65 +40,33 @@ def handler(event, context):
     # Get latest samplesheet from instrument run id
     samplesheet_md5sum = get_samplesheet_md5sum_from_instrument_run_id(instrument_run_id)
 
-    # Get bclconvert workflow objects
-    bclconvert_workflow_list = list_workflow_runs(
-        workflow_name=WORKFLOW_RUN_NAME,
+    # Try the workflow run index first, falling back to a scan over the workflow runs on a miss
+    workflow_run_object = get_workflow_run_index().find_workflow_run(
+        key_type="samplesheetChecksum",
+        value=samplesheet_md5sum,
+        statuses=WORKFLOW_RUN_STATUSES,
     )
-
-    # If no workflows found, return empty
-    if len(bclconvert_workflow_list) == 0:
-        return None
-
-    # Check if any of the workflow objects have the given instrument run id
-    # in their latest payload
-    bclconvert_workflow_list = list(reduce(
-        concat,
-        list(map(
-            lambda status_iter_: list_workflow_runs(
-                workflow_name=WORKFLOW_RUN_NAME,
-                current_status=status_iter_
-            ),
-            [
-                "DRAFT",
-                "READY",
-                "STARTING",
-                "RUNNING",
-                "SUCCEEDED",
-            ]
-        ))
-    ))
-
-    # No runs with the status of interest, return empty
-    if len(bclconvert_workflow_list) == 0:
+    if workflow_run_object is not None:
         return {
-            "workflowRunsList": []
+            "workflowRunsList": [workflow_run_object]
         }
 
-    try:
-        workflow_run_object = next(filter(
-            lambda workflow_iter_: (
-                False
-                if get_latest_payload_from_workflow_run(workflow_iter_['orcabusId']) is None
-                else
-                (
-                        (
-                                get_latest_payload_from_workflow_run(workflow_iter_['orcabusId'])
-                                .get("data", {})
-                                .get("tags", {})
-                                .get("samplesheetChecksum")
-                        ) == samplesheet_md5sum
-                        and
-                        (
-                            get_latest_payload_from_workflow_run(workflow_iter_['orcabusId'])
-                            .get("data", {})
-                            .get("tags", {})
-                            .get("samplesheetChecksumType")
-                        ) == "md5"
-                )
-            ),
-            bclconvert_workflow_list
-        ))
-    except StopIteration:
+    # Check if any of the bclconvert workflow runs with a status of interest
+    # have the given samplesheet checksum in their latest payload,
+    # the workflow runs are listed in full before we answer that none do
+    workflow_run_cache = get_workflow_run_cache(WORKFLOW_RUN_NAME)
+    workflow_run_cache.refresh()
+    workflow_run_object = workflow_run_cache.search_workflow_runs_by_payload(
+        lambda payload_iter_: (
+            payload_iter_.get("data", {}).get("tags", {}).get("samplesheetChecksum") == samplesheet_md5sum and
+            payload_iter_.get("data", {}).get("tags", {}).get("samplesheetChecksumType") == "md5"
+        ),
+        workflow_run_filter=lambda workflow_run_iter_: (
+            workflow_run_iter_.get("currentState", {}).get("status") in WORKFLOW_RUN_STATUSES
+        ),
+    )
+
+    if workflow_run_object is None:
         return {
             "workflowRunsList": []
         }
@@ -16,6 +16,8 @@ portalRunId
 projectId
 pipelineId
 analysisId
+analysis (optional, the analysis payload of the ICA event)
+analysisContext (optional, from the find workflow lambda)
 
 We return the updated workflow run object and output is determined on the input method
 
@@ -45,33 +47,55 @@ If the following don't exist in the existing payload, they will be created:
   * analysisId
 
 AND IF the workflow status is SUCCEEDED we also add in the outputUri into the engine parameters.
+
+# Analysis status
+
+The ICA event that started the execution already carries the analysis status,
+so we use the status of the analysis payload of the event rather than fetching the analysis again.
+We only fall back to fetching the analysis if the event analysis is missing, is for another analysis,
+has a status we don't know, or is stale (modified before the current state of the workflow run was recorded,
+i.e. the event has arrived out of order).
+
+# Incremental updates
+
+ICA sends an IN_PROGRESS event on every heartbeat of an analysis, so most of the time there is nothing to update.
+We only look up the fields that are missing from the latest payload (and the libraries if not set),
+and return whether the workflow run object has changed, along with a field level diff
+(dotted field path -> old and new value) of its status, libraries and payload.
+
+The state machine only puts a workflow run update event if the object has changed.
+
+Missing inputs and tags are taken from the analysis context if we are given one,
+we only look them up from ICA and BaseSpace without it.
 """
 
-# Wrapica imports
-from wrapica.project_analysis import (
-    get_project_analysis_inputs,
-    get_analysis_obj_from_analysis_id,
-    get_analysis_output_object_from_analysis_output_code
-)
-from wrapica.project_data import (
-    convert_project_data_obj_to_uri,
-    get_project_data_obj_by_id
-)
+# Standard library imports
+from copy import deepcopy
+from datetime import datetime, timezone
+import typing
+from typing import Any, Dict, Optional
 
 # Layer imports
 from orcabus_api_tools.metadata import get_libraries_list_from_library_id_list
 from orcabus_api_tools.sequence import get_library_id_list_from_instrument_run_id
 from orcabus_api_tools.workflow import get_workflow_run_from_portal_run_id, get_latest_payload_from_workflow_run
-from icav2_tools import set_icav2_env_vars
 
 from bssh_tool_kit import (
-    get_instrument_run_id_from_run_info_xml,
-    get_experiment_name_from_instrument_run_id,
-    get_basespace_run_id_from_instrument_run_id,
-    get_run_folder_input_uri_from_ica_inputs,
-    get_sample_sheet_uri_from_ica_inputs
+    instrument_handler,
+    dependency_call,
+    set_cached_icav2_env_vars,
+    get_instrument_run_id_from_run_folder,
+    get_basespace_run_info_from_instrument_run_id,
+    get_folder_project_data_obj_from_uri,
+    resolve_ica_inputs,
+    read_analysis_context,
+    get_workflow_run_index,
 )
 
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from libica.openapi.v3 import ProjectData
+
 # Globals
 DEFAULT_PAYLOAD_VERSION = "2025.10.10"
 
@@ -83,6 +107,129 @@ STATUS_MAP = {
     "ABORTED": "ABORTED"
 }
 
+# Statuses that are set from ICA events,
+# the state timestamps of any other status (i.e. DRAFT, READY) cannot tell us if an event is stale
+ICA_WORKFLOW_RUN_STATUSES = set(STATUS_MAP.values())
+
+# ICA input code -> payload input key
+RUN_FOLDER_INPUT_CODE = "run_folder"
+INPUT_KEY_BY_CODE = {
+    RUN_FOLDER_INPUT_CODE: "inputUri",
+    "sample_sheet": "sampleSheetUri",
+}
+
+# Tags we set from the RunInfo.xml file and BaseSpace
+BASESPACE_TAG_KEYS = [
+    "instrumentRunId",
+    "experimentRunName",
+    "basespaceRunId",
+]
+
+
+def get_flattened_fields(obj: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """
+    Flatten nested dicts into dotted field paths, lists and empty dicts are kept as single values
+    (empty dicts are dropped, they are the same as a missing field to us)
+    :param obj:
+    :param prefix:
+    :return:
+    """
+    flattened_fields = {}
+    for key, value in obj.items():
+        field_path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flattened_fields.update(get_flattened_fields(value, prefix=f"{field_path}."))
+        else:
+            flattened_fields[field_path] = value
+    return flattened_fields
+
+
+def get_field_diff(old_obj: Dict[str, Any], new_obj: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get the fields that differ between the two objects
+    :param old_obj:
+    :param new_obj:
+    :return: Dotted field path -> {"old": old value, "new": new value}, missing values are None
+    """
+    old_fields = get_flattened_fields(old_obj)
+    new_fields = get_flattened_fields(new_obj)
+
+    return dict(map(
+        lambda field_path_iter_: (
+            field_path_iter_,
+            {
+                "old": old_fields.get(field_path_iter_),
+                "new": new_fields.get(field_path_iter_),
+            }
+        ),
+        filter(
+            lambda field_path_iter_: (
+                field_path_iter_ not in old_fields or
+                field_path_iter_ not in new_fields or
+                old_fields[field_path_iter_] != new_fields[field_path_iter_]
+            ),
+            sorted(set(old_fields) | set(new_fields))
+        )
+    ))
+
+
+def get_timestamp(timestamp_str: Optional[str]) -> Optional[datetime]:
+    """
+    Parse an ISO 8601 timestamp, either from an ICA event or a workflow run state
+    :param timestamp_str:
+    :return: None if missing or not a timestamp
+    """
+    if not timestamp_str:
+        return None
+    try:
+        timestamp = datetime.fromisoformat(timestamp_str)
+    except ValueError:
+        return None
+    # Compare naive timestamps as UTC
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
+def get_event_analysis_status(
+        analysis_id: str,
+        event_analysis: Optional[Dict],
+        current_state: Dict,
+) -> Optional[str]:
+    """
+    Get the ICA analysis status from the analysis payload of the event, if we can trust it
+    :param analysis_id:
+    :param event_analysis: The analysis payload of the ICA event
+    :param current_state: The current state of the workflow run
+    :return: None if the event analysis is missing, for another analysis, has an unknown status or is stale
+    """
+    if not event_analysis or event_analysis.get("id") != analysis_id:
+        return None
+
+    if event_analysis.get("status") not in STATUS_MAP:
+        return None
+
+    # Check the event is not older than the current state of the workflow run
+    time_modified = get_timestamp(event_analysis.get("timeModified"))
+    if time_modified is None:
+        return None
+    if current_state.get("status") in ICA_WORKFLOW_RUN_STATUSES:
+        state_timestamp = get_timestamp(current_state.get("timestamp"))
+        if state_timestamp is not None and time_modified < state_timestamp:
+            return None
+
+    return event_analysis["status"]
+
+
+def get_comparable_state(workflow_run_object: Dict, status: str, payload: Dict) -> Dict:
+    return deepcopy({
+        "status": status,
+        "libraries": workflow_run_object.get("libraries"),
+        "payload": payload,
+    })
+
+
+@instrument_handler
 def handler(event, context):
     """
     Given the input event, update the workflow run object accordingly.
@@ -98,6 +245,11 @@ def handler(event, context):
     project_id = event.get("projectId")
     pipeline_id = event.get("pipelineId")
     analysis_id = event.get("analysisId")
+    event_analysis = event.get("analysis")
+    analysis_context = read_analysis_context(
+        event.get("analysisContext"),
+        analysis_id=analysis_id,
+    )
 
     # Check one mode is used
     if (
@@ -112,104 +264,156 @@ def handler(event, context):
         raise ValueError("Must provide either portalRunId + projectId + pipelineId + analysisId (ICA mode)")
 
     # Set ICAv2 env vars (this takes a second which is why we don't do it unless we need to)
-    set_icav2_env_vars()
+    set_cached_icav2_env_vars()
 
     # Get the workflow run object
-    workflow_run_object = get_workflow_run_from_portal_run_id(portal_run_id)
+    with dependency_call("workflowManager"):
+        workflow_run_object = get_workflow_run_from_portal_run_id(portal_run_id)
+    current_state = workflow_run_object.get('currentState', {})
+    current_status = current_state.get('status')
 
     # Get the latest payload
-    latest_payload = get_latest_payload_from_workflow_run(workflow_run_object['orcabusId'])
+    with dependency_call("workflowManager"):
+        latest_payload = get_latest_payload_from_workflow_run(workflow_run_object['orcabusId'])
 
     # Check if the payload data exists
     if latest_payload is None:
         latest_payload = {}
 
+    # Keep hold of the current state so that we can tell what we have changed
+    previous_state = get_comparable_state(workflow_run_object, current_status, latest_payload)
+
     # Set the payload version if not set
     latest_data = latest_payload.get('data', {})
 
     # Inputs
     inputs = latest_data.get('inputs', {})
 
+    # ICA Inputs
+    # Run folder and sample sheet inputs, resolving any we don't already have together
+    # (we keep the run folder project data object if we resolve it, to find its RunInfo.xml file)
+    run_folder_project_data_obj: Optional['ProjectData'] = None
+    missing_input_codes = list(filter(
+        lambda input_code_iter_: INPUT_KEY_BY_CODE[input_code_iter_] not in inputs,
+        INPUT_KEY_BY_CODE
+    ))
+    if len(missing_input_codes) > 0 and analysis_context is not None:
+        # The analysis context keys are the same as the payload input keys
+        for input_code in missing_input_codes:
+            inputs[INPUT_KEY_BY_CODE[input_code]] = analysis_context[INPUT_KEY_BY_CODE[input_code]]
+    elif len(missing_input_codes) > 0:
+        # Imported on first use, wrapica is slow to import
+        from wrapica.project_analysis import get_project_analysis_inputs
+        from wrapica.project_data import convert_project_data_obj_to_uri
+
+        with dependency_call("icav2"):
+            ica_inputs = get_project_analysis_inputs(
+                project_id=project_id,
+                analysis_id=analysis_id,
+            )
+        ica_input_project_data_objs = resolve_ica_inputs(
+            ica_inputs,
+            project_id=project_id,
+            input_codes=missing_input_codes,
+        )
+        for input_code, project_data_obj in ica_input_project_data_objs.items():
+            inputs[INPUT_KEY_BY_CODE[input_code]] = convert_project_data_obj_to_uri(project_data_obj)
+        run_folder_project_data_obj = ica_input_project_data_objs.get(RUN_FOLDER_INPUT_CODE)
+
     # Create tags
     # Need to make sure we have an input uri to get information first though.
+    # We only need the RunInfo.xml file if we don't already have the instrument run id,
+    # and only need BaseSpace if we don't already have the BaseSpace tags (or the analysis context)
     tags = latest_data.get('tags', {})
-    if inputs.get("inputUri") is not None:
-        # Create tags
-        instrument_run_id = get_instrument_run_id_from_run_info_xml(
-            run_info_xml_uri=(inputs['inputUri'] + 'RunInfo.xml')
-        )
+    has_basespace_tags = all(map(
+        lambda tag_key_iter_: tags.get(tag_key_iter_) is not None,
+        BASESPACE_TAG_KEYS
+    ))
+    if not has_basespace_tags and analysis_context is not None:
+        # The analysis context keys are the same as the tag keys
+        tags.update(dict(map(
+            lambda tag_key_iter_: (tag_key_iter_, analysis_context[tag_key_iter_]),
+            BASESPACE_TAG_KEYS
+        )))
+    elif not has_basespace_tags and inputs.get("inputUri") is not None:
+        instrument_run_id = tags.get("instrumentRunId")
+        if instrument_run_id is None:
+            # Look up the RunInfo.xml file under the run folder
+            if run_folder_project_data_obj is None:
+                run_folder_project_data_obj = get_folder_project_data_obj_from_uri(inputs['inputUri'])
+            instrument_run_id = get_instrument_run_id_from_run_folder(run_folder_project_data_obj)
+        basespace_run_info = get_basespace_run_info_from_instrument_run_id(instrument_run_id)
         tags.update({
             "instrumentRunId": instrument_run_id,
-            "experimentRunName": get_experiment_name_from_instrument_run_id(instrument_run_id),
-            "basespaceRunId": int(get_basespace_run_id_from_instrument_run_id(instrument_run_id)),
+            "experimentRunName": basespace_run_info['experimentRunName'],
+            "basespaceRunId": basespace_run_info['basespaceRunId'],
         })
 
     # Also set the payload version if not set
     if not latest_payload.get('version'):
         latest_payload['version'] = DEFAULT_PAYLOAD_VERSION
 
-    # ICA Inputs
-    ica_inputs = get_project_analysis_inputs(
-        project_id=project_id,
-        analysis_id=analysis_id,
-    )
-
-    # Run folder input
-    if 'inputUri' not in inputs:
-        inputs['inputUri'] = get_run_folder_input_uri_from_ica_inputs(
-            ica_inputs,
-            project_id=project_id,
-        )
-    if 'sampleSheetUri' not in inputs:
-        inputs['sampleSheetUri'] = get_sample_sheet_uri_from_ica_inputs(
-            ica_inputs,
-            project_id=project_id,
-        )
-
     # Update Engine Parameters
     engine_parameters = latest_data.get('engineParameters', {})
     engine_parameters['projectId'] = project_id
     engine_parameters['pipelineId'] = pipeline_id
     engine_parameters['analysisId'] = analysis_id
 
-    # Get the analysis status
-    status = get_analysis_obj_from_analysis_id(
-        project_id=project_id,
+    # Get the analysis status, from the event if we can trust it
+    status = get_event_analysis_status(
         analysis_id=analysis_id,
-    ).status
+        event_analysis=event_analysis,
+        current_state=current_state,
+    )
+    if status is None:
+        # Imported on first use, wrapica is slow to import
+        from wrapica.project_analysis import get_analysis_obj_from_analysis_id
+
+        with dependency_call("icav2"):
+            status = get_analysis_obj_from_analysis_id(
+                project_id=project_id,
+                analysis_id=analysis_id,
+            ).status
 
     # Update the workflow run status based on the ICA analysis status
     workflow_run_object['status'] = STATUS_MAP[status]
 
-    # If workflow status is SUCCEEDED, add outputUri
-    if status == 'SUCCEEDED':
+    # If workflow status is SUCCEEDED, add outputUri (unless we already have it)
+    if status == 'SUCCEEDED' and engine_parameters.get('outputUri') is None:
+        # Imported on first use, wrapica is slow to import
+        from wrapica.project_analysis import get_analysis_output_object_from_analysis_output_code
+        from wrapica.project_data import convert_project_data_obj_to_uri, get_project_data_obj_by_id
+
         # Get the workflow output object
-        analysis_output_object = get_analysis_output_object_from_analysis_output_code(
-            project_id=project_id,
-            analysis_id=analysis_id,
-            analysis_output_code='Output'
-        )
-        # Update the engine parameter output uri
-        engine_parameters['outputUri'] = convert_project_data_obj_to_uri(
-            get_project_data_obj_by_id(
+        with dependency_call("icav2"):
+            analysis_output_object = get_analysis_output_object_from_analysis_output_code(
+                project_id=project_id,
+                analysis_id=analysis_id,
+                analysis_output_code='Output'
+            )
+        with dependency_call("icav2"):
+            output_project_data_obj = get_project_data_obj_by_id(
                 project_id=analysis_output_object.project_id,
                 data_id=analysis_output_object.data[0].data_id
             )
-        )
+        # Update the engine parameter output uri
+        engine_parameters['outputUri'] = convert_project_data_obj_to_uri(output_project_data_obj)
 
     # Also update the libraries, assuming that the SRM has done its job
     # Update libraries, assuming that the SRM has ingested these into the samplesheet
     if not workflow_run_object.get("libraries"):
+        with dependency_call("srm"):
+            library_id_list = get_library_id_list_from_instrument_run_id(
+                instrument_run_id=tags.get('instrumentRunId')
+            )
+        with dependency_call("metadata"):
+            libraries_list = get_libraries_list_from_library_id_list(library_id_list)
         workflow_run_object['libraries'] = list(map(
             lambda library_obj_: {
                 "libraryId": library_obj_['libraryId'],
                 "orcabusId": library_obj_['orcabusId'],
             },
-            get_libraries_list_from_library_id_list(
-                get_library_id_list_from_instrument_run_id(
-                    instrument_run_id=tags.get('instrumentRunId')
-                )
-            )
+            libraries_list
         ))
 
     # Update the latest data
@@ -226,10 +430,23 @@ def handler(event, context):
     workflow_run_object['payload'] = latest_payload
 
     # If the status is DRAFT, we cannot update it to anything else
-    if get_workflow_run_from_portal_run_id(portal_run_id)['currentState']['status'] == 'DRAFT':
+    if current_status == 'DRAFT':
         workflow_run_object['status'] = 'DRAFT'
 
+    # Get what we have changed
+    diff = get_field_diff(
+        previous_state,
+        get_comparable_state(workflow_run_object, workflow_run_object['status'], latest_payload)
+    )
+
+    # Record the workflow run so that later events can be linked to it without a scan,
+    # no-op updates (i.e. in progress heartbeats) have nothing new to record
+    if len(diff) > 0:
+        get_workflow_run_index().record_workflow_run(workflow_run_object)
+
     # Return the object
     return {
-        "workflowRunObject": workflow_run_object
+        "workflowRunObject": workflow_run_object,
+        "changed": len(diff) > 0,
+        "diff": diff,
     }
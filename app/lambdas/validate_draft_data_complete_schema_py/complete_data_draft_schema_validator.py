@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+
+"""
+Validator for complete-data-draft-schema.json
+
+Generated by app/scripts/generate_schema_validators.py, do not edit.
+
+Yields the same errors (messages, paths and schema paths) as the jsonschema Draft202012Validator.
+Compare get_schema_digest of the schema in use against SCHEMA_DIGEST before relying on it.
+"""
+
+# Standard library imports
+import hashlib
+import json
+import re
+from numbers import Number
+from typing import Any, Dict, Iterator, List, TypedDict, Union
+
+# Globals
+SCHEMA_DIGEST = 'sha256:6ec83832c36221fa9da7c8aa15d75a177cf0704380deaf94d48c74ec9b93086e'  # pragma: allowlist secret
+
+_PATTERN_1 = re.compile('^icav2://[a-zA-Z0-9_-]+/[a-zA-Z0-9_./-]+/$')
+_PATTERN_2 = re.compile('^icav2://[a-zA-Z0-9_-]+/[a-zA-Z0-9_./-]+')
+
+
+class SchemaValidationError(TypedDict):
+    validator: str
+    message: str
+    path: List[Union[str, int]]
+    schemaPath: List[Union[str, int]]
+
+
+def get_schema_digest(schema: Dict) -> str:
+    """
+    Get the digest of a schema, independent of its formatting and key order
+    :param schema:
+    :return:
+    """
+    return "sha256:" + hashlib.sha256(
+        json.dumps(schema, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+    ).hexdigest()
+
+
+def _get_error(validator: str, message: str, path: List, schema_path: List) -> SchemaValidationError:
+    return {
+        "validator": validator,
+        "message": message,
+        "path": path,
+        "schemaPath": schema_path,
+    }
+
+
+def _validate_defs_tags_properties_instrument_run_id(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/$defs/tags/properties/instrumentRunId
+    if not isinstance(instance, str):
+        yield _get_error("type", f"{instance!r} is not of type 'string'", path, [*schema_path, "type"])
+
+
+def _validate_defs_tags_properties_basespace_run_id(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/$defs/tags/properties/basespaceRunId
+    if not (isinstance(instance, Number) and not isinstance(instance, bool)):
+        yield _get_error("type", f"{instance!r} is not of type 'number'", path, [*schema_path, "type"])
+
+
+def _validate_defs_tags_properties_experiment_run_name(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/$defs/tags/properties/experimentRunName
+    if not isinstance(instance, str):
+        yield _get_error("type", f"{instance!r} is not of type 'string'", path, [*schema_path, "type"])
+
+
+def _validate_defs_tags_properties_samplesheet_checksum(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/$defs/tags/properties/samplesheetChecksum
+    if not isinstance(instance, str):
+        yield _get_error("type", f"{instance!r} is not of type 'string'", path, [*schema_path, "type"])
+
+
+def _validate_defs_tags_properties_samplesheet_checksum_type(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/$defs/tags/properties/samplesheetChecksumType
+    if not isinstance(instance, str):
+        yield _get_error("type", f"{instance!r} is not of type 'string'", path, [*schema_path, "type"])
+    if instance not in ('md5',):
+        yield _get_error("enum", f"{instance!r} is not one of ['md5']", path, [*schema_path, "enum"])
+
+
+def _validate_defs_tags(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/$defs/tags
+    if not isinstance(instance, dict):
+        yield _get_error("type", f"{instance!r} is not of type 'object'", path, [*schema_path, "type"])
+    if isinstance(instance, dict):
+        if 'instrumentRunId' in instance:
+            yield from _validate_defs_tags_properties_instrument_run_id(
+                instance['instrumentRunId'],
+                [*path, 'instrumentRunId'],
+                [*schema_path, "properties", 'instrumentRunId'],
+            )
+        if 'basespaceRunId' in instance:
+            yield from _validate_defs_tags_properties_basespace_run_id(
+                instance['basespaceRunId'],
+                [*path, 'basespaceRunId'],
+                [*schema_path, "properties", 'basespaceRunId'],
+            )
+        if 'experimentRunName' in instance:
+            yield from _validate_defs_tags_properties_experiment_run_name(
+                instance['experimentRunName'],
+                [*path, 'experimentRunName'],
+                [*schema_path, "properties", 'experimentRunName'],
+            )
+        if 'samplesheetChecksum' in instance:
+            yield from _validate_defs_tags_properties_samplesheet_checksum(
+                instance['samplesheetChecksum'],
+                [*path, 'samplesheetChecksum'],
+                [*schema_path, "properties", 'samplesheetChecksum'],
+            )
+        if 'samplesheetChecksumType' in instance:
+            yield from _validate_defs_tags_properties_samplesheet_checksum_type(
+                instance['samplesheetChecksumType'],
+                [*path, 'samplesheetChecksumType'],
+                [*schema_path, "properties", 'samplesheetChecksumType'],
+            )
+    if isinstance(instance, dict):
+        for property_name in ('instrumentRunId', 'basespaceRunId', 'experimentRunName'):
+            if property_name not in instance:
+                yield _get_error("required", f"{property_name!r} is a required property", path, [*schema_path, "required"])
+
+
+def _validate_properties_tags(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/properties/tags
+    yield from _validate_defs_tags(instance, path, schema_path)
+
+
+def _validate_defs_icav2_uri_directory(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/$defs/icav2UriDirectory
+    if not isinstance(instance, str):
+        yield _get_error("type", f"{instance!r} is not of type 'string'", path, [*schema_path, "type"])
+    if isinstance(instance, str) and not _PATTERN_1.search(instance):
+        yield _get_error("pattern", f"{instance!r} does not match '^icav2://[a-zA-Z0-9_-]+/[a-zA-Z0-9_./-]+/$'", path, [*schema_path, "pattern"])
+
+
+def _validate_defs_inputs_properties_input_uri(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/$defs/inputs/properties/inputUri
+    yield from _validate_defs_icav2_uri_directory(instance, path, schema_path)
+
+
+def _validate_defs_icav2_uri(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/$defs/icav2Uri
+    if not isinstance(instance, str):
+        yield _get_error("type", f"{instance!r} is not of type 'string'", path, [*schema_path, "type"])
+    if isinstance(instance, str) and not _PATTERN_2.search(instance):
+        yield _get_error("pattern", f"{instance!r} does not match '^icav2://[a-zA-Z0-9_-]+/[a-zA-Z0-9_./-]+'", path, [*schema_path, "pattern"])
+
+
+def _validate_defs_inputs_properties_sample_sheet_uri(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/$defs/inputs/properties/sampleSheetUri
+    yield from _validate_defs_icav2_uri(instance, path, schema_path)
+
+
+def _validate_defs_inputs(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/$defs/inputs
+    if not isinstance(instance, dict):
+        yield _get_error("type", f"{instance!r} is not of type 'object'", path, [*schema_path, "type"])
+    if isinstance(instance, dict):
+        if 'inputUri' in instance:
+            yield from _validate_defs_inputs_properties_input_uri(
+                instance['inputUri'],
+                [*path, 'inputUri'],
+                [*schema_path, "properties", 'inputUri'],
+            )
+        if 'sampleSheetUri' in instance:
+            yield from _validate_defs_inputs_properties_sample_sheet_uri(
+                instance['sampleSheetUri'],
+                [*path, 'sampleSheetUri'],
+                [*schema_path, "properties", 'sampleSheetUri'],
+            )
+    if isinstance(instance, dict):
+        for property_name in ('inputUri', 'sampleSheetUri'):
+            if property_name not in instance:
+                yield _get_error("required", f"{property_name!r} is a required property", path, [*schema_path, "required"])
+
+
+def _validate_properties_inputs(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/properties/inputs
+    yield from _validate_defs_inputs(instance, path, schema_path)
+
+
+def _validate_defs_engine_parameters_properties_project_id(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/$defs/engineParameters/properties/projectId
+    if not isinstance(instance, str):
+        yield _get_error("type", f"{instance!r} is not of type 'string'", path, [*schema_path, "type"])
+
+
+def _validate_defs_engine_parameters_properties_pipeline_id(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/$defs/engineParameters/properties/pipelineId
+    if not isinstance(instance, str):
+        yield _get_error("type", f"{instance!r} is not of type 'string'", path, [*schema_path, "type"])
+
+
+def _validate_defs_engine_parameters_properties_analysis_id(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/$defs/engineParameters/properties/analysisId
+    if not isinstance(instance, str):
+        yield _get_error("type", f"{instance!r} is not of type 'string'", path, [*schema_path, "type"])
+
+
+def _validate_defs_engine_parameters_properties_output_uri(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/$defs/engineParameters/properties/outputUri
+    yield from _validate_defs_icav2_uri_directory(instance, path, schema_path)
+
+
+def _validate_defs_engine_parameters(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/$defs/engineParameters
+    if not isinstance(instance, dict):
+        yield _get_error("type", f"{instance!r} is not of type 'object'", path, [*schema_path, "type"])
+    if isinstance(instance, dict):
+        if 'projectId' in instance:
+            yield from _validate_defs_engine_parameters_properties_project_id(
+                instance['projectId'],
+                [*path, 'projectId'],
+                [*schema_path, "properties", 'projectId'],
+            )
+        if 'pipelineId' in instance:
+            yield from _validate_defs_engine_parameters_properties_pipeline_id(
+                instance['pipelineId'],
+                [*path, 'pipelineId'],
+                [*schema_path, "properties", 'pipelineId'],
+            )
+        if 'analysisId' in instance:
+            yield from _validate_defs_engine_parameters_properties_analysis_id(
+                instance['analysisId'],
+                [*path, 'analysisId'],
+                [*schema_path, "properties", 'analysisId'],
+            )
+        if 'outputUri' in instance:
+            yield from _validate_defs_engine_parameters_properties_output_uri(
+                instance['outputUri'],
+                [*path, 'outputUri'],
+                [*schema_path, "properties", 'outputUri'],
+            )
+    if isinstance(instance, dict):
+        for property_name in ('projectId', 'pipelineId', 'analysisId'):
+            if property_name not in instance:
+                yield _get_error("required", f"{property_name!r} is a required property", path, [*schema_path, "required"])
+
+
+def _validate_properties_engine_parameters(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/properties/engineParameters
+    yield from _validate_defs_engine_parameters(instance, path, schema_path)
+
+
+def _validate_root(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:
+    # #/
+    if not isinstance(instance, dict):
+        yield _get_error("type", f"{instance!r} is not of type 'object'", path, [*schema_path, "type"])
+    if isinstance(instance, dict):
+        if 'tags' in instance:
+            yield from _validate_properties_tags(
+                instance['tags'],
+                [*path, 'tags'],
+                [*schema_path, "properties", 'tags'],
+            )
+        if 'inputs' in instance:
+            yield from _validate_properties_inputs(
+                instance['inputs'],
+                [*path, 'inputs'],
+                [*schema_path, "properties", 'inputs'],
+            )
+        if 'engineParameters' in instance:
+            yield from _validate_properties_engine_parameters(
+                instance['engineParameters'],
+                [*path, 'engineParameters'],
+                [*schema_path, "properties", 'engineParameters'],
+            )
+    if isinstance(instance, dict):
+        for property_name in ('tags', 'inputs', 'engineParameters'):
+            if property_name not in instance:
+                yield _get_error("required", f"{property_name!r} is a required property", path, [*schema_path, "required"])
+
+
+def iter_errors(instance: Any) -> Iterator[SchemaValidationError]:
+    """
+    Iterate over the errors of the instance, in the same order as jsonschema
+    :param instance:
+    :return:
+    """
+    return _validate_root(instance, [], [])
+
+
+def is_valid(instance: Any) -> bool:
+    return next(iter_errors(instance), None) is None
@@ -2,112 +2,206 @@
 
 """
 Download the draft schema, validate it against the current schema, and print the results.
+
+The SSM 'latest' parameter for the schema names its registry, schema name and schema version.
+We compile a validator for each schema version once per lambda container (checking the schema itself just the once),
+so warm invocations, where the SSM parameters are still cached, make no AWS calls at all.
+
+A new schema version is picked up as soon as the cached 'latest' parameter expires.
+
+The complete data draft schema ships with this repo, so we validate with the plain python validator
+generated from it (see app/scripts/generate_schema_validators.py), which is much quicker to import than jsonschema.
+The registry schema remains the source of truth, if its digest differs from the generated validator's
+we fall back to jsonschema.
 """
 
 # Imports
 import json
 import boto3
 import typing
-import jsonschema
 from os import environ
-from typing import Dict
+from typing import Callable, Dict, Optional, Tuple
 import logging
-from jsonschema import ValidationError
+
+# Local imports
+import complete_data_draft_schema_validator
+
+# Layer imports
+from bssh_tool_kit import (
+    instrument_handler,
+    dependency_call,
+    get_cached_ssm_value,
+)
 
 # Type checking imports
 if typing.TYPE_CHECKING:
     from mypy_boto3_schemas import SchemasClient
-    from mypy_boto3_ssm import SSMClient
 
 # Globals
 SSM_REGISTRY_NAME_ENV_VAR = "SSM_REGISTRY_NAME"
 SSM_SCHEMA_NAME_ENV_VAR = "SSM_SCHEMA_NAME"
 
+# Type hints
+# Returns a description of the validation error, or None if the draft is valid
+DraftValidator = Callable[[Dict], Optional[str]]
+
+# (Registry name, schema name, schema version) -> compiled validator
+_VALIDATORS: Dict[Tuple[str, str, Optional[str]], DraftValidator] = {}
+_SCHEMAS_CLIENT: Optional['SchemasClient'] = None
+
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 
-def get_ssm_parameter_value(parameter_name: str) -> str:
-    """
-    Get the SSM parameter for the schema.
-    :return: The SSM parameter value.
-    """
-
-    # Get the ssm client
-    ssm_client: SSMClient = boto3.client("ssm")
+def get_schemas_client() -> 'SchemasClient':
+    global _SCHEMAS_CLIENT
 
-    # Get the SSM parameter value
-    response = ssm_client.get_parameter(
-        Name=parameter_name,
-        WithDecryption=True
-    )
+    if _SCHEMAS_CLIENT is None:
+        _SCHEMAS_CLIENT = boto3.client("schemas")
 
-    return response["Parameter"]["Value"]
+    return _SCHEMAS_CLIENT
 
 
 def get_schema_from_registry(
         registry_name: str,
-        schema_name: str
+        schema_name: str,
+        schema_version: Optional[str] = None,
 ) -> str:
     """
     Get the schema from the schema registry.
     :param registry_name: The name of the schema registry.
     :param schema_name: The name of the schema.
+    :param schema_version: The version of the schema, defaults to the latest version.
     :return: The schema as a string.
     """
-
-    # Get the schemas client
-    schemas_client: SchemasClient = boto3.client("schemas")
-
     # Get the schema from the registry
-    response = schemas_client.describe_schema(
-        RegistryName=registry_name,
-        SchemaName=schema_name
-    )
+    with dependency_call("schemaRegistry") as call:
+        response = get_schemas_client().describe_schema(
+            RegistryName=registry_name,
+            SchemaName=schema_name,
+            **(
+                {"SchemaVersion": schema_version}
+                if schema_version is not None
+                else {}
+            )
+        )
+        call["bytesReceived"] = len(response["Content"])
 
     return response["Content"]
 
 
+def validate_with_generated_validator(json_body: Dict) -> Optional[str]:
+    """
+    Validate with the validator generated from the schema in this repo, returning the first error
+    :param json_body:
+    :return:
+    """
+    validation_error = next(complete_data_draft_schema_validator.iter_errors(json_body), None)
+    if validation_error is None:
+        return None
+    return f"{validation_error['message']} (at {validation_error['path']})"
+
+
+def get_jsonschema_validator(json_schema: Dict) -> DraftValidator:
+    """
+    Compile the schema with jsonschema, checking the schema itself just the once.
+    The validator class is chosen by the schema's $schema keyword, defaulting to draft 2020-12.
+    :param json_schema:
+    :return:
+    """
+    # Imported here as jsonschema is slow to import, and only needed if the registry schema has diverged
+    from jsonschema.exceptions import best_match
+    from jsonschema.validators import Draft202012Validator, validator_for
+
+    validator_class = validator_for(json_schema, default=Draft202012Validator)
+    validator_class.check_schema(json_schema)
+    validator = validator_class(json_schema)
+
+    def _validate(json_body: Dict) -> Optional[str]:
+        validation_error = best_match(validator.iter_errors(json_body))
+        if validation_error is None:
+            return None
+        return f"{validation_error.message} (at {list(validation_error.absolute_path)})"
+
+    return _validate
+
+
+def get_validator(
+        registry_name: str,
+        schema_name: str,
+        schema_version: Optional[str] = None,
+) -> DraftValidator:
+    """
+    Get the validator for this version of the schema, downloading the schema on the first call for each version.
+
+    We use the generated validator if the registry schema is the schema it was generated from,
+    otherwise we compile the registry schema with jsonschema.
+    :param registry_name:
+    :param schema_name:
+    :param schema_version:
+    :return:
+    """
+    validator_key = (registry_name, schema_name, schema_version)
+
+    if validator_key not in _VALIDATORS:
+        json_schema = json.loads(get_schema_from_registry(
+            registry_name=registry_name,
+            schema_name=schema_name,
+            schema_version=schema_version,
+        ))
+
+        if (
+                complete_data_draft_schema_validator.get_schema_digest(json_schema) ==
+                complete_data_draft_schema_validator.SCHEMA_DIGEST
+        ):
+            _VALIDATORS[validator_key] = validate_with_generated_validator
+        else:
+            logger.warning(
+                "Schema %s (version %s) differs from the generated validator, falling back to jsonschema",
+                schema_name, schema_version
+            )
+            _VALIDATORS[validator_key] = get_jsonschema_validator(json_schema)
+
+    return _VALIDATORS[validator_key]
+
+
 def validate_draft_schema(
-        json_schema: str,
-        json_body: str
+        validator: DraftValidator,
+        json_body: Dict,
 ) -> bool:
     """
-    Download the draft schema, validate it against the current schema, and print the results.
+    Validate the draft against the current schema, logging the error if it is invalid
     """
-    try:
-        jsonschema.validate(
-            instance=json.loads(json_body),
-            schema=json.loads(json_schema)
-        )
-    except ValidationError as e:
-        logger.info("Validation error: %s", e)
+    validation_error = validator(json_body)
+    if validation_error is not None:
+        logger.info("Validation error: %s", validation_error)
         return False
     return True
 
 
+@instrument_handler
 def handler(event, context) -> Dict[str, bool]:
     """
     Given a draft schema, validate it against the current schema and print the results.
     :return:
     """
     # Get the SSM parameters
-    schema_registry = get_ssm_parameter_value(environ[SSM_REGISTRY_NAME_ENV_VAR])
-    schema_name = json.loads(get_ssm_parameter_value(environ[SSM_SCHEMA_NAME_ENV_VAR]))['schemaName']
+    schema_registry = get_cached_ssm_value(environ[SSM_REGISTRY_NAME_ENV_VAR])
+    schema_latest = json.loads(get_cached_ssm_value(environ[SSM_SCHEMA_NAME_ENV_VAR]))
 
-    # Get the current schema from the schema registry
-    current_schema = get_schema_from_registry(
+    # Get the validator for the current version of the schema
+    validator = get_validator(
         registry_name=schema_registry,
-        schema_name=schema_name
+        schema_name=schema_latest['schemaName'],
+        schema_version=schema_latest.get('schemaVersion'),
     )
 
-    # Get the draft schema from the schema registry
+    # The event is the draft, validate it as is
     return {
         "isValid": validate_draft_schema(
-            current_schema,
-            # Assuming the event contains the draft schema as a JSON string
-            json.dumps(event)
+            validator,
+            event
         )
     }
 
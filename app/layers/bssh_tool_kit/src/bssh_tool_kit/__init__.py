@@ -13,29 +13,245 @@ Convert from instrument run id to experiment name, or from experiment name to ba
 
 """
 
-# Basespace imports
-from .globals import DEFAULT_SAMPLESHEET_CHECKSUM_TYPE
-from .basespace_helpers import (
-    get_run_folder_input_uri_from_ica_inputs,
-    download_samplesheet_to_path_from_uri,
-    get_sample_sheet_uri_from_ica_inputs,
-    get_instrument_run_id_from_run_info_xml,
-    get_experiment_name_from_instrument_run_id,
-    get_library_ids_from_samplesheet_uri,
-    get_basespace_run_id_from_instrument_run_id,
-    get_samplesheet_md5sum_from_samplesheet_uri,
-)
+# Standard library imports
+import sys
+import typing
+from importlib import import_module
+
+# Public attributes, and the module each one is defined in.
+# Modules are only imported when one of their attributes is first used,
+# so a lambda only pays (at cold start) for the dependencies of the helpers it uses.
+_LAZY_ATTRIBUTES = {
+    # Globals
+    "DEFAULT_SAMPLESHEET_CHECKSUM_TYPE": ".globals",
+    # Models
+    "BasespaceRunInfo": ".models",
+    "RunInfoSummary": ".models",
+    "AnalysisContext": ".models",
+    # Config cache
+    "get_cached_ssm_value": ".config_cache",
+    "get_cached_secret_value": ".config_cache",
+    "invalidate_config_cache": ".config_cache",
+    "set_cached_icav2_env_vars": ".config_cache",
+    # Instrumentation
+    "instrument_handler": ".instrumentation",
+    "dependency_call": ".instrumentation",
+    "record_dependency_call": ".instrumentation",
+    "record_metric": ".instrumentation",
+    "set_metrics_sink": ".instrumentation",
+    "LocalMetricsSink": ".instrumentation",
+    # HTTP client
+    "HttpClient": ".http_client",
+    "get_http_client": ".http_client",
+    # ICAv2 files
+    "iter_icav2_file_bytes": ".icav2_files",
+    "get_icav2_file_md5sum": ".icav2_files",
+    # ICA analysis inputs
+    "resolve_ica_inputs": ".ica_inputs",
+    "resolve_ica_input_uris": ".ica_inputs",
+    "get_child_project_data_obj": ".ica_inputs",
+    "get_folder_project_data_obj_from_uri": ".ica_inputs",
+    # Analysis context
+    "get_analysis_context": ".analysis_context",
+    "read_analysis_context": ".analysis_context",
+    # Parsers
+    "read_run_info_xml": ".parsers",
+    "read_v2_samplesheet": ".parsers",
+    "read_bclconvert_data_sample_ids": ".parsers",
+    # RunInfo.xml
+    "read_run_info_summary": ".run_info",
+    "get_run_info_summary_from_project_data_obj": ".run_info",
+    "get_run_info_summary_from_uri": ".run_info",
+    # Samplesheets
+    "Samplesheet": ".samplesheet",
+    "get_samplesheet_from_uri": ".samplesheet",
+    "get_samplesheet_from_project_data_obj": ".samplesheet",
+    # Samplesheet checksums
+    "get_samplesheet_md5sum_from_samplesheet_uri": ".samplesheet_checksums",
+    "get_samplesheet_md5sum_from_instrument_run_id": ".samplesheet_checksums",
+    # Workflow run index
+    "get_workflow_run_index": ".workflow_run_index",
+    # Workflow run cache
+    "get_workflow_run_cache": ".workflow_run_cache",
+    # Workflow run listing
+    "iter_workflow_runs_by_statuses": ".workflow_run_listing",
+    "list_workflow_runs_by_statuses": ".workflow_run_listing",
+    # Workflow run matcher
+    "find_workflow_runs_by_payload": ".workflow_run_matcher",
+    "find_first_workflow_run_by_payload": ".workflow_run_matcher",
+    # Basespace helpers
+    "get_run_folder_input_uri_from_ica_inputs": ".basespace_helpers",
+    "get_sample_sheet_uri_from_ica_inputs": ".basespace_helpers",
+    "download_samplesheet_to_path_from_uri": ".basespace_helpers",
+    "get_instrument_run_id_from_run_info_xml": ".basespace_helpers",
+    "get_instrument_run_id_from_run_folder": ".basespace_helpers",
+    "get_experiment_name_from_instrument_run_id": ".basespace_helpers",
+    "get_library_ids_from_samplesheet_uri": ".basespace_helpers",
+    "get_basespace_run_id_from_instrument_run_id": ".basespace_helpers",
+    "get_basespace_run_info_from_instrument_run_id": ".basespace_helpers",
+}
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from .globals import DEFAULT_SAMPLESHEET_CHECKSUM_TYPE
+    from .models import BasespaceRunInfo, RunInfoSummary, AnalysisContext
+    from .config_cache import (
+        get_cached_ssm_value,
+        get_cached_secret_value,
+        invalidate_config_cache,
+        set_cached_icav2_env_vars,
+    )
+    from .instrumentation import (
+        instrument_handler,
+        dependency_call,
+        record_dependency_call,
+        record_metric,
+        set_metrics_sink,
+        LocalMetricsSink,
+    )
+    from .http_client import (
+        HttpClient,
+        get_http_client,
+    )
+    from .icav2_files import (
+        iter_icav2_file_bytes,
+        get_icav2_file_md5sum,
+    )
+    from .ica_inputs import (
+        resolve_ica_inputs,
+        resolve_ica_input_uris,
+        get_child_project_data_obj,
+        get_folder_project_data_obj_from_uri,
+    )
+    from .analysis_context import (
+        get_analysis_context,
+        read_analysis_context,
+    )
+    from .parsers import (
+        read_run_info_xml,
+        read_v2_samplesheet,
+        read_bclconvert_data_sample_ids,
+    )
+    from .run_info import (
+        read_run_info_summary,
+        get_run_info_summary_from_project_data_obj,
+        get_run_info_summary_from_uri,
+    )
+    from .samplesheet import (
+        Samplesheet,
+        get_samplesheet_from_uri,
+        get_samplesheet_from_project_data_obj,
+    )
+    from .samplesheet_checksums import (
+        get_samplesheet_md5sum_from_samplesheet_uri,
+        get_samplesheet_md5sum_from_instrument_run_id,
+    )
+    from .workflow_run_index import get_workflow_run_index
+    from .workflow_run_cache import get_workflow_run_cache
+    from .workflow_run_listing import (
+        iter_workflow_runs_by_statuses,
+        list_workflow_runs_by_statuses,
+    )
+    from .workflow_run_matcher import (
+        find_workflow_runs_by_payload,
+        find_first_workflow_run_by_payload,
+    )
+    from .basespace_helpers import (
+        get_run_folder_input_uri_from_ica_inputs,
+        download_samplesheet_to_path_from_uri,
+        get_sample_sheet_uri_from_ica_inputs,
+        get_instrument_run_id_from_run_info_xml,
+        get_instrument_run_id_from_run_folder,
+        get_experiment_name_from_instrument_run_id,
+        get_library_ids_from_samplesheet_uri,
+        get_basespace_run_id_from_instrument_run_id,
+        get_basespace_run_info_from_instrument_run_id,
+    )
+
+
+def __getattr__(name: str):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+
+    # Cache on the package so we only come through here once per attribute
+    # (we can't use globals() here, the globals submodule shadows it once imported)
+    setattr(sys.modules[__name__], name, value)
+
+    return value
+
+
+def __dir__():
+    return sorted(set(vars(sys.modules[__name__])) | set(__all__))
+
 
 __all__ = [
     # Globals
     "DEFAULT_SAMPLESHEET_CHECKSUM_TYPE",
+    # Models
+    "BasespaceRunInfo",
+    "RunInfoSummary",
+    "AnalysisContext",
+    # Config cache
+    "get_cached_ssm_value",
+    "get_cached_secret_value",
+    "invalidate_config_cache",
+    "set_cached_icav2_env_vars",
+    # Instrumentation
+    "instrument_handler",
+    "dependency_call",
+    "record_dependency_call",
+    "record_metric",
+    "set_metrics_sink",
+    "LocalMetricsSink",
+    # HTTP client
+    "HttpClient",
+    "get_http_client",
+    # ICAv2 files
+    "iter_icav2_file_bytes",
+    "get_icav2_file_md5sum",
+    # ICA analysis inputs
+    "resolve_ica_inputs",
+    "resolve_ica_input_uris",
+    "get_child_project_data_obj",
+    "get_folder_project_data_obj_from_uri",
+    # Analysis context
+    "get_analysis_context",
+    "read_analysis_context",
+    # Parsers
+    "read_run_info_xml",
+    "read_v2_samplesheet",
+    "read_bclconvert_data_sample_ids",
+    # RunInfo.xml
+    "read_run_info_summary",
+    "get_run_info_summary_from_project_data_obj",
+    "get_run_info_summary_from_uri",
+    # Samplesheets
+    "Samplesheet",
+    "get_samplesheet_from_uri",
+    "get_samplesheet_from_project_data_obj",
+    # Samplesheet checksums
+    "get_samplesheet_md5sum_from_samplesheet_uri",
+    "get_samplesheet_md5sum_from_instrument_run_id",
+    # Workflow run index
+    "get_workflow_run_index",
+    # Workflow run cache
+    "get_workflow_run_cache",
+    # Workflow run listing
+    "iter_workflow_runs_by_statuses",
+    "list_workflow_runs_by_statuses",
+    # Workflow run matcher
+    "find_workflow_runs_by_payload",
+    "find_first_workflow_run_by_payload",
     # Basespace helpers
     "get_run_folder_input_uri_from_ica_inputs",
     "get_sample_sheet_uri_from_ica_inputs",
     "download_samplesheet_to_path_from_uri",
     "get_instrument_run_id_from_run_info_xml",
+    "get_instrument_run_id_from_run_folder",
     "get_experiment_name_from_instrument_run_id",
     "get_library_ids_from_samplesheet_uri",
     "get_basespace_run_id_from_instrument_run_id",
-    "get_samplesheet_md5sum_from_samplesheet_uri",
+    "get_basespace_run_info_from_instrument_run_id",
 ]
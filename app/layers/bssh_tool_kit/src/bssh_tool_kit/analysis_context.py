@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+"""
+Analysis context
+
+Everything we look up from an ICAv2 bclconvert analysis (the run folder and samplesheet inputs,
+the instrument run id from the RunInfo.xml file and the BaseSpace run),
+resolved once by the first lambda of a handle_ica_event execution
+and passed through the state machine to the lambdas after it, which skip any lookup the context already answers.
+
+The context is versioned, a context of another version or for another analysis is ignored
+and the lambda falls back to its own lookups.
+"""
+
+# Standard library imports
+from typing import Dict, Optional
+
+# Local imports
+from .globals import (
+    ANALYSIS_CONTEXT_VERSION,
+    RUN_FOLDER_INPUT_CODE,
+    SAMPLE_SHEET_INPUT_CODE,
+)
+from .instrumentation import dependency_call
+from .models import AnalysisContext
+
+
+def get_analysis_context(
+        project_id: str,
+        analysis_id: str,
+) -> AnalysisContext:
+    """
+    Resolve the analysis context of an ICAv2 analysis,
+    the run folder and samplesheet inputs are resolved together
+    :param project_id:
+    :param analysis_id:
+    :return:
+    """
+    # Imported on first use, wrapica is slow to import
+    from wrapica.project_analysis import get_project_analysis_inputs
+    from wrapica.project_data import convert_project_data_obj_to_uri
+
+    # Also imported on first use, so that lambdas that only read a context
+    # do not import the BaseSpace client and the samplesheet parsers
+    from .basespace_helpers import (
+        get_basespace_run_info_from_instrument_run_id,
+        get_instrument_run_id_from_run_folder,
+    )
+    from .ica_inputs import resolve_ica_inputs
+    from .samplesheet import get_samplesheet_from_project_data_obj
+
+    with dependency_call("icav2"):
+        ica_inputs = get_project_analysis_inputs(
+            project_id=project_id,
+            analysis_id=analysis_id,
+        )
+
+    ica_input_project_data_objs = resolve_ica_inputs(
+        ica_inputs,
+        project_id=project_id,
+        input_codes=[RUN_FOLDER_INPUT_CODE, SAMPLE_SHEET_INPUT_CODE],
+    )
+
+    # Get the instrument run id from the RunInfo.xml file
+    instrument_run_id = get_instrument_run_id_from_run_folder(
+        ica_input_project_data_objs[RUN_FOLDER_INPUT_CODE]
+    )
+
+    # Get the experiment name and basespace run id in a single lookup
+    basespace_run_info = get_basespace_run_info_from_instrument_run_id(instrument_run_id)
+
+    # Seed the samplesheet artifact with the project data object we already have,
+    # so that downloading the samplesheet later in this container does not look it up again
+    samplesheet = get_samplesheet_from_project_data_obj(
+        ica_input_project_data_objs[SAMPLE_SHEET_INPUT_CODE]
+    )
+
+    return {
+        "version": ANALYSIS_CONTEXT_VERSION,
+        "projectId": project_id,
+        "analysisId": analysis_id,
+        "inputUri": convert_project_data_obj_to_uri(ica_input_project_data_objs[RUN_FOLDER_INPUT_CODE]),
+        "sampleSheetUri": samplesheet.uri,
+        "instrumentRunId": instrument_run_id,
+        "experimentRunName": basespace_run_info['experimentRunName'],
+        "basespaceRunId": basespace_run_info['basespaceRunId'],
+        "samplesheetChecksum": None,
+    }
+
+
+def read_analysis_context(
+        analysis_context: Optional[Dict],
+        analysis_id: Optional[str] = None,
+) -> Optional[AnalysisContext]:
+    """
+    Read the analysis context passed in to a lambda
+    :param analysis_context:
+    :param analysis_id: If set, the context must be for this analysis
+    :return: None if there is no context, or it is of another version or for another analysis
+    """
+    if not analysis_context or analysis_context.get("version") != ANALYSIS_CONTEXT_VERSION:
+        return None
+
+    if analysis_id is not None and analysis_context.get("analysisId") != analysis_id:
+        return None
+
+    return AnalysisContext(**analysis_context)
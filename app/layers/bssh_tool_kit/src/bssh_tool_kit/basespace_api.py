@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+"""
+Low level BaseSpace API helpers
+"""
+
+# Standard library imports
+from os import environ
+from typing import Dict, Iterator, List, Literal, Optional, Union
+
+# Local imports
+from .config_cache import (
+    get_cached_ssm_value,
+    get_cached_secret_value,
+    invalidate_config_cache,
+)
+from .http_client import get_http_client
+from .globals import (
+    BASESPACE_ACCESS_TOKEN_SECRET_NAME_ENV_VAR,
+    BASESPACE_URL_SSM_PARAMETER_NAME_ENV_VAR,
+    BASESPACE_RUNS_PAGE_SIZE,
+)
+
+# Type hints
+RUNS_SORT_BY = Literal['DateCreated', 'DateModified', 'Name']
+RUNS_SORT_DIR = Literal['Asc', 'Desc']
+
+
+def get_basespace_url() -> str:
+    """
+    Return the BaseSpace URL from SSM.
+    :return:
+    """
+    return get_cached_ssm_value(
+        parameter_name=environ[BASESPACE_URL_SSM_PARAMETER_NAME_ENV_VAR]
+    )
+
+
+def get_basespace_access_token() -> str:
+    """
+    Return the BaseSpace access token from Secrets Manager.
+    :return:
+    """
+    return get_cached_secret_value(
+        secret_id=environ[BASESPACE_ACCESS_TOKEN_SECRET_NAME_ENV_VAR]
+    )
+
+
+def _get_basespace_response(path: str, params: Optional[Dict] = None) -> Dict:
+    """
+    Get the json response of a BaseSpace endpoint
+    :param path:
+    :param params:
+    :return:
+    """
+    # Make the request
+    response = get_http_client().get(
+        f"{get_basespace_url()}{path}",
+        dependency="basespace",
+        headers={
+            "Accept": "application/json",
+            "x-access-token": get_basespace_access_token()
+        },
+        params=params,
+    )
+
+    # Our cached access token may have been rotated, drop it and try once more
+    if response.status_code == 401:
+        invalidate_config_cache(
+            secret_id=environ[BASESPACE_ACCESS_TOKEN_SECRET_NAME_ENV_VAR]
+        )
+        response = get_http_client().get(
+            f"{get_basespace_url()}{path}",
+            dependency="basespace",
+            headers={
+                "Accept": "application/json",
+                "x-access-token": get_basespace_access_token()
+            },
+            params=params,
+        )
+
+    # Raise for status
+    response.raise_for_status()
+
+    return response.json()
+
+
+def get_basespace_run(run_id: str) -> Dict[str, Union[Dict, str, int]]:
+    """
+    Get a single run from the BaseSpace /v2/runs/{id} endpoint
+    :param run_id: The (v2) run id
+    :return:
+    """
+    return _get_basespace_response(f"/v2/runs/{run_id}")
+
+
+def get_basespace_runs_page(
+        offset: int,
+        limit: int,
+        sort_by: RUNS_SORT_BY,
+        sort_dir: RUNS_SORT_DIR,
+) -> List[Dict[str, Union[Dict, str, int]]]:
+    """
+    Get a single page of runs from the BaseSpace /v2/runs endpoint
+    :param offset:
+    :param limit:
+    :param sort_by:
+    :param sort_dir:
+    :return:
+    """
+    params = {
+        "Offset": offset,
+        "Limit": limit,
+        "SortBy": sort_by,
+        "SortDir": sort_dir,
+    }
+
+    return _get_basespace_response("/v2/runs", params=params)['Items']
+
+
+def iter_basespace_runs(
+        sort_by: RUNS_SORT_BY = 'DateCreated',
+        sort_dir: RUNS_SORT_DIR = 'Desc',
+        page_size: int = BASESPACE_RUNS_PAGE_SIZE,
+) -> Iterator[Dict[str, Union[Dict, str, int]]]:
+    """
+    Stream runs from the BaseSpace /v2/runs endpoint one page at a time.
+
+    Pages are only requested as the iterator is consumed,
+    so callers that stop early never pull more than the pages they have looked at.
+    :param sort_by:
+    :param sort_dir:
+    :param page_size:
+    :return:
+    """
+    offset = 0
+    while True:
+        runs_page = get_basespace_runs_page(
+            offset=offset,
+            limit=page_size,
+            sort_by=sort_by,
+            sort_dir=sort_dir,
+        )
+
+        yield from runs_page
+
+        # Last page
+        if len(runs_page) < page_size:
+            return
+
+        offset += page_size
+
+
+def get_basespace_run_from_instrument_run_id(
+        instrument_run_id: str,
+) -> Dict[str, Union[Dict, str, int]]:
+    """
+    Get the BaseSpace run given an instrument run id.
+
+    We stream runs newest first and stop at the first match,
+    so a recent run is found within the first page.
+    The /v2/runs endpoint has no server-side filter on the run name, so we match on the client.
+    :param instrument_run_id:
+    :return:
+    """
+    try:
+        return next(filter(
+            lambda run_item_iter_: run_item_iter_['Name'] == instrument_run_id,
+            iter_basespace_runs(
+                sort_by='DateCreated',
+                sort_dir='Desc',
+            )
+        ))
+    except StopIteration:
+        raise ValueError(
+            f"Could not find BaseSpace run with instrument run ID "
+            f"'{instrument_run_id}'"
+        )
@@ -2,103 +2,61 @@
 
 # Standard library imports
 from pathlib import Path
-from tempfile import NamedTemporaryFile
-from typing import List, Dict, Union
-from os import environ
-import requests
-import hashlib
+from typing import List, Dict
+import typing
 
-# V2 Samplesheet imports
-from v2_samplesheet_maker.functions.run_info_reader import (
-    run_info_xml_reader
+# Local imports
+from .basespace_api import (
+    get_basespace_url,
+    get_basespace_access_token,
+    get_basespace_run_from_instrument_run_id,
 )
-from v2_samplesheet_maker.functions.v2_samplesheet_reader import (
-    v2_samplesheet_reader
+from .basespace_run_index import get_basespace_run_index
+from .globals import (
+    RUN_FOLDER_INPUT_CODE,
+    RUN_INFO_XML_FILE_NAME,
+    SAMPLE_SHEET_INPUT_CODE,
 )
-
-# Wrapica imports
-from libica.openapi.v3 import AnalysisInput
-from wrapica.project_data import (
-    convert_project_data_obj_to_uri,
-    get_project_data_obj_by_id,
-    read_icav2_file_contents,
-    convert_uri_to_project_data_obj
+from .ica_inputs import get_child_project_data_obj, resolve_ica_input_uris
+from .instrumentation import dependency_call
+from .models import BasespaceRunInfo
+from .run_info import (
+    get_run_info_summary_from_project_data_obj,
+    get_run_info_summary_from_uri,
 )
-
-# Layer imports
-from orcabus_api_tools.utils.aws_helpers import get_ssm_value
-from orcabus_api_tools.utils.aws_helpers import get_secret_value
-from orcabus_api_tools.sequence import (
-    get_sample_sheet_from_instrument_run_id
+from .samplesheet import get_samplesheet_from_uri
+# Kept importable from here
+from .samplesheet_checksums import (
+    get_samplesheet_md5sum_from_instrument_run_id,
+    get_samplesheet_md5sum_from_samplesheet_uri,
 )
 
-# Local imports
-from .globals import (
-    BASESPACE_ACCESS_TOKEN_SECRET_NAME_ENV_VAR,
-    BASESPACE_URL_SSM_PARAMETER_NAME_ENV_VAR
-)
-
-
-def get_basespace_url() -> str:
-    """
-    Return the BaseSpace URL from SSM.
-    :return:
-    """
-    return get_ssm_value(
-        parameter_name=environ[BASESPACE_URL_SSM_PARAMETER_NAME_ENV_VAR]
-    )
-
-
-def get_basespace_access_token() -> str:
-    """
-    Return the BaseSpace access token from Secrets Manager.
-    :return:
-    """
-    return get_secret_value(
-        secret_id=environ[BASESPACE_ACCESS_TOKEN_SECRET_NAME_ENV_VAR]
-    )
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from libica.openapi.v3 import AnalysisInput, ProjectData
 
 
-def get_basespace_run_from_instrument_run_id(
+def get_basespace_run_info_from_instrument_run_id(
         instrument_run_id: str,
-) -> Dict[str, Union[Dict, str, int]]:
+) -> BasespaceRunInfo:
     """
-    Get the BaseSpace run given an experiment name.
+    Given an instrument run id, return the experiment name, basespace run id and run status
+    from a single run lookup.
+
+    Finished runs are served from the run index for the life of the lambda container,
+    the status of a run that has not yet finished is always fetched again.
     :param instrument_run_id:
     :return:
     """
-    headers = {
-        "Accept": "application/json",
-        "x-access-token": get_basespace_access_token()
-    }
-
-    params = {
-        "Limit": 1000
-    }
-
-    # Make the request
-    response = requests.get(
-        f"{get_basespace_url()}/v2/runs",
-        headers=headers,
-        params=params,
+    basespace_run = get_basespace_run_index().lookup(
+        instrument_run_id=instrument_run_id
     )
-
-    # Raise for status
-    response.raise_for_status()
-
-    # Return the run
-    try:
-        basespace_run_object = next(filter(
-            lambda run_item_iter_: run_item_iter_['Name'] == instrument_run_id,
-            response.json()['Items']
-        ))
-    except StopIteration:
-        raise ValueError(
-            f"Could not find BaseSpace run with instrument run ID "
-            f"'{instrument_run_id}'"
-        )
-
-    return basespace_run_object
+    return {
+        "instrumentRunId": instrument_run_id,
+        "experimentRunName": basespace_run['ExperimentName'],
+        "basespaceRunId": int(basespace_run['V1Pre3Id']),
+        "status": basespace_run['Status'],
+    }
 
 
 def get_basespace_run_id_from_instrument_run_id(
@@ -109,10 +67,9 @@ def get_basespace_run_id_from_instrument_run_id(
     :param instrument_run_id:
     :return:
     """
-    basespace_run = get_basespace_run_from_instrument_run_id(
+    return get_basespace_run_info_from_instrument_run_id(
         instrument_run_id=instrument_run_id
-    )
-    return int(basespace_run['V1Pre3Id'])
+    )['basespaceRunId']
 
 
 def get_experiment_name_from_instrument_run_id(
@@ -123,14 +80,13 @@ def get_experiment_name_from_instrument_run_id(
     :param instrument_run_id:
     :return:
     """
-    basespace_run = get_basespace_run_from_instrument_run_id(
+    return get_basespace_run_info_from_instrument_run_id(
         instrument_run_id=instrument_run_id
-    )
-    return basespace_run['ExperimentName']
+    )['experimentRunName']
 
 
 def get_input_uri_from_ica_inputs(
-    ica_inputs: List[AnalysisInput],
+    ica_inputs: List['AnalysisInput'],
     project_id: str,
     input_code: str,
 ) -> str:
@@ -140,21 +96,15 @@ def get_input_uri_from_ica_inputs(
     :param input_code:
     :return:
     """
-    analysis_input_object: AnalysisInput = next(filter(
-        lambda input_item_iter_: input_item_iter_.code == input_code,
-        ica_inputs
-    ))
-
-    return convert_project_data_obj_to_uri(
-        get_project_data_obj_by_id(
-            project_id=project_id,
-            data_id=analysis_input_object.analysis_data[0].data_id
-        )
-    )
+    return resolve_ica_input_uris(
+        ica_inputs=ica_inputs,
+        project_id=project_id,
+        input_codes=[input_code],
+    )[input_code]
 
 
 def get_run_folder_input_uri_from_ica_inputs(
-        ica_inputs: List[AnalysisInput],
+        ica_inputs: List['AnalysisInput'],
         project_id: str,
 ) -> str:
     """
@@ -165,11 +115,11 @@ def get_run_folder_input_uri_from_ica_inputs(
     return get_input_uri_from_ica_inputs(
         ica_inputs=ica_inputs,
         project_id=project_id,
-        input_code='run_folder'
+        input_code=RUN_FOLDER_INPUT_CODE
     )
 
 def get_sample_sheet_uri_from_ica_inputs(
-        ica_inputs: List[AnalysisInput],
+        ica_inputs: List['AnalysisInput'],
         project_id: str,
 ):
     """
@@ -180,116 +130,70 @@ def get_sample_sheet_uri_from_ica_inputs(
     return get_input_uri_from_ica_inputs(
         ica_inputs=ica_inputs,
         project_id=project_id,
-        input_code='sample_sheet'
-    )
-
-
-def download_samplesheet_to_path_from_uri(
-        samplesheet_uri: str,
-        output_path:  Path
-):
-    # Get the samplesheet uri as a project data object
-    project_data_obj = convert_uri_to_project_data_obj(
-        samplesheet_uri
-    )
-
-    # Read the samplesheet contents
-    read_icav2_file_contents(
-        project_id=project_data_obj.project_id,
-        data_id=project_data_obj.data.id,
-        output_path=output_path,
+        input_code=SAMPLE_SHEET_INPUT_CODE
     )
 
 
-def get_library_ids_from_samplesheet_uri(
-        samplesheet_uri: str,
-):
+def get_instrument_run_id_from_run_folder(
+        run_folder_project_data_obj: 'ProjectData',
+) -> str:
     """
-    Given a samplesheet URI, return the experiment run name.
-    :param samplesheet_uri:
+    Given the run folder project data object, return the instrument run id from its RunInfo.xml file.
+    :param run_folder_project_data_obj:
     :return:
     """
-    with NamedTemporaryFile(suffix=".csv") as temp_samplesheet_file:
-        # Download the samplesheet to a temporary file
-        samplesheet_path = Path(temp_samplesheet_file.name)
-
-        # Download the samplesheet to the temporary path
-        download_samplesheet_to_path_from_uri(
-            samplesheet_uri=samplesheet_uri,
-            output_path=samplesheet_path
+    return get_run_info_summary_from_project_data_obj(
+        get_child_project_data_obj(
+            run_folder_project_data_obj,
+            RUN_INFO_XML_FILE_NAME,
         )
+    )["instrumentRunId"]
 
-        # Read the samplesheet into a DataFrame
-        library_id_list = list(map(
-            lambda bclconvert_data_row_iter_: bclconvert_data_row_iter_['sample_id'],
-            v2_samplesheet_reader(
-                samplesheet_path
-            )['bclconvert_data']
-        ))
-
-        return library_id_list
 
+def download_samplesheet_to_path_from_uri(
+        samplesheet_uri: str,
+        output_path:  Path
+):
+    # Imported on first use, wrapica is slow to import
+    from wrapica.project_data import (
+        read_icav2_file_contents,
+        convert_uri_to_project_data_obj
+    )
 
-def get_instrument_run_id_from_run_info_xml(
-        run_info_xml_uri: str,
-) -> str:
-    """
-    Given a run info XML path, return the instrument run id.
-    :param run_info_xml_uri:
-    :return:
-    """
-    with NamedTemporaryFile(suffix=".xml") as temp_xml_file:
-        # Download the samplesheet to a temporary file
-        run_info_xml_path = Path(temp_xml_file.name)
-
-        # Get the samplesheet uri as a project data object
+    # Get the samplesheet uri as a project data object
+    with dependency_call("icav2"):
         project_data_obj = convert_uri_to_project_data_obj(
-            run_info_xml_uri
+            samplesheet_uri
         )
 
-        # Read the samplesheet contents
+    # Read the samplesheet contents
+    with dependency_call("icav2"):
         read_icav2_file_contents(
             project_id=project_data_obj.project_id,
             data_id=project_data_obj.data.id,
-            output_path=run_info_xml_path,
+            output_path=output_path,
         )
 
-        # Read the samplesheet into a DataFrame
-        run_info_obj = run_info_xml_reader(
-            run_info_xml_path
-        )
 
-        return run_info_obj["RunInfo"]["Run"]["@Id"]
-
-
-def get_samplesheet_md5sum_from_samplesheet_uri(
+def get_library_ids_from_samplesheet_uri(
         samplesheet_uri: str,
-) -> str:
+) -> List[str]:
     """
-    Given a samplesheet URI, return the MD5 sum.
+    Given a samplesheet URI, return the (unique) library ids in the BCLConvert_Data section.
     :param samplesheet_uri:
     :return:
     """
-    # Get the samplesheet uri as a project data object
-    project_data_obj = convert_uri_to_project_data_obj(
-        samplesheet_uri
-    )
-
-    return (
-        hashlib.md5(
-            read_icav2_file_contents(
-                project_id=project_data_obj.project_id,
-                data_id=project_data_obj.data.id
-            ).encode('utf-8')
-        ).hexdigest()
-    )
+    return get_samplesheet_from_uri(samplesheet_uri).library_ids
 
 
-def get_samplesheet_md5sum_from_instrument_run_id(
-    instrument_run_id: str
+def get_instrument_run_id_from_run_info_xml(
+        run_info_xml_uri: str,
 ) -> str:
-    samplesheet_contents: str = get_sample_sheet_from_instrument_run_id(
-        instrument_run_id=instrument_run_id
-    )['sampleSheetContentOriginal']
+    """
+    Given a run info XML path, return the instrument run id.
 
-    return hashlib.md5(samplesheet_contents.encode('utf-8')).hexdigest()
+    Only reads as far into the file as the Run element.
+    :param run_info_xml_uri:
+    :return:
+    """
+    return get_run_info_summary_from_uri(run_info_xml_uri)["instrumentRunId"]
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+
+"""
+BaseSpace run index
+
+A local index of BaseSpace runs keyed by the instrument run id (the run 'Name' in BaseSpace).
+
+Each entry holds only the attributes we use to build workflow tags
+
+* Id
+* ExperimentName
+* V1Pre3Id
+* Status
+* DateModified
+
+The index is refreshed incrementally, we page through the /v2/runs endpoint sorted by
+DateModified (newest first) and stop as soon as we reach a run that was modified before the watermark
+(the newest DateModified seen by the last refresh), or when we reach the run we are looking for.
+An index without a watermark only pulls in the most recently modified runs (a single page), not the entire history.
+
+Lookups for finished runs already in the index are served locally without any round trip to BaseSpace,
+a run that has not yet finished is fetched again by its id so that we never return a stale status.
+A run that is still not in the index after a refresh (one last modified before the watermark that the index
+has never seen, i.e. before the index was first built) is searched for by itself, newest first, and added to the index.
+"""
+
+# Standard library imports
+import logging
+from os import environ
+from pathlib import Path
+from typing import Dict, Optional, TypedDict, Union
+
+# Local imports
+from .basespace_api import (
+    get_basespace_run,
+    get_basespace_run_from_instrument_run_id,
+    get_basespace_url,
+    iter_basespace_runs,
+)
+from .globals import (
+    BASESPACE_RUN_INDEX_COLD_REFRESH_MAX_RUNS,
+    BASESPACE_RUN_INDEX_PAGE_SIZE,
+    BASESPACE_RUN_INDEX_PATH_ENV_VAR,
+    BASESPACE_RUN_INDEX_VERSION,
+    BASESPACE_RUN_TERMINAL_STATUSES,
+    DEFAULT_BASESPACE_RUN_INDEX_PATH,
+)
+from .index_backends import IndexBackend, JsonFileIndexBackend
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Globals
+_BASESPACE_RUN_INDEX: Optional['BasespaceRunIndex'] = None
+
+
+class BasespaceRunIndexEntry(TypedDict):
+    Id: str
+    ExperimentName: str
+    V1Pre3Id: str
+    Status: str
+    DateModified: str
+
+
+def _get_run_index_entry_from_run_object(
+        basespace_run_object: Dict[str, Union[Dict, str, int]]
+) -> BasespaceRunIndexEntry:
+    """
+    Trim a BaseSpace run object down to the attributes we keep in the index
+    :param basespace_run_object:
+    :return:
+    """
+    return {
+        "Id": basespace_run_object['Id'],
+        "ExperimentName": basespace_run_object['ExperimentName'],
+        "V1Pre3Id": basespace_run_object['V1Pre3Id'],
+        "Status": basespace_run_object['Status'],
+        "DateModified": basespace_run_object['DateModified'],
+    }
+
+
+class BasespaceRunIndex:
+    """
+    Index of BaseSpace runs keyed by instrument run id
+    """
+
+    def __init__(self, backend: IndexBackend):
+        self.backend = backend
+        self._runs: Dict[str, BasespaceRunIndexEntry] = {}
+        self._watermark: Optional[str] = None
+        self._basespace_url: Optional[str] = None
+        self._loaded = False
+
+    def _load(self):
+        """
+        Load the index from the backend, dropping any index written by a different
+        index version or for a different BaseSpace instance
+        :return:
+        """
+        if self._loaded:
+            return
+
+        self._loaded = True
+        self._basespace_url = get_basespace_url()
+
+        index = self.backend.load()
+        if (
+                index is None or
+                index.get("version") != BASESPACE_RUN_INDEX_VERSION or
+                index.get("basespaceUrl") != self._basespace_url
+        ):
+            return
+
+        self._runs = index["runs"]
+        self._watermark = index["watermark"]
+
+    def _save(self):
+        self.backend.save({
+            "version": BASESPACE_RUN_INDEX_VERSION,
+            "basespaceUrl": self._basespace_url,
+            "watermark": self._watermark,
+            "runs": self._runs,
+        })
+
+    def get(self, instrument_run_id: str) -> Optional[BasespaceRunIndexEntry]:
+        """
+        Get an index entry without refreshing the index
+        :param instrument_run_id:
+        :return:
+        """
+        self._load()
+        return self._runs.get(instrument_run_id)
+
+    def refresh(self, instrument_run_id: Optional[str] = None):
+        """
+        Pull in the runs modified since the watermark,
+        or the most recently modified runs if the index does not yet have a watermark.
+
+        If an instrument run id is provided, we stop as soon as we find it.
+        The watermark is then advanced to the newest run we have seen,
+        any run we skipped over is searched for by itself if it is looked up (see lookup).
+        :param instrument_run_id:
+        :return:
+        """
+        self._load()
+
+        max_runs = BASESPACE_RUN_INDEX_COLD_REFRESH_MAX_RUNS if self._watermark is None else None
+
+        latest_date_modified: Optional[str] = None
+        for run_count, basespace_run_object in enumerate(
+                iter_basespace_runs(
+                    sort_by='DateModified',
+                    sort_dir='Desc',
+                    page_size=BASESPACE_RUN_INDEX_PAGE_SIZE,
+                ),
+                start=1
+        ):
+            # Everything from here on is already in the index
+            if (
+                    self._watermark is not None and
+                    basespace_run_object['DateModified'] < self._watermark
+            ):
+                break
+
+            if latest_date_modified is None:
+                latest_date_modified = basespace_run_object['DateModified']
+
+            self._runs[basespace_run_object['Name']] = _get_run_index_entry_from_run_object(
+                basespace_run_object
+            )
+
+            if (
+                    basespace_run_object['Name'] == instrument_run_id or
+                    (max_runs is not None and run_count >= max_runs)
+            ):
+                break
+
+        if latest_date_modified is not None:
+            self._watermark = latest_date_modified
+
+        self._save()
+
+    def lookup(self, instrument_run_id: str) -> BasespaceRunIndexEntry:
+        """
+        Get an index entry, refreshing the index if the run is not yet in the index,
+        or the entry if the run has not yet finished
+        :param instrument_run_id:
+        :return:
+        """
+        run_index_entry = self.get(instrument_run_id)
+        if run_index_entry is not None:
+            if run_index_entry['Status'] in BASESPACE_RUN_TERMINAL_STATUSES:
+                return run_index_entry
+
+            # The run may have moved on since we indexed it
+            self._runs[instrument_run_id] = _get_run_index_entry_from_run_object(
+                get_basespace_run(run_index_entry['Id'])
+            )
+            self._save()
+            return self._runs[instrument_run_id]
+
+        logger.info(f"Instrument run id '{instrument_run_id}' not in the run index, refreshing")
+        self.refresh(instrument_run_id=instrument_run_id)
+
+        run_index_entry = self.get(instrument_run_id)
+        if run_index_entry is not None:
+            return run_index_entry
+
+        # Not modified since the watermark (or not among the most recently modified runs of a new index),
+        # search for the run itself (raises a ValueError if it does not exist)
+        logger.info(f"Instrument run id '{instrument_run_id}' not in the refreshed run index, searching for it")
+        self._runs[instrument_run_id] = _get_run_index_entry_from_run_object(
+            get_basespace_run_from_instrument_run_id(instrument_run_id)
+        )
+        self._save()
+
+        return self._runs[instrument_run_id]
+
+
+def get_basespace_run_index() -> BasespaceRunIndex:
+    """
+    Get the run index for this lambda container.
+    By default, the index is persisted to a json file in /tmp.
+    :return:
+    """
+    global _BASESPACE_RUN_INDEX
+
+    if _BASESPACE_RUN_INDEX is None:
+        _BASESPACE_RUN_INDEX = BasespaceRunIndex(
+            backend=JsonFileIndexBackend(
+                Path(environ.get(
+                    BASESPACE_RUN_INDEX_PATH_ENV_VAR,
+                    DEFAULT_BASESPACE_RUN_INDEX_PATH
+                ))
+            )
+        )
+
+    return _BASESPACE_RUN_INDEX
+
+
+def set_basespace_run_index(basespace_run_index: Optional[BasespaceRunIndex]):
+    """
+    Override the run index for this lambda container, i.e. to use an in-memory backend in tests.
+    Set to None to reset to the default.
+    :param basespace_run_index:
+    :return:
+    """
+    global _BASESPACE_RUN_INDEX
+    _BASESPACE_RUN_INDEX = basespace_run_index
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+
+"""
+Config cache
+
+SSM parameters and Secrets Manager values rarely change, but are read on nearly every invocation.
+
+We keep them in memory for the life of the warm lambda container with a per-key TTL.
+Missing parameters are cached too (for a shorter TTL) so that a misconfigured parameter
+does not hammer the SSM API during a burst of events.
+
+Use invalidate_config_cache to drop a value early, i.e. after an access token has been rotated.
+
+The ICAv2 env vars (set from the ICAv2 access token secret) are cached in the same way.
+
+Each fetch (but not a cache hit) is recorded as a call to SSM or Secrets Manager by the instrumentation.
+"""
+
+# Standard library imports
+import logging
+import typing
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+# AWS imports
+import boto3
+from botocore.exceptions import ClientError
+
+# Local imports
+from .globals import (
+    DEFAULT_CONFIG_CACHE_MISSING_TTL_SECONDS,
+    DEFAULT_ICAV2_ENV_CACHE_TTL_SECONDS,
+    DEFAULT_SECRET_CACHE_TTL_SECONDS,
+    DEFAULT_SSM_CACHE_TTL_SECONDS,
+)
+from .instrumentation import dependency_call
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from mypy_boto3_ssm import SSMClient
+    from mypy_boto3_secretsmanager import SecretsManagerClient
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Error codes we treat as 'this value does not exist'
+MISSING_VALUE_ERROR_CODES = [
+    "ParameterNotFound",
+    "ResourceNotFoundException",
+]
+
+
+class TtlCache:
+    """
+    A small thread-safe key value cache where each key has its own expiry
+    """
+
+    def __init__(self):
+        # Key -> (expires at, value or exception raised when fetching the value)
+        self._entries: Dict[Hashable, Tuple[float, Union[Any, Exception]]] = {}
+        self._lock = Lock()
+
+    def get_or_fetch(
+            self,
+            key: Hashable,
+            fetch_func: Callable[[], Any],
+            ttl_seconds: float,
+            missing_ttl_seconds: float = DEFAULT_CONFIG_CACHE_MISSING_TTL_SECONDS,
+            is_missing_error: Callable[[Exception], bool] = lambda e: False,
+    ) -> Any:
+        """
+        Return the cached value for the key, calling the fetch function if the key has expired.
+
+        If the fetch function raises an error that is_missing_error considers a missing value,
+        the error is cached for missing_ttl_seconds and re-raised on each get until then.
+        :param key:
+        :param fetch_func:
+        :param ttl_seconds:
+        :param missing_ttl_seconds:
+        :param is_missing_error:
+        :return:
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is not None and entry[0] > monotonic():
+            if isinstance(entry[1], Exception):
+                raise entry[1]
+            return entry[1]
+
+        try:
+            value = fetch_func()
+        except Exception as e:
+            if is_missing_error(e):
+                with self._lock:
+                    self._entries[key] = (monotonic() + missing_ttl_seconds, e)
+            raise
+
+        with self._lock:
+            self._entries[key] = (monotonic() + ttl_seconds, value)
+
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """
+        Drop a single key from the cache, or all keys if no key is provided
+        :param key:
+        :return:
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+# Globals
+_CONFIG_CACHE = TtlCache()
+_SSM_CLIENT: Optional['SSMClient'] = None
+_SECRETS_MANAGER_CLIENT: Optional['SecretsManagerClient'] = None
+
+
+def _get_ssm_client() -> 'SSMClient':
+    global _SSM_CLIENT
+
+    if _SSM_CLIENT is None:
+        _SSM_CLIENT = boto3.client("ssm")
+
+    return _SSM_CLIENT
+
+
+def _get_secrets_manager_client() -> 'SecretsManagerClient':
+    global _SECRETS_MANAGER_CLIENT
+
+    if _SECRETS_MANAGER_CLIENT is None:
+        _SECRETS_MANAGER_CLIENT = boto3.client("secretsmanager")
+
+    return _SECRETS_MANAGER_CLIENT
+
+
+def _is_missing_value_error(error: Exception) -> bool:
+    return (
+        isinstance(error, ClientError) and
+        error.response.get("Error", {}).get("Code") in MISSING_VALUE_ERROR_CODES
+    )
+
+
+def _fetch_ssm_value(parameter_name: str) -> str:
+    with dependency_call("ssm") as call:
+        value = _get_ssm_client().get_parameter(
+            Name=parameter_name,
+            WithDecryption=True
+        )["Parameter"]["Value"]
+        call["bytesReceived"] = len(value)
+    return value
+
+
+def _fetch_secret_value(secret_id: str) -> str:
+    with dependency_call("secretsManager") as call:
+        value = _get_secrets_manager_client().get_secret_value(
+            SecretId=secret_id
+        )["SecretString"]
+        call["bytesReceived"] = len(value)
+    return value
+
+
+def _fetch_icav2_env_vars():
+    # Imported here so that lambdas without the icav2 tools layer can still use the config cache
+    from icav2_tools import set_icav2_env_vars
+
+    # Reads the ICAv2 access token secret
+    with dependency_call("secretsManager"):
+        set_icav2_env_vars()
+
+
+def get_cached_ssm_value(
+        parameter_name: str,
+        ttl_seconds: float = DEFAULT_SSM_CACHE_TTL_SECONDS,
+) -> str:
+    """
+    Get an SSM parameter value, cached for ttl_seconds
+    :param parameter_name:
+    :param ttl_seconds:
+    :return:
+    """
+    return _CONFIG_CACHE.get_or_fetch(
+        key=("ssm", parameter_name),
+        fetch_func=lambda: _fetch_ssm_value(parameter_name),
+        ttl_seconds=ttl_seconds,
+        is_missing_error=_is_missing_value_error,
+    )
+
+
+def get_cached_secret_value(
+        secret_id: str,
+        ttl_seconds: float = DEFAULT_SECRET_CACHE_TTL_SECONDS,
+) -> str:
+    """
+    Get a Secrets Manager secret string, cached for ttl_seconds
+    :param secret_id:
+    :param ttl_seconds:
+    :return:
+    """
+    return _CONFIG_CACHE.get_or_fetch(
+        key=("secretsmanager", secret_id),
+        fetch_func=lambda: _fetch_secret_value(secret_id),
+        ttl_seconds=ttl_seconds,
+        is_missing_error=_is_missing_value_error,
+    )
+
+
+def invalidate_config_cache(
+        parameter_name: Optional[str] = None,
+        secret_id: Optional[str] = None,
+):
+    """
+    Drop an SSM parameter and / or a secret from the cache.
+    If neither is provided, the whole cache is dropped.
+    :param parameter_name:
+    :param secret_id:
+    :return:
+    """
+    if parameter_name is None and secret_id is None:
+        _CONFIG_CACHE.invalidate()
+        return
+
+    if parameter_name is not None:
+        _CONFIG_CACHE.invalidate(("ssm", parameter_name))
+    if secret_id is not None:
+        _CONFIG_CACHE.invalidate(("secretsmanager", secret_id))
+
+
+def set_cached_icav2_env_vars(
+        ttl_seconds: float = DEFAULT_ICAV2_ENV_CACHE_TTL_SECONDS,
+):
+    """
+    Set the ICAv2 env vars (which reads the ICAv2 access token from Secrets Manager),
+    at most once every ttl_seconds for this lambda container.
+    :param ttl_seconds:
+    :return:
+    """
+    _CONFIG_CACHE.get_or_fetch(
+        key=("icav2", "env"),
+        fetch_func=_fetch_icav2_env_vars,
+        ttl_seconds=ttl_seconds,
+    )
@@ -3,6 +3,8 @@
 """
 Layer Globals
 """
+from codecs import BOM_UTF8
+from pathlib import Path
 from typing import Literal
 
 # Globals
@@ -10,7 +12,136 @@ from typing import Literal
 BASESPACE_URL_SSM_PARAMETER_NAME_ENV_VAR = "BASESPACE_URL_SSM_PARAMETER_NAME"
 BASESPACE_ACCESS_TOKEN_SECRET_NAME_ENV_VAR = "BASESPACE_ACCESS_TOKEN_SECRET_ID"  # pragma: allowlist secret
 
+# Config cache
+# How long we trust SSM / Secrets Manager values for in a warm container
+DEFAULT_SSM_CACHE_TTL_SECONDS = 300
+DEFAULT_SECRET_CACHE_TTL_SECONDS = 300
+DEFAULT_ICAV2_ENV_CACHE_TTL_SECONDS = 300
+# Missing values are re-checked sooner, in case the value has since been created
+DEFAULT_CONFIG_CACHE_MISSING_TTL_SECONDS = 60
+
 SAMPLESHEET_CHECKSUM_TYPE = Literal[
     'md5'
 ]
 DEFAULT_SAMPLESHEET_CHECKSUM_TYPE: SAMPLESHEET_CHECKSUM_TYPE = 'md5'
+# The SRM only holds the decoded samplesheet text, so samplesheet checksums are taken
+# over the utf-8 text without a leading byte order mark, on both the ICAv2 and SRM side
+SAMPLESHEET_BYTE_ORDER_MARK = BOM_UTF8
+
+# HTTP client
+# Connect timeout is just above a multiple of 3 seconds, the default TCP retransmission window
+HTTP_CONNECT_TIMEOUT_SECONDS = 3.05
+HTTP_READ_TIMEOUT_SECONDS = 30
+HTTP_MAX_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 0.5
+HTTP_POOL_MAXSIZE = 10
+HTTP_RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+
+# ICAv2 files
+# Files are streamed from a presigned url in chunks of this size
+ICAV2_FILE_CHUNK_SIZE_BYTES = 1024 * 1024
+ICAV2_FILE_CHECKSUM_CACHE_SIZE = 128
+
+# ICA analysis inputs
+ICA_INPUTS_MAX_WORKERS = 4
+RUN_FOLDER_INPUT_CODE = "run_folder"
+SAMPLE_SHEET_INPUT_CODE = "sample_sheet"
+RUN_INFO_XML_FILE_NAME = "RunInfo.xml"
+
+# Analysis context
+# Bump the version whenever the context fields change,
+# contexts of any other version (i.e. from executions started before a deployment) are ignored
+ANALYSIS_CONTEXT_VERSION = 2
+
+# RunInfo.xml
+# The run id, flowcell, instrument and date are all near the top of the file,
+# so we only request the first few KB and fall back to the whole file if they are not all there
+RUN_INFO_XML_HEAD_BYTES = 4096
+
+# Samplesheets
+# Number of samplesheets we keep downloaded in a warm container
+SAMPLESHEET_CACHE_SIZE = 16
+
+# BaseSpace runs endpoint
+# Most lookups are for a run that has just been created,
+# so a small first page is usually all we need
+BASESPACE_RUNS_PAGE_SIZE = 25
+
+# BaseSpace run index
+# The index is persisted to the lambda's /tmp directory so that it survives
+# across warm invocations of the same container
+BASESPACE_RUN_INDEX_PATH_ENV_VAR = "BASESPACE_RUN_INDEX_PATH"
+DEFAULT_BASESPACE_RUN_INDEX_PATH = Path("/tmp/basespace_run_index.json")
+BASESPACE_RUN_INDEX_VERSION = 3
+BASESPACE_RUN_INDEX_PAGE_SIZE = 100
+# An index without a watermark (i.e. in a new container) only pulls in this many of the most recently modified runs,
+# rather than the entire run history, older runs are searched for by themselves when looked up
+BASESPACE_RUN_INDEX_COLD_REFRESH_MAX_RUNS = BASESPACE_RUN_INDEX_PAGE_SIZE
+# The status of a run in any other status is fetched again whenever it is looked up
+BASESPACE_RUN_TERMINAL_STATUSES = [
+    "Complete",
+    "Failed",
+    "Failed Upload",
+    "Stopped",
+    "Timed Out",
+]
+
+# Workflow run index
+# If the table name is set we use the shared DynamoDB table,
+# otherwise a local json file if the path is set, otherwise an in-memory index
+WORKFLOW_RUN_INDEX_TABLE_NAME_ENV_VAR = "WORKFLOW_RUN_INDEX_TABLE_NAME"
+WORKFLOW_RUN_INDEX_PATH_ENV_VAR = "WORKFLOW_RUN_INDEX_PATH"
+
+# Workflow run cache
+# Summaries of the workflow runs of a workflow (and the tags and engine parameters of their latest payload),
+# kept for the life of the warm lambda container, and persisted to a local json file if the path is set (i.e. under /tmp)
+WORKFLOW_RUN_CACHE_PATH_ENV_VAR = "WORKFLOW_RUN_CACHE_PATH"
+WORKFLOW_RUN_CACHE_VERSION = 2
+# Finished workflow runs are dropped from the cache once their last state is older than this
+WORKFLOW_RUN_CACHE_TERMINAL_WINDOW_DAYS_ENV_VAR = "WORKFLOW_RUN_CACHE_TERMINAL_WINDOW_DAYS"
+DEFAULT_WORKFLOW_RUN_CACHE_TERMINAL_WINDOW_DAYS = 90
+# Every workflow run is listed again at this interval (and whenever a search over finished workflow runs finds nothing),
+# to pick up any workflow run that was created and finished between two refreshes
+WORKFLOW_RUN_CACHE_FULL_REFRESH_INTERVAL_SECONDS = 6 * 60 * 60
+WORKFLOW_RUN_CACHE_MAX_WORKERS = 10
+# Only these parts of the payload data are cached
+WORKFLOW_RUN_CACHE_PAYLOAD_DATA_KEYS = [
+    "tags",
+    "engineParameters",
+]
+# A DRAFT workflow run can have its payload replaced without moving to a new state,
+# so the payloads of workflow runs in these statuses are never cached
+WORKFLOW_RUN_CACHE_UNCACHED_PAYLOAD_STATUSES = [
+    "DRAFT",
+]
+WORKFLOW_RUN_ACTIVE_STATUSES = [
+    "DRAFT",
+    "READY",
+    "STARTING",
+    "RUNNING",
+]
+WORKFLOW_RUN_TERMINAL_STATUSES = [
+    "SUCCEEDED",
+    "FAILED",
+    "ABORTED",
+]
+
+# Workflow run matcher
+# Bounded so that a long workflow run history does not open a connection per run
+WORKFLOW_RUN_MATCHER_MAX_WORKERS = 10
+# Workflow runs are checked in this order of status, statuses not listed are checked last
+WORKFLOW_RUN_STATUS_PRIORITY = [
+    "DRAFT",
+    "READY",
+    "STARTING",
+    "RUNNING",
+    "SUCCEEDED",
+]
+
+# Instrumentation
+# One embedded metric format (EMF) record per instrumented handler invocation
+INSTRUMENTATION_METRICS_NAMESPACE = "OrcaBus/BclconvertManager"
+# Requests made with the shared HTTP client that do not name a dependency
+DEFAULT_HTTP_DEPENDENCY = "http"
+# Upper bounds of the latency histogram buckets, calls slower than the last bound go in an overflow bucket
+INSTRUMENTATION_LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
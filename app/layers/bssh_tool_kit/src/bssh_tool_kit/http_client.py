@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+"""
+Shared HTTP client
+
+A single requests session per lambda container so that warm invocations reuse pooled,
+keep-alive connections rather than paying for a new TLS handshake on every request.
+
+Every request has a connect and read timeout, and is retried with exponential backoff
+on 429 and 5xx responses (honouring any Retry-After header).
+
+The latency of each request is exposed through the on_response (or on_error) callbacks
+and the last_latency_seconds attribute.
+Callers name the dependency they are calling, which is passed through to the callbacks.
+"""
+
+# Standard library imports
+import logging
+from time import perf_counter
+from typing import Callable, List, Optional, Tuple
+
+# Requests imports
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Local imports
+from .globals import (
+    DEFAULT_HTTP_DEPENDENCY,
+    HTTP_BACKOFF_FACTOR,
+    HTTP_CONNECT_TIMEOUT_SECONDS,
+    HTTP_MAX_RETRIES,
+    HTTP_POOL_MAXSIZE,
+    HTTP_READ_TIMEOUT_SECONDS,
+    HTTP_RETRY_STATUS_CODES,
+)
+from .instrumentation import record_http_error, record_http_response
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Type hints
+# Callback arguments are the method, url, response (or error) and request latency in seconds, then the dependency
+ResponseCallback = Callable[[str, str, requests.Response, float, str], None]
+ErrorCallback = Callable[[str, str, Exception, float, str], None]
+
+# Globals
+_HTTP_CLIENT: Optional['HttpClient'] = None
+
+
+class HttpClient:
+    """
+    Pooled, keep-alive HTTP client with timeouts and retries
+    """
+
+    def __init__(
+            self,
+            connect_timeout_seconds: float = HTTP_CONNECT_TIMEOUT_SECONDS,
+            read_timeout_seconds: float = HTTP_READ_TIMEOUT_SECONDS,
+            max_retries: int = HTTP_MAX_RETRIES,
+            backoff_factor: float = HTTP_BACKOFF_FACTOR,
+            pool_maxsize: int = HTTP_POOL_MAXSIZE,
+    ):
+        self.timeout: Tuple[float, float] = (connect_timeout_seconds, read_timeout_seconds)
+        self.last_latency_seconds: Optional[float] = None
+        self.on_response: List[ResponseCallback] = []
+        self.on_error: List[ErrorCallback] = []
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=HTTP_RETRY_STATUS_CODES,
+            allowed_methods=["GET", "HEAD"],
+            respect_retry_after_header=True,
+            # Let the caller decide what to do with the final response
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            max_retries=retry,
+            pool_connections=pool_maxsize,
+            pool_maxsize=pool_maxsize,
+        )
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(
+            self,
+            method: str,
+            url: str,
+            dependency: str = DEFAULT_HTTP_DEPENDENCY,
+            **kwargs
+    ) -> requests.Response:
+        """
+        Make a request with the client's default timeout
+        :param method:
+        :param url:
+        :param dependency: The service we are calling, i.e. 'basespace'
+        :param kwargs: Passed through to requests.Session.request
+        :return:
+        """
+        kwargs.setdefault("timeout", self.timeout)
+
+        start_time = perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except Exception as e:
+            self.last_latency_seconds = perf_counter() - start_time
+            for error_callback in self.on_error:
+                error_callback(method, url, e, self.last_latency_seconds, dependency)
+            raise
+        self.last_latency_seconds = perf_counter() - start_time
+
+        for callback in self.on_response:
+            callback(method, url, response, self.last_latency_seconds, dependency)
+
+        return response
+
+    def get(self, url: str, dependency: str = DEFAULT_HTTP_DEPENDENCY, **kwargs) -> requests.Response:
+        return self.request("GET", url, dependency=dependency, **kwargs)
+
+
+def get_http_client() -> HttpClient:
+    """
+    Get the shared HTTP client for this lambda container
+    :return:
+    """
+    global _HTTP_CLIENT
+
+    if _HTTP_CLIENT is None:
+        _HTTP_CLIENT = HttpClient()
+        # Only recorded while an instrumented handler is running
+        _HTTP_CLIENT.on_response.append(record_http_response)
+        _HTTP_CLIENT.on_error.append(record_http_error)
+
+    return _HTTP_CLIENT
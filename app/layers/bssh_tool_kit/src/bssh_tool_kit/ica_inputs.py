@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+"""
+ICA analysis inputs
+
+Resolve the inputs of an ICAv2 analysis (by input code) to project data objects in a single batch,
+with one lookup per input, all run concurrently.
+
+Files under a folder input (i.e. the RunInfo.xml file under the run folder) are looked up
+directly by path from the folder's project data object,
+rather than converting the folder back to a URI, appending the file name and converting it again.
+"""
+
+# Standard library imports
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import typing
+from typing import Dict, Iterable, List, Optional
+
+# Local imports
+from .globals import ICA_INPUTS_MAX_WORKERS
+from .instrumentation import dependency_call
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from libica.openapi.v3 import AnalysisInput, ProjectData
+    from wrapica.enums import DataType
+
+
+def get_ica_inputs_by_code(
+        ica_inputs: List['AnalysisInput'],
+) -> Dict[str, 'AnalysisInput']:
+    """
+    Get the analysis inputs keyed by input code
+    :param ica_inputs:
+    :return:
+    """
+    return dict(map(
+        lambda input_item_iter_: (input_item_iter_.code, input_item_iter_),
+        ica_inputs
+    ))
+
+
+def resolve_ica_inputs(
+        ica_inputs: List['AnalysisInput'],
+        project_id: str,
+        input_codes: Iterable[str],
+) -> Dict[str, 'ProjectData']:
+    """
+    Given the ICA inputs, return the project data object for each of the input codes,
+    resolved concurrently
+    :param ica_inputs:
+    :param project_id:
+    :param input_codes:
+    :return:
+    """
+    # Imported on first use, wrapica is slow to import
+    from wrapica.project_data import get_project_data_obj_by_id
+
+    ica_inputs_by_code = get_ica_inputs_by_code(ica_inputs)
+
+    # Remove duplicate input codes, keeping the order given
+    input_codes = list(dict.fromkeys(input_codes))
+
+    # Check all input codes exist before we make any requests
+    missing_input_codes = list(filter(
+        lambda input_code_iter_: input_code_iter_ not in ica_inputs_by_code,
+        input_codes
+    ))
+    if len(missing_input_codes) > 0:
+        raise ValueError(
+            f"Could not find the input code(s) {', '.join(missing_input_codes)} in the analysis inputs"
+        )
+
+    if len(input_codes) == 0:
+        return {}
+
+    def _get_project_data_obj(input_code: str) -> 'ProjectData':
+        with dependency_call("icav2"):
+            return get_project_data_obj_by_id(
+                project_id=project_id,
+                data_id=ica_inputs_by_code[input_code].analysis_data[0].data_id
+            )
+
+    with ThreadPoolExecutor(max_workers=min(ICA_INPUTS_MAX_WORKERS, len(input_codes))) as executor:
+        project_data_objs = executor.map(_get_project_data_obj, input_codes)
+
+        return dict(zip(input_codes, project_data_objs))
+
+
+def resolve_ica_input_uris(
+        ica_inputs: List['AnalysisInput'],
+        project_id: str,
+        input_codes: Iterable[str],
+) -> Dict[str, str]:
+    """
+    Given the ICA inputs, return the icav2:// URI for each of the input codes,
+    resolved concurrently
+    :param ica_inputs:
+    :param project_id:
+    :param input_codes:
+    :return:
+    """
+    # Imported on first use, wrapica is slow to import
+    from wrapica.project_data import convert_project_data_obj_to_uri
+
+    return dict(map(
+        lambda input_item_iter_: (
+            input_item_iter_[0],
+            convert_project_data_obj_to_uri(input_item_iter_[1])
+        ),
+        resolve_ica_inputs(
+            ica_inputs=ica_inputs,
+            project_id=project_id,
+            input_codes=input_codes,
+        ).items()
+    ))
+
+
+def get_child_project_data_obj(
+        parent_project_data_obj: 'ProjectData',
+        child_name: str,
+        data_type: Optional['DataType'] = None,
+) -> 'ProjectData':
+    """
+    Get a file (or folder) directly under a folder project data object, looked up by path
+    :param parent_project_data_obj:
+    :param child_name:
+    :param data_type: Defaults to a file
+    :return:
+    """
+    # Imported on first use, wrapica is slow to import
+    from wrapica.enums import DataType
+    from wrapica.project_data import get_project_data_obj_from_project_id_and_path
+
+    if data_type is None:
+        data_type = DataType.FILE
+
+    with dependency_call("icav2"):
+        return get_project_data_obj_from_project_id_and_path(
+            project_id=parent_project_data_obj.project_id,
+            data_path=Path(parent_project_data_obj.data.details.path) / child_name,
+            data_type=data_type,
+        )
+
+
+def get_folder_project_data_obj_from_uri(
+        folder_uri: str,
+) -> 'ProjectData':
+    """
+    Get the project data object of a folder from its URI, with or without a trailing slash
+    (a URI without one would be looked up as a file)
+    :param folder_uri:
+    :return:
+    """
+    # Imported on first use, wrapica is slow to import
+    from wrapica.project_data import convert_uri_to_project_data_obj
+
+    with dependency_call("icav2"):
+        return convert_uri_to_project_data_obj(folder_uri.rstrip("/") + "/")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+"""
+ICAv2 file helpers
+
+Read ICAv2 files as raw bytes, streamed through the shared HTTP client from a presigned download url,
+rather than reading the whole file into a string.
+
+Checksums are computed incrementally over the byte stream, and cached by data id and modification time
+so that checking the same file again in a warm container costs a single metadata lookup.
+"""
+
+# Standard library imports
+import hashlib
+from datetime import datetime
+from functools import lru_cache
+import typing
+from typing import Iterator, Optional, Union
+
+# Local imports
+from .globals import (
+    ICAV2_FILE_CHUNK_SIZE_BYTES,
+    ICAV2_FILE_CHECKSUM_CACHE_SIZE,
+)
+from .http_client import get_http_client
+from .instrumentation import dependency_call
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from libica.openapi.v3 import ProjectData
+
+
+def iter_icav2_file_bytes(
+        project_id: str,
+        data_id: str,
+        chunk_size: int = ICAV2_FILE_CHUNK_SIZE_BYTES,
+        max_bytes: Optional[int] = None,
+) -> Iterator[bytes]:
+    """
+    Stream the raw bytes of an ICAv2 file in chunks of at most chunk_size bytes.
+
+    If max_bytes is set, only the first max_bytes bytes are requested (with a ranged read),
+    and no more than max_bytes bytes are yielded even if the range is ignored.
+    :param project_id:
+    :param data_id:
+    :param chunk_size:
+    :param max_bytes:
+    :return:
+    """
+    # Imported on first use, wrapica is slow to import
+    from wrapica.project_data import create_download_url
+
+    headers = {}
+    if max_bytes is not None:
+        headers["Range"] = f"bytes=0-{max_bytes - 1}"
+        chunk_size = min(chunk_size, max_bytes)
+
+    with dependency_call("icav2"):
+        download_url = create_download_url(
+            project_id=project_id,
+            file_id=data_id,
+        )
+
+    with get_http_client().get(
+            download_url,
+            dependency="icav2",
+            headers=headers,
+            stream=True,
+    ) as response:
+        response.raise_for_status()
+
+        bytes_yielded = 0
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if max_bytes is not None:
+                chunk = chunk[:max_bytes - bytes_yielded]
+            bytes_yielded += len(chunk)
+            yield chunk
+
+            # We have all the bytes we asked for, stop even if the range was ignored
+            if max_bytes is not None and bytes_yielded >= max_bytes:
+                break
+
+
+def get_icav2_file_bytes(
+        project_id: str,
+        data_id: str,
+) -> bytes:
+    """
+    Get the raw bytes of an ICAv2 file
+    :param project_id:
+    :param data_id:
+    :return:
+    """
+    return b"".join(iter_icav2_file_bytes(project_id=project_id, data_id=data_id))
+
+
+@lru_cache(maxsize=ICAV2_FILE_CHECKSUM_CACHE_SIZE)
+def _get_icav2_file_md5sum(
+        project_id: str,
+        data_id: str,
+        time_modified: Union[datetime, str, None],
+        skip_prefix: bytes = b"",
+) -> str:
+    # The modification time is only part of the cache key, a modified file is a new key
+    md5sum = hashlib.md5()
+    head = b""
+    for chunk in iter_icav2_file_bytes(project_id=project_id, data_id=data_id):
+        # Hold back the start of the file until we can tell if it begins with the prefix
+        if len(head) < len(skip_prefix):
+            head += chunk
+            if len(head) < len(skip_prefix):
+                continue
+            chunk = head.removeprefix(skip_prefix)
+        md5sum.update(chunk)
+
+    # The file is shorter than the prefix
+    if len(head) < len(skip_prefix):
+        md5sum.update(head)
+
+    return md5sum.hexdigest()
+
+
+def get_icav2_file_md5sum(
+        project_data_obj: 'ProjectData',
+        skip_prefix: bytes = b"",
+) -> str:
+    """
+    Get the md5sum of the raw bytes of an ICAv2 file.
+
+    The result is cached on the data id and modification time for the life of the lambda container.
+    :param project_data_obj:
+    :param skip_prefix: If the file starts with these bytes (i.e. a byte order mark), they are left out of the md5sum
+    :return:
+    """
+    return _get_icav2_file_md5sum(
+        project_id=project_data_obj.project_id,
+        data_id=project_data_obj.data.id,
+        time_modified=project_data_obj.data.details.time_modified,
+        skip_prefix=skip_prefix,
+    )
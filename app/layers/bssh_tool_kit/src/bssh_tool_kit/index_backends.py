@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+
+"""
+Storage backends for the layer's lookup indexes.
+
+Document backends store a whole index as a single JSON-serialisable dictionary,
+used for indexes that are private to a single lambda container
+
+* InMemoryIndexBackend - lives for the life of the warm lambda container (or the test)
+* JsonFileIndexBackend - persisted to a local file, i.e. under /tmp on lambda
+
+Key value backends store one JSON-serialisable dictionary per key,
+used for indexes that are shared between lambdas
+
+* InMemoryKeyValueBackend - lives for the life of the warm lambda container (or the test)
+* JsonFileKeyValueBackend - persisted to a local file
+* DynamoDbKeyValueBackend - persisted to a DynamoDB table with an 'id' string partition key
+"""
+
+# Standard library imports
+import json
+import logging
+import typing
+from abc import ABC, abstractmethod
+from copy import deepcopy
+from os import replace
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Dict, Optional
+
+# AWS imports
+import boto3
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from mypy_boto3_dynamodb import DynamoDBClient
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+
+class IndexBackend(ABC):
+    """
+    Abstract storage backend for an index
+    """
+
+    @abstractmethod
+    def load(self) -> Optional[Dict]:
+        """
+        Load the index, return None if the index has not yet been saved.
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def save(self, index: Dict):
+        """
+        Save the index
+        :param index:
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self):
+        """
+        Remove the saved index
+        :return:
+        """
+        raise NotImplementedError
+
+
+class InMemoryIndexBackend(IndexBackend):
+    """
+    Keep the index in memory
+    """
+
+    def __init__(self):
+        self._index: Optional[Dict] = None
+
+    def load(self) -> Optional[Dict]:
+        return deepcopy(self._index)
+
+    def save(self, index: Dict):
+        self._index = deepcopy(index)
+
+    def clear(self):
+        self._index = None
+
+
+class JsonFileIndexBackend(IndexBackend):
+    """
+    Keep the index in a local json file
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def load(self) -> Optional[Dict]:
+        if not self.path.is_file():
+            return None
+
+        try:
+            with open(self.path, "r") as index_h:
+                return json.load(index_h)
+        except (OSError, json.JSONDecodeError) as e:
+            # A corrupt index is no worse than a missing one, we just rebuild it
+            logger.warning(f"Could not read index at '{self.path}', ignoring: {e}")
+            return None
+
+    def save(self, index: Dict):
+        # Make sure the parent directory exists
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first and then move it into place
+        # so that a failed write never leaves us with a truncated index
+        with NamedTemporaryFile(
+                "w",
+                dir=self.path.parent,
+                prefix=f".{self.path.name}.",
+                delete=False
+        ) as temp_index_h:
+            json.dump(index, temp_index_h)
+
+        replace(temp_index_h.name, self.path)
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+
+
+class KeyValueBackend(ABC):
+    """
+    Abstract key value storage backend for an index
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Get the value for a key, return None if the key does not exist
+        :param key:
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def put(self, key: str, value: Dict):
+        """
+        Set the value for a key
+        :param key:
+        :param value:
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str):
+        """
+        Remove a key
+        :param key:
+        :return:
+        """
+        raise NotImplementedError
+
+
+class InMemoryKeyValueBackend(KeyValueBackend):
+    """
+    Keep the index in memory
+    """
+
+    def __init__(self):
+        self._items: Dict[str, Dict] = {}
+
+    def get(self, key: str) -> Optional[Dict]:
+        return deepcopy(self._items.get(key))
+
+    def put(self, key: str, value: Dict):
+        self._items[key] = deepcopy(value)
+
+    def delete(self, key: str):
+        self._items.pop(key, None)
+
+
+class JsonFileKeyValueBackend(KeyValueBackend):
+    """
+    Keep the index in a local json file
+    """
+
+    def __init__(self, path: Path):
+        self._document_backend = JsonFileIndexBackend(path)
+
+    def get(self, key: str) -> Optional[Dict]:
+        return (self._document_backend.load() or {}).get(key)
+
+    def put(self, key: str, value: Dict):
+        items = self._document_backend.load() or {}
+        items[key] = value
+        self._document_backend.save(items)
+
+    def delete(self, key: str):
+        items = self._document_backend.load() or {}
+        if items.pop(key, None) is not None:
+            self._document_backend.save(items)
+
+
+class DynamoDbKeyValueBackend(KeyValueBackend):
+    """
+    Keep the index in a DynamoDB table, values are stored as a json string in the 'value' attribute
+    """
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self._client: Optional['DynamoDBClient'] = None
+
+    @property
+    def client(self) -> 'DynamoDBClient':
+        if self._client is None:
+            self._client = boto3.client("dynamodb")
+        return self._client
+
+    def get(self, key: str) -> Optional[Dict]:
+        response = self.client.get_item(
+            TableName=self.table_name,
+            Key={"id": {"S": key}},
+        )
+
+        if "Item" not in response:
+            return None
+
+        return json.loads(response["Item"]["value"]["S"])
+
+    def put(self, key: str, value: Dict):
+        self.client.put_item(
+            TableName=self.table_name,
+            Item={
+                "id": {"S": key},
+                "value": {"S": json.dumps(value)},
+            },
+        )
+
+    def delete(self, key: str):
+        self.client.delete_item(
+            TableName=self.table_name,
+            Key={"id": {"S": key}},
+        )
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+
+"""
+Outbound call instrumentation
+
+Record every call a handler makes to the services it depends on (BaseSpace, ICAv2, the workflow manager,
+the SRM, the metadata manager, SSM and Secrets Manager), and emit them as a single
+CloudWatch embedded metric format (EMF) record once the handler has returned.
+
+Opt in per handler with the instrument_handler decorator, outside an instrumented handler nothing is recorded.
+
+For each dependency we record the number of calls, a latency histogram,
+the bytes received (where we can see them) and the number of errors by error class.
+Handlers may also record their own metrics (i.e. which tier matched a workflow run) with record_metric.
+
+Calls are recorded from
+
+* The shared HTTP client (BaseSpace and ICAv2 downloads), through its on_response and on_error callbacks
+* The config cache (SSM and Secrets Manager), only when a value is actually fetched
+* Each call to a wrapica or orcabus_api_tools function, by the layer or by a handler,
+  which is wrapped where it is made in the dependency_call context manager.
+  We cannot see the responses of these calls, so they do not count towards the bytes received.
+
+Records are printed to stdout (where the lambda runtime picks them up) by default,
+use set_metrics_sink with a LocalMetricsSink to collect them in tests.
+"""
+
+# Standard library imports
+import json
+import logging
+import threading
+import typing
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter, time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypedDict
+
+# Local imports
+from .globals import (
+    INSTRUMENTATION_LATENCY_BUCKETS_MS,
+    INSTRUMENTATION_METRICS_NAMESPACE,
+)
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from requests import Response
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Type hints
+MetricsSink = Callable[[Dict], None]
+
+
+class DependencyCall(TypedDict):
+    bytesReceived: int
+
+
+class DependencyMetrics:
+    """
+    The calls made to a single dependency in a single invocation
+    """
+
+    def __init__(self):
+        self.call_count = 0
+        self.latency_ms: List[float] = []
+        self.bytes_received = 0
+        self.error_counts: Dict[str, int] = {}
+
+    def get_latency_histogram(self) -> Dict[str, int]:
+        """
+        Get the number of calls in each latency bucket, keyed by the bucket's upper bound in ms
+        :return:
+        """
+        latency_histogram = dict(map(
+            lambda bucket_iter_: (f"<={bucket_iter_}", 0),
+            INSTRUMENTATION_LATENCY_BUCKETS_MS
+        ))
+        latency_histogram[f">{INSTRUMENTATION_LATENCY_BUCKETS_MS[-1]}"] = 0
+
+        for latency_ms in self.latency_ms:
+            bucket_key = next(
+                filter(
+                    lambda bucket_iter_: latency_ms <= bucket_iter_,
+                    INSTRUMENTATION_LATENCY_BUCKETS_MS
+                ),
+                None
+            )
+            if bucket_key is None:
+                latency_histogram[f">{INSTRUMENTATION_LATENCY_BUCKETS_MS[-1]}"] += 1
+            else:
+                latency_histogram[f"<={bucket_key}"] += 1
+
+        return latency_histogram
+
+
+class InvocationMetrics:
+    """
+    The calls made to each dependency in a single invocation,
+    calls may be recorded from any thread
+    """
+
+    def __init__(self):
+        self.dependencies: Dict[str, DependencyMetrics] = {}
+        # Metric name -> (value, unit)
+        self.metrics: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def record_call(
+            self,
+            dependency: str,
+            latency_seconds: float,
+            bytes_received: int = 0,
+            error_class: Optional[str] = None,
+    ):
+        with self._lock:
+            dependency_metrics = self.dependencies.setdefault(dependency, DependencyMetrics())
+            dependency_metrics.call_count += 1
+            dependency_metrics.latency_ms.append(latency_seconds * 1000)
+            dependency_metrics.bytes_received += bytes_received
+            if error_class is not None:
+                dependency_metrics.error_counts[error_class] = dependency_metrics.error_counts.get(error_class, 0) + 1
+
+    def record_metric(self, metric_name: str, value: float, unit: str):
+        with self._lock:
+            self.metrics[metric_name] = (value, unit)
+
+    def to_emf_record(self, handler_name: str, duration_ms: float) -> Dict[str, Any]:
+        """
+        Get the embedded metric format record for this invocation.
+
+        Each dependency has its own Calls, LatencyMs (the total over all calls), MaxLatencyMs, BytesReceived
+        and Errors metrics, the latency histogram and error classes are properties of the record.
+        Metrics recorded by the handler are added as they are.
+        :param handler_name:
+        :param duration_ms:
+        :return:
+        """
+        metric_definitions = [
+            {"Name": "DurationMs", "Unit": "Milliseconds"},
+        ]
+        metric_values: Dict[str, Any] = {
+            "DurationMs": round(duration_ms, 3),
+        }
+        dependencies = {}
+
+        for dependency, dependency_metrics in sorted(self.dependencies.items()):
+            dependency_metric_values = {
+                f"{dependency}.Calls": (dependency_metrics.call_count, "Count"),
+                f"{dependency}.LatencyMs": (round(sum(dependency_metrics.latency_ms), 3), "Milliseconds"),
+                f"{dependency}.MaxLatencyMs": (round(max(dependency_metrics.latency_ms), 3), "Milliseconds"),
+                f"{dependency}.BytesReceived": (dependency_metrics.bytes_received, "Bytes"),
+                f"{dependency}.Errors": (sum(dependency_metrics.error_counts.values()), "Count"),
+            }
+            for metric_name, (metric_value, metric_unit) in dependency_metric_values.items():
+                metric_definitions.append({"Name": metric_name, "Unit": metric_unit})
+                metric_values[metric_name] = metric_value
+
+            dependencies[dependency] = {
+                "latencyHistogramMs": dependency_metrics.get_latency_histogram(),
+                "errors": dependency_metrics.error_counts,
+            }
+
+        for metric_name, (metric_value, metric_unit) in sorted(self.metrics.items()):
+            metric_definitions.append({"Name": metric_name, "Unit": metric_unit})
+            metric_values[metric_name] = metric_value
+
+        return {
+            "_aws": {
+                "Timestamp": int(time() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": INSTRUMENTATION_METRICS_NAMESPACE,
+                        "Dimensions": [["Handler"]],
+                        "Metrics": metric_definitions,
+                    }
+                ],
+            },
+            "Handler": handler_name,
+            **metric_values,
+            "dependencies": dependencies,
+        }
+
+
+class LocalMetricsSink:
+    """
+    Keep the records in memory rather than printing them, i.e. for tests
+    """
+
+    def __init__(self):
+        self.records: List[Dict] = []
+
+    def __call__(self, record: Dict):
+        self.records.append(record)
+
+
+def _print_record(record: Dict):
+    # The lambda runtime sends stdout to CloudWatch logs, which extracts the metrics
+    print(json.dumps(record, separators=(",", ":")), flush=True)
+
+
+# Globals
+_INVOCATION_METRICS: Optional[InvocationMetrics] = None
+_METRICS_SINK: MetricsSink = _print_record
+
+
+def set_metrics_sink(metrics_sink: Optional[MetricsSink] = None):
+    """
+    Send the records to this sink, or back to stdout if no sink is provided
+    :param metrics_sink:
+    :return:
+    """
+    global _METRICS_SINK
+
+    _METRICS_SINK = metrics_sink if metrics_sink is not None else _print_record
+
+
+def record_dependency_call(
+        dependency: str,
+        latency_seconds: float,
+        bytes_received: int = 0,
+        error_class: Optional[str] = None,
+):
+    """
+    Record a call to a dependency against the current invocation,
+    does nothing outside an instrumented handler
+    :param dependency:
+    :param latency_seconds:
+    :param bytes_received:
+    :param error_class: i.e. 'ReadTimeout' or 'Http503'
+    :return:
+    """
+    if _INVOCATION_METRICS is None:
+        return
+
+    _INVOCATION_METRICS.record_call(
+        dependency=dependency,
+        latency_seconds=latency_seconds,
+        bytes_received=bytes_received,
+        error_class=error_class,
+    )
+
+
+def record_metric(
+        metric_name: str,
+        value: float,
+        unit: str = "Count",
+):
+    """
+    Record a metric of the current invocation, a metric recorded twice keeps its last value.
+    Does nothing outside an instrumented handler
+    :param metric_name:
+    :param value:
+    :param unit: A CloudWatch unit, i.e. 'Count' or 'Milliseconds'
+    :return:
+    """
+    if _INVOCATION_METRICS is None:
+        return
+
+    _INVOCATION_METRICS.record_metric(metric_name, value, unit)
+
+
+@contextmanager
+def dependency_call(dependency: str) -> Iterator[DependencyCall]:
+    """
+    Time the block as a single call to the dependency, recording the class of any error raised.
+    Set bytesReceived on the yielded call to count the size of the response
+    :param dependency:
+    :return:
+    """
+    call: DependencyCall = {
+        "bytesReceived": 0,
+    }
+    start_time = perf_counter()
+    try:
+        yield call
+    except BaseException as e:
+        record_dependency_call(dependency, perf_counter() - start_time, call["bytesReceived"], error_class=type(e).__name__)
+        raise
+    record_dependency_call(dependency, perf_counter() - start_time, call["bytesReceived"])
+
+
+def record_http_response(
+        method: str,
+        url: str,
+        response: 'Response',
+        latency_seconds: float,
+        dependency: str,
+):
+    """
+    HttpClient on_response callback, 4xx and 5xx responses are errors (counted by status code)
+    (the body of a streamed response has not been read yet, so we go by the Content-Length header)
+    :param method:
+    :param url:
+    :param response:
+    :param latency_seconds:
+    :param dependency:
+    :return:
+    """
+    record_dependency_call(
+        dependency=dependency,
+        latency_seconds=latency_seconds,
+        bytes_received=int(response.headers.get("Content-Length", 0)),
+        error_class=f"Http{response.status_code}" if response.status_code >= 400 else None,
+    )
+
+
+def record_http_error(
+        method: str,
+        url: str,
+        error: Exception,
+        latency_seconds: float,
+        dependency: str,
+):
+    """
+    HttpClient on_error callback, i.e. for connection errors and timeouts
+    :param method:
+    :param url:
+    :param error:
+    :param latency_seconds:
+    :param dependency:
+    :return:
+    """
+    record_dependency_call(
+        dependency=dependency,
+        latency_seconds=latency_seconds,
+        error_class=type(error).__name__,
+    )
+
+
+def instrument_handler(handler: Callable) -> Callable:
+    """
+    Decorate a lambda handler to record its outbound calls, and emit them as one EMF record per invocation.
+    :param handler:
+    :return:
+    """
+    handler_name = handler.__module__
+
+    @wraps(handler)
+    def _instrumented_handler(event, context):
+        global _INVOCATION_METRICS
+
+        invocation_metrics = _INVOCATION_METRICS = InvocationMetrics()
+        start_time = perf_counter()
+        try:
+            return handler(event, context)
+        finally:
+            _INVOCATION_METRICS = None
+            try:
+                _METRICS_SINK(invocation_metrics.to_emf_record(
+                    handler_name=handler_name,
+                    duration_ms=(perf_counter() - start_time) * 1000,
+                ))
+            except Exception:
+                # Never fail an invocation over its metrics
+                logger.exception("Could not emit the outbound call metrics")
+
+    return _instrumented_handler
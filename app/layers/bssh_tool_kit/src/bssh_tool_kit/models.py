@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+"""
+Layer models
+"""
+
+# Standard library imports
+from typing import Literal, Optional, TypedDict
+
+
+class BasespaceRunInfo(TypedDict):
+    instrumentRunId: str
+    experimentRunName: str
+    basespaceRunId: int
+    status: str
+
+
+WorkflowRunIndexKeyType = Literal[
+    'basespaceRunId',
+    'analysisId',
+    'samplesheetChecksum',
+]
+
+
+class WorkflowRunIndexEntry(TypedDict):
+    portalRunId: str
+    orcabusId: Optional[str]
+
+
+class RunInfoSummary(TypedDict):
+    instrumentRunId: str
+    flowcellId: Optional[str]
+    instrumentId: Optional[str]
+    runDate: Optional[str]
+
+
+class AnalysisContext(TypedDict):
+    version: int
+    projectId: str
+    analysisId: str
+    inputUri: str
+    sampleSheetUri: str
+    instrumentRunId: str
+    experimentRunName: str
+    basespaceRunId: int
+    # Only set once the samplesheet has been downloaded
+    samplesheetChecksum: Optional[str]
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+"""
+In-memory parsers
+
+Parse RunInfo.xml files and v2 samplesheets from bytes, a string or a file-like buffer,
+so that callers do not need to write a file to disk just to read it back in.
+
+For the library ids we only need the Sample_ID column of the BCLConvert_Data section,
+so we scan for that section alone rather than reading (and validating) the whole samplesheet.
+Lines are handled the same way as the v2 samplesheet maker reader.
+"""
+
+# Standard library imports
+from io import BufferedIOBase, RawIOBase, StringIO, TextIOBase
+from typing import BinaryIO, Dict, List, Optional, TextIO, Union
+
+# V2 Samplesheet imports
+from v2_samplesheet_maker.globals import HEADER_REGEX_MATCH
+from v2_samplesheet_maker.utils import pascal_case_to_snake_case
+
+# Type hints
+ParserInput = Union[bytes, str, TextIO, BinaryIO]
+
+# Globals
+BCLCONVERT_DATA_SECTION_NAME = "bclconvert_data"
+SAMPLE_ID_COLUMN_NAME = "sample_id"
+
+
+def get_text_stream(data: ParserInput) -> TextIOBase:
+    """
+    Get a text stream the v2 samplesheet maker readers will accept, from bytes, a string or a buffer
+    :param data:
+    :return:
+    """
+    # Already a text stream
+    if isinstance(data, TextIOBase):
+        return data
+
+    # Binary stream, read it in
+    if isinstance(data, (BufferedIOBase, RawIOBase)):
+        data = data.read()
+
+    if isinstance(data, bytes):
+        # Drop any byte order mark, as written by some spreadsheet editors
+        data = data.decode("utf-8-sig")
+
+    if isinstance(data, str):
+        return StringIO(data)
+
+    raise ValueError(
+        f"Expected one of bytes, str or a file-like buffer but got {type(data)}"
+    )
+
+
+def read_run_info_xml(data: ParserInput) -> Dict:
+    """
+    Read a RunInfo.xml file from memory
+    :param data:
+    :return:
+    """
+    # Imported on first use, the reader pulls in xmltodict
+    from v2_samplesheet_maker.functions.run_info_reader import run_info_xml_reader
+
+    return run_info_xml_reader(get_text_stream(data))
+
+
+def read_v2_samplesheet(data: ParserInput) -> Dict:
+    """
+    Read a v2 samplesheet from memory.
+
+    The v2 samplesheet maker reader only reads from a path, so it still uses a temporary file internally.
+    :param data:
+    :return:
+    """
+    # Imported on first use, the reader pulls in pandas and pydantic
+    from v2_samplesheet_maker.functions.v2_samplesheet_reader import v2_samplesheet_reader
+
+    return v2_samplesheet_reader(get_text_stream(data))
+
+
+def read_bclconvert_data_sample_ids(data: ParserInput) -> List[str]:
+    """
+    Read the sample ids from the BCLConvert_Data section of a v2 samplesheet in a single pass.
+
+    Sample ids are returned in the order they first appear, without duplicates
+    (a library on more than one lane is only returned once).
+    :param data:
+    :return:
+    """
+    in_bclconvert_data_section = False
+    sample_id_column_index: Optional[int] = None
+    # Dict keys keep their insertion order
+    sample_ids: Dict[str, None] = {}
+
+    for line in get_text_stream(data):
+        # Strip ending of line
+        line = line.strip()
+
+        # Skip empty lines, and lines that are all commas
+        if line.replace(",", "") == "":
+            continue
+
+        # Check if header
+        header_match = HEADER_REGEX_MATCH.match(line)
+        if header_match:
+            # Only one BCLConvert_Data section, so we're done once we reach the next section
+            if in_bclconvert_data_section:
+                break
+            in_bclconvert_data_section = (
+                pascal_case_to_snake_case(header_match.group(1)) == BCLCONVERT_DATA_SECTION_NAME
+            )
+            continue
+
+        if not in_bclconvert_data_section:
+            continue
+
+        # First line of the section is the column header
+        if sample_id_column_index is None:
+            column_names = list(map(
+                lambda column_name_iter_: pascal_case_to_snake_case(column_name_iter_),
+                line.split(",")
+            ))
+            if SAMPLE_ID_COLUMN_NAME not in column_names:
+                raise ValueError("Could not find the Sample_ID column in the BCLConvert_Data section")
+            sample_id_column_index = column_names.index(SAMPLE_ID_COLUMN_NAME)
+            continue
+
+        sample_ids[line.split(",")[sample_id_column_index]] = None
+
+    return list(sample_ids)
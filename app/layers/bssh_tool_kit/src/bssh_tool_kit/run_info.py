@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+"""
+Streaming RunInfo.xml reader
+
+We only ever need a handful of fields from the RunInfo.xml file
+
+* Run Id (the instrument run id)
+* Flowcell
+* Instrument
+* Date
+
+These are all at the top of the file, before the reads and the flowcell layout,
+so we parse the file incrementally and stop as soon as we have them,
+rather than parsing (and downloading) the whole file.
+
+The same fields from the v2 samplesheet maker run_info_xml_reader output are
+
+* ["RunInfo"]["Run"]["@Id"]
+* ["RunInfo"]["Run"]["Flowcell"]
+* ["RunInfo"]["Run"]["Instrument"]
+* ["RunInfo"]["Run"]["Date"]
+"""
+
+# Standard library imports
+import typing
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from xml.etree.ElementTree import XMLPullParser
+
+# Local imports
+from .globals import RUN_INFO_XML_HEAD_BYTES
+from .icav2_files import iter_icav2_file_bytes
+from .instrumentation import dependency_call
+from .models import RunInfoSummary
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from libica.openapi.v3 import ProjectData
+
+# Run child element tag -> summary key
+RUN_INFO_CHILD_ELEMENT_KEYS: Dict[str, str] = {
+    "Flowcell": "flowcellId",
+    "Instrument": "instrumentId",
+    "Date": "runDate",
+}
+
+
+def _parse_run_info_summary(
+        run_info_xml_chunks: Iterable[bytes],
+) -> Tuple[Optional[RunInfoSummary], bool]:
+    """
+    Parse the summary fields from the chunks of a RunInfo.xml file.
+
+    Returns the summary (or None if the Run element was not found),
+    and whether the summary is complete, i.e. every field was found, or the Run element was closed
+    before some fields were found (so they are not in the file).
+    :param run_info_xml_chunks:
+    :return:
+    """
+    parser = XMLPullParser(events=("start", "end"))
+    element_stack: List[str] = []
+    run_info_summary: Optional[RunInfoSummary] = None
+
+    for chunk in run_info_xml_chunks:
+        parser.feed(chunk)
+
+        for event, element in parser.read_events():
+            if event == "start":
+                element_stack.append(element.tag)
+
+                # RunInfo > Run
+                if element_stack == ["RunInfo", "Run"]:
+                    run_info_summary = {
+                        "instrumentRunId": element.get("Id"),
+                        "flowcellId": None,
+                        "instrumentId": None,
+                        "runDate": None,
+                    }
+                continue
+
+            element_stack.pop()
+
+            # End of the Run element, there is nothing else to find
+            if element_stack == ["RunInfo"] and element.tag == "Run":
+                return run_info_summary, True
+
+            # RunInfo > Run > Flowcell / Instrument / Date
+            if (
+                    element_stack == ["RunInfo", "Run"] and
+                    element.tag in RUN_INFO_CHILD_ELEMENT_KEYS
+            ):
+                # Strip the text as xmltodict (and so run_info_xml_reader) does, whitespace alone is no value
+                run_info_summary[RUN_INFO_CHILD_ELEMENT_KEYS[element.tag]] = (element.text or "").strip() or None
+
+            # Stop as soon as we have every field
+            if run_info_summary is not None and all(
+                    run_info_summary[key] is not None
+                    for key in RUN_INFO_CHILD_ELEMENT_KEYS.values()
+            ):
+                return run_info_summary, True
+
+    return run_info_summary, False
+
+
+def read_run_info_summary(
+        run_info_xml: Union[bytes, Iterable[bytes]],
+) -> RunInfoSummary:
+    """
+    Read the run id, flowcell, instrument and date from a RunInfo.xml file,
+    stopping as soon as they have been found
+    :param run_info_xml: The file contents, or an iterable of chunks of the file contents
+    :return:
+    """
+    if isinstance(run_info_xml, bytes):
+        run_info_xml = [run_info_xml]
+
+    run_info_summary, _ = _parse_run_info_summary(run_info_xml)
+
+    if run_info_summary is None:
+        raise ValueError("Could not find the Run element in the RunInfo.xml file")
+
+    return run_info_summary
+
+
+def get_run_info_summary_from_project_data_obj(
+        project_data_obj: 'ProjectData',
+) -> RunInfoSummary:
+    """
+    Read the run id, flowcell, instrument and date from a RunInfo.xml file on ICAv2.
+
+    Only the first few KB of the file are requested, the whole file is only streamed
+    if the fields are not all within the first few KB.
+    :param project_data_obj:
+    :return:
+    """
+    run_info_summary, is_complete = _parse_run_info_summary(
+        iter_icav2_file_bytes(
+            project_id=project_data_obj.project_id,
+            data_id=project_data_obj.data.id,
+            max_bytes=RUN_INFO_XML_HEAD_BYTES,
+        )
+    )
+
+    if is_complete:
+        return run_info_summary
+
+    # Fall back to streaming the whole file
+    return read_run_info_summary(
+        iter_icav2_file_bytes(
+            project_id=project_data_obj.project_id,
+            data_id=project_data_obj.data.id,
+        )
+    )
+
+
+def get_run_info_summary_from_uri(
+        run_info_xml_uri: str,
+) -> RunInfoSummary:
+    """
+    Read the run id, flowcell, instrument and date from a RunInfo.xml file on ICAv2
+    :param run_info_xml_uri:
+    :return:
+    """
+    # Imported on first use, wrapica is slow to import
+    from wrapica.project_data import convert_uri_to_project_data_obj
+
+    with dependency_call("icav2"):
+        run_info_xml_project_data_obj = convert_uri_to_project_data_obj(run_info_xml_uri)
+
+    return get_run_info_summary_from_project_data_obj(run_info_xml_project_data_obj)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+"""
+Samplesheet artifact
+
+A samplesheet on ICAv2, downloaded at most once per lambda container.
+
+The checksum, the parsed BCLConvert_Data rows, the library ids and a local file path
+(i.e. for uploading the samplesheet to the SRM) are all derived lazily from the same bytes.
+The samplesheet is parsed in memory, it is only written to disk if the path is requested.
+
+If only the checksum is required, it is streamed from ICAv2 without holding on to the samplesheet.
+"""
+
+# Standard library imports
+import hashlib
+import typing
+from functools import cached_property, lru_cache
+from pathlib import Path
+from tempfile import gettempdir
+from typing import Dict, List
+
+# Local imports
+from .globals import SAMPLESHEET_BYTE_ORDER_MARK, SAMPLESHEET_CACHE_SIZE
+from .icav2_files import get_icav2_file_bytes, get_icav2_file_md5sum
+from .instrumentation import dependency_call
+from .parsers import read_bclconvert_data_sample_ids, read_v2_samplesheet
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from libica.openapi.v3 import ProjectData
+
+
+class Samplesheet:
+    """
+    A samplesheet on ICAv2
+    """
+
+    def __init__(self, samplesheet_uri: str):
+        self.uri = samplesheet_uri
+
+    @cached_property
+    def project_data_obj(self) -> 'ProjectData':
+        # Imported on first use, wrapica is slow to import
+        from wrapica.project_data import convert_uri_to_project_data_obj
+
+        with dependency_call("icav2"):
+            return convert_uri_to_project_data_obj(self.uri)
+
+    @cached_property
+    def content(self) -> bytes:
+        """
+        The raw samplesheet bytes, downloaded on first access
+        :return:
+        """
+        return get_icav2_file_bytes(
+            project_id=self.project_data_obj.project_id,
+            data_id=self.project_data_obj.data.id,
+        )
+
+    @property
+    def checksum(self) -> str:
+        """
+        The md5sum of the samplesheet bytes, without a leading byte order mark,
+        so that it matches the md5sum of the samplesheet text held by the SRM
+        :return:
+        """
+        # Don't download the samplesheet again if we already have it
+        if "content" in self.__dict__:
+            return hashlib.md5(self.content.removeprefix(SAMPLESHEET_BYTE_ORDER_MARK)).hexdigest()
+        return get_icav2_file_md5sum(self.project_data_obj, skip_prefix=SAMPLESHEET_BYTE_ORDER_MARK)
+
+    @cached_property
+    def path(self) -> Path:
+        """
+        A local copy of the samplesheet, written on first access
+        :return:
+        """
+        samplesheet_path = Path(gettempdir()) / "samplesheets" / self.project_data_obj.data.id / "SampleSheet.csv"
+        samplesheet_path.parent.mkdir(parents=True, exist_ok=True)
+        samplesheet_path.write_bytes(self.content)
+        return samplesheet_path
+
+    @cached_property
+    def bclconvert_data(self) -> List[Dict]:
+        """
+        The rows of the BCLConvert_Data section
+        :return:
+        """
+        return read_v2_samplesheet(self.content)['bclconvert_data']
+
+    @cached_property
+    def library_ids(self) -> List[str]:
+        """
+        The library ids (sample ids) in the BCLConvert_Data section, in order and without duplicates.
+        Only the BCLConvert_Data section is read.
+        :return:
+        """
+        return read_bclconvert_data_sample_ids(self.content)
+
+
+@lru_cache(maxsize=SAMPLESHEET_CACHE_SIZE)
+def get_samplesheet_from_uri(samplesheet_uri: str) -> Samplesheet:
+    """
+    Get the samplesheet artifact for a URI, shared for the life of the lambda container.
+
+    The inputs of an ICAv2 analysis are never modified, so we do not re-check the samplesheet once downloaded.
+    :param samplesheet_uri:
+    :return:
+    """
+    return Samplesheet(samplesheet_uri)
+
+
+def get_samplesheet_from_project_data_obj(project_data_obj: 'ProjectData') -> Samplesheet:
+    """
+    Get the samplesheet artifact for a project data object we have already looked up,
+    so that the artifact does not need to look it up again from the URI.
+    :param project_data_obj:
+    :return:
+    """
+    # Imported on first use, wrapica is slow to import
+    from wrapica.project_data import convert_project_data_obj_to_uri
+
+    samplesheet = get_samplesheet_from_uri(convert_project_data_obj_to_uri(project_data_obj))
+
+    # Seed the cached property
+    samplesheet.__dict__.setdefault("project_data_obj", project_data_obj)
+
+    return samplesheet
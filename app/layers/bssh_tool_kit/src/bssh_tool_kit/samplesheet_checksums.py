@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+"""
+Samplesheet checksums
+
+Kept apart from the basespace helpers so that handlers that only compare samplesheet checksums
+do not import the BaseSpace client, the RunInfo.xml reader or the samplesheet parsers on a cold start.
+"""
+
+# Standard library imports
+import hashlib
+
+# Layer imports
+from orcabus_api_tools.sequence import (
+    get_sample_sheet_from_instrument_run_id
+)
+
+# Local imports
+from .globals import SAMPLESHEET_BYTE_ORDER_MARK
+from .instrumentation import dependency_call
+
+
+def get_samplesheet_md5sum_from_samplesheet_uri(
+        samplesheet_uri: str,
+) -> str:
+    """
+    Given a samplesheet URI, return the MD5 sum of the samplesheet bytes, without a leading byte order mark.
+    :param samplesheet_uri:
+    :return:
+    """
+    # Only imported when we need to download the samplesheet
+    from .samplesheet import get_samplesheet_from_uri
+
+    return get_samplesheet_from_uri(samplesheet_uri).checksum
+
+
+def get_samplesheet_md5sum_from_instrument_run_id(
+    instrument_run_id: str
+) -> str:
+    """
+    Given an instrument run id, return the MD5 sum of the samplesheet the sequence run manager holds for it,
+    encoded as utf-8 without a leading byte order mark, the same form we hash the ICAv2 samplesheet in
+    :param instrument_run_id:
+    :return:
+    """
+    with dependency_call("srm"):
+        samplesheet_contents: str = get_sample_sheet_from_instrument_run_id(
+            instrument_run_id=instrument_run_id
+        )['sampleSheetContentOriginal']
+
+    return hashlib.md5(
+        samplesheet_contents.encode('utf-8').removeprefix(SAMPLESHEET_BYTE_ORDER_MARK)
+    ).hexdigest()
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+
+"""
+Workflow run cache
+
+A local cache of the workflow runs of a workflow, so that we don't list the entire (and ever-growing)
+history of workflow runs from the workflow manager on every call.
+
+Each entry holds the workflow run object as listed (including its current state),
+and the tags and engine parameters of its latest payload once we have fetched it.
+
+The first refresh (and every WORKFLOW_RUN_CACHE_FULL_REFRESH_INTERVAL_SECONDS after it) lists every workflow run.
+In between, a refresh only lists the active (DRAFT -> RUNNING) workflow runs,
+and looks up each cached active workflow run that is no longer listed as active (i.e. it has finished) by itself,
+so the cost of a refresh tracks the recent activity of the workflow rather than its total history.
+A workflow run created and finished between two refreshes is only picked up by the next full refresh,
+so a search that also covers finished workflow runs refreshes the cache in full before it answers that nothing matches.
+
+The state we last saw a workflow run in (its id, status, timestamp and payload id, where listed) is its watermark,
+a workflow run listed in any other state has been modified since, and its cached payload is dropped.
+The workflow manager can replace the payload of a DRAFT workflow run without moving it to a new state,
+so the payloads of DRAFT workflow runs are never cached, and are always fetched.
+
+Finished (SUCCEEDED, FAILED or ABORTED) workflow runs whose last state is older than the terminal window
+are evicted from the cache, and so are no longer searched.
+"""
+
+# Standard library imports
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from os import environ
+from pathlib import Path
+from time import time
+from typing import Callable, Dict, Iterable, List, Optional, TypedDict
+
+# Layer imports
+from orcabus_api_tools.workflow import (
+    get_workflow_run_from_portal_run_id,
+    list_workflow_runs,
+)
+
+# Local imports
+from .globals import (
+    DEFAULT_WORKFLOW_RUN_CACHE_TERMINAL_WINDOW_DAYS,
+    WORKFLOW_RUN_ACTIVE_STATUSES,
+    WORKFLOW_RUN_CACHE_FULL_REFRESH_INTERVAL_SECONDS,
+    WORKFLOW_RUN_CACHE_MAX_WORKERS,
+    WORKFLOW_RUN_CACHE_PATH_ENV_VAR,
+    WORKFLOW_RUN_CACHE_PAYLOAD_DATA_KEYS,
+    WORKFLOW_RUN_CACHE_TERMINAL_WINDOW_DAYS_ENV_VAR,
+    WORKFLOW_RUN_CACHE_UNCACHED_PAYLOAD_STATUSES,
+    WORKFLOW_RUN_CACHE_VERSION,
+    WORKFLOW_RUN_TERMINAL_STATUSES,
+)
+from .index_backends import IndexBackend, InMemoryIndexBackend, JsonFileIndexBackend
+from .instrumentation import dependency_call
+from .workflow_run_listing import list_workflow_runs_by_statuses
+from .workflow_run_matcher import (
+    PayloadPredicate,
+    find_first_workflow_run_by_payload,
+    sort_workflow_runs_by_priority,
+)
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Globals
+_WORKFLOW_RUN_CACHES: Dict[str, 'WorkflowRunCache'] = {}
+
+
+class WorkflowRunCacheEntry(TypedDict, total=False):
+    workflowRun: Dict
+    # Only present once fetched, None if the workflow run has no payload
+    payload: Optional[Dict]
+
+
+def get_workflow_run_status(workflow_run_object: Dict) -> Optional[str]:
+    return workflow_run_object.get("currentState", {}).get("status")
+
+
+def get_workflow_run_state_timestamp(workflow_run_object: Dict) -> str:
+    return workflow_run_object.get("currentState", {}).get("timestamp") or ""
+
+
+def get_workflow_run_state_key(workflow_run_object: Dict) -> List[Optional[str]]:
+    """
+    Get the parts of the current state of a workflow run that change whenever its latest payload does
+    :param workflow_run_object:
+    :return:
+    """
+    current_state = workflow_run_object.get("currentState", {})
+    return [
+        current_state.get("orcabusId"),
+        current_state.get("status"),
+        current_state.get("timestamp"),
+        current_state.get("payload"),
+    ]
+
+
+def get_cached_payload(payload: Optional[Dict]) -> Optional[Dict]:
+    """
+    Trim a payload down to the parts of its data that we cache
+    :param payload:
+    :return:
+    """
+    if payload is None:
+        return None
+
+    payload_data = payload.get("data", {})
+    return {
+        "data": dict(filter(
+            lambda data_item_iter_: data_item_iter_[0] in WORKFLOW_RUN_CACHE_PAYLOAD_DATA_KEYS,
+            payload_data.items()
+        ))
+    }
+
+
+def _is_evictable(workflow_run_object: Dict, evict_before: datetime) -> bool:
+    if get_workflow_run_status(workflow_run_object) not in WORKFLOW_RUN_TERMINAL_STATUSES:
+        return False
+
+    try:
+        state_timestamp = datetime.fromisoformat(get_workflow_run_state_timestamp(workflow_run_object))
+    except ValueError:
+        # Keep anything we can't date
+        return False
+
+    if state_timestamp.tzinfo is None:
+        state_timestamp = state_timestamp.replace(tzinfo=timezone.utc)
+
+    return state_timestamp < evict_before
+
+
+class WorkflowRunCache:
+    """
+    Cache of the workflow runs of a workflow, keyed by orcabus id
+    """
+
+    def __init__(
+            self,
+            workflow_name: str,
+            backend: IndexBackend,
+            terminal_window: timedelta = timedelta(days=DEFAULT_WORKFLOW_RUN_CACHE_TERMINAL_WINDOW_DAYS),
+            full_refresh_interval_seconds: float = WORKFLOW_RUN_CACHE_FULL_REFRESH_INTERVAL_SECONDS,
+    ):
+        self.workflow_name = workflow_name
+        self.backend = backend
+        self.terminal_window = terminal_window
+        self.full_refresh_interval_seconds = full_refresh_interval_seconds
+        self._runs: Dict[str, WorkflowRunCacheEntry] = {}
+        self._last_full_refresh: Optional[float] = None
+        # Whether the last refresh in this container listed every workflow run
+        self._last_refresh_was_full = False
+        self._loaded = False
+        self._modified = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """
+        Load the cache from the backend, dropping any cache written by a different
+        cache version or for a different workflow
+        :return:
+        """
+        if self._loaded:
+            return
+
+        self._loaded = True
+
+        cache = self.backend.load()
+        if (
+                cache is None or
+                cache.get("version") != WORKFLOW_RUN_CACHE_VERSION or
+                cache.get("workflowName") != self.workflow_name
+        ):
+            return
+
+        self._runs = cache["runs"]
+        self._last_full_refresh = cache["lastFullRefresh"]
+
+    def _save(self):
+        # Only write the cache out if something has changed
+        if not self._modified:
+            return
+
+        self.backend.save({
+            "version": WORKFLOW_RUN_CACHE_VERSION,
+            "workflowName": self.workflow_name,
+            "lastFullRefresh": self._last_full_refresh,
+            "runs": self._runs,
+        })
+        self._modified = False
+
+    def _update_workflow_run(self, workflow_run_object: Dict):
+        """
+        Add or update a listed workflow run, its cached payload is kept if its state has not changed
+        :param workflow_run_object:
+        :return:
+        """
+        run_cache_entry = self._runs.get(workflow_run_object["orcabusId"])
+        if (
+                run_cache_entry is not None and
+                get_workflow_run_state_key(run_cache_entry["workflowRun"]) ==
+                get_workflow_run_state_key(workflow_run_object)
+        ):
+            return
+
+        self._runs[workflow_run_object["orcabusId"]] = {
+            "workflowRun": workflow_run_object,
+        }
+        self._modified = True
+
+    def _get_finished_workflow_runs(self, active_orcabus_ids: Iterable[str]) -> List[Dict]:
+        """
+        Look up the cached active workflow runs that are no longer listed as active
+        :param active_orcabus_ids: The orcabus ids of the workflow runs listed as active
+        :return:
+        """
+        active_orcabus_ids = set(active_orcabus_ids)
+        finished_orcabus_ids = list(filter(
+            lambda orcabus_id_iter_: (
+                orcabus_id_iter_ not in active_orcabus_ids and
+                get_workflow_run_status(self._runs[orcabus_id_iter_]["workflowRun"]) in WORKFLOW_RUN_ACTIVE_STATUSES
+            ),
+            self._runs
+        ))
+
+        if len(finished_orcabus_ids) == 0:
+            return []
+
+        def _get_workflow_run(orcabus_id: str) -> Optional[Dict]:
+            portal_run_id = self._runs[orcabus_id]["workflowRun"]["portalRunId"]
+            try:
+                with dependency_call("workflowManager"):
+                    return get_workflow_run_from_portal_run_id(portal_run_id)
+            except Exception as e:
+                logger.warning(f"Could not get workflow run '{portal_run_id}', dropping it from the cache: {e}")
+                return None
+
+        with ThreadPoolExecutor(
+                max_workers=min(WORKFLOW_RUN_CACHE_MAX_WORKERS, len(finished_orcabus_ids))
+        ) as executor:
+            finished_workflow_runs = list(executor.map(_get_workflow_run, finished_orcabus_ids))
+
+        # Drop the workflow runs that have gone from the workflow manager
+        for orcabus_id, workflow_run_object in zip(finished_orcabus_ids, finished_workflow_runs):
+            if workflow_run_object is None:
+                del self._runs[orcabus_id]
+                self._modified = True
+
+        return list(filter(
+            lambda workflow_run_iter_: workflow_run_iter_ is not None,
+            finished_workflow_runs
+        ))
+
+    def _evict_finished_workflow_runs(self):
+        evict_before = datetime.now(timezone.utc) - self.terminal_window
+        evictable_orcabus_ids = list(filter(
+            lambda orcabus_id_iter_: _is_evictable(self._runs[orcabus_id_iter_]["workflowRun"], evict_before),
+            self._runs
+        ))
+        for orcabus_id in evictable_orcabus_ids:
+            del self._runs[orcabus_id]
+            self._modified = True
+
+    def refresh(self, full: bool = False):
+        """
+        Bring the cache up to date with the workflow manager
+        :param full: List every workflow run, even if the last full refresh is within the interval
+        :return:
+        """
+        self._load()
+
+        self._last_refresh_was_full = (
+                full or
+                self._last_full_refresh is None or
+                time() - self._last_full_refresh >= self.full_refresh_interval_seconds
+        )
+
+        if self._last_refresh_was_full:
+            # List every workflow run, and drop any we have cached that no longer exist
+            with dependency_call("workflowManager"):
+                workflow_run_objects = list_workflow_runs(workflow_name=self.workflow_name)
+            listed_orcabus_ids = set(map(
+                lambda workflow_run_iter_: workflow_run_iter_["orcabusId"],
+                workflow_run_objects
+            ))
+            if not set(self._runs).issubset(listed_orcabus_ids):
+                self._runs = dict(filter(
+                    lambda run_cache_item_iter_: run_cache_item_iter_[0] in listed_orcabus_ids,
+                    self._runs.items()
+                ))
+            self._last_full_refresh = time()
+            self._modified = True
+        else:
+            # Only list the active workflow runs, and look up those that have since finished
+            workflow_run_objects = list_workflow_runs_by_statuses(
+                workflow_name=self.workflow_name,
+                statuses=WORKFLOW_RUN_ACTIVE_STATUSES,
+            )
+            workflow_run_objects.extend(self._get_finished_workflow_runs(map(
+                lambda workflow_run_iter_: workflow_run_iter_["orcabusId"],
+                workflow_run_objects
+            )))
+
+        for workflow_run_object in workflow_run_objects:
+            self._update_workflow_run(workflow_run_object)
+
+        self._evict_finished_workflow_runs()
+        self._save()
+
+    def list_workflow_runs(self, statuses: Optional[List[str]] = None) -> List[Dict]:
+        """
+        List the cached workflow runs, without refreshing the cache.
+        The workflow run objects are shared with the cache, so must not be modified
+        :param statuses: Only the workflow runs currently in one of these statuses
+        :return:
+        """
+        self._load()
+        return list(filter(
+            lambda workflow_run_iter_: statuses is None or get_workflow_run_status(workflow_run_iter_) in statuses,
+            map(
+                lambda run_cache_entry_iter_: run_cache_entry_iter_["workflowRun"],
+                self._runs.values()
+            )
+        ))
+
+    def _has_cached_payload(self, workflow_run_object: Dict) -> bool:
+        if get_workflow_run_status(workflow_run_object) in WORKFLOW_RUN_CACHE_UNCACHED_PAYLOAD_STATUSES:
+            return False
+        return "payload" in self._runs.get(workflow_run_object["orcabusId"], {})
+
+    def _record_payload(self, workflow_run_object: Dict, payload: Optional[Dict]):
+        # Called from the matcher's thread pool
+        if get_workflow_run_status(workflow_run_object) in WORKFLOW_RUN_CACHE_UNCACHED_PAYLOAD_STATUSES:
+            return
+        with self._lock:
+            run_cache_entry = self._runs.get(workflow_run_object["orcabusId"])
+            if run_cache_entry is None:
+                return
+            run_cache_entry["payload"] = get_cached_payload(payload)
+            self._modified = True
+
+    def _find_first_uncached_workflow_run_by_payload(
+            self,
+            workflow_run_objects: List[Dict],
+            payload_predicate: PayloadPredicate,
+    ) -> Optional[Dict]:
+        # Fetch (and cache) the payloads of the workflow runs concurrently, in priority order
+        if len(workflow_run_objects) == 0:
+            return None
+        return find_first_workflow_run_by_payload(
+            workflow_run_objects,
+            lambda payload_iter_: payload_predicate(get_cached_payload(payload_iter_)),
+            on_payload=self._record_payload,
+        )
+
+    def find_first_workflow_run_by_payload(
+            self,
+            workflow_run_objects: Iterable[Dict],
+            payload_predicate: PayloadPredicate,
+    ) -> Optional[Dict]:
+        """
+        Get the highest priority workflow run whose latest payload matches the predicate.
+
+        The predicate only sees the tags and engine parameters of the payload data.
+        Workflow runs are checked in priority order, using the cached payload of a workflow run where we have one,
+        the payloads of each stretch of consecutive uncached workflow runs are fetched (and cached) together.
+        :param workflow_run_objects: Workflow runs from list_workflow_runs
+        :param payload_predicate:
+        :return:
+        """
+        workflow_run_objects = sort_workflow_runs_by_priority(workflow_run_objects)
+
+        try:
+            uncached_workflow_run_objects = []
+            for workflow_run_object in workflow_run_objects:
+                if not self._has_cached_payload(workflow_run_object):
+                    uncached_workflow_run_objects.append(workflow_run_object)
+                    continue
+
+                # Check the higher priority uncached workflow runs before this one
+                matched_workflow_run_object = self._find_first_uncached_workflow_run_by_payload(
+                    uncached_workflow_run_objects, payload_predicate
+                )
+                if matched_workflow_run_object is not None:
+                    return dict(matched_workflow_run_object)
+                uncached_workflow_run_objects = []
+
+                cached_payload = self._runs[workflow_run_object["orcabusId"]]["payload"]
+                if cached_payload is not None and payload_predicate(cached_payload):
+                    return dict(workflow_run_object)
+
+            matched_workflow_run_object = self._find_first_uncached_workflow_run_by_payload(
+                uncached_workflow_run_objects, payload_predicate
+            )
+            if matched_workflow_run_object is None:
+                return None
+            return dict(matched_workflow_run_object)
+        finally:
+            self._save()
+
+    def search_workflow_runs_by_payload(
+            self,
+            payload_predicate: PayloadPredicate,
+            workflow_run_filter: Optional[Callable[[Dict], bool]] = None,
+    ) -> Optional[Dict]:
+        """
+        Get the highest priority cached workflow run that passes the filter and whose latest payload matches the predicate.
+
+        For searches that also cover finished workflow runs, an incremental refresh does not list a workflow run
+        that was created and finished since the last full refresh,
+        so if nothing matches after an incremental refresh, the cache is refreshed in full and searched again.
+        Call refresh first.
+        :param payload_predicate:
+        :param workflow_run_filter: Only check the workflow runs this returns True for
+        :return:
+        """
+        def _search() -> Optional[Dict]:
+            return self.find_first_workflow_run_by_payload(
+                filter(
+                    lambda workflow_run_iter_: workflow_run_filter is None or workflow_run_filter(workflow_run_iter_),
+                    self.list_workflow_runs()
+                ),
+                payload_predicate,
+            )
+
+        workflow_run_object = _search()
+        if workflow_run_object is not None or self._last_refresh_was_full:
+            return workflow_run_object
+
+        self.refresh(full=True)
+        return _search()
+
+
+def get_workflow_run_cache(workflow_name: str) -> WorkflowRunCache:
+    """
+    Get the workflow run cache of a workflow for this lambda container.
+    The cache is persisted to a json file if the path is set, otherwise it is kept in memory.
+    :param workflow_name:
+    :return:
+    """
+    if workflow_name not in _WORKFLOW_RUN_CACHES:
+        if environ.get(WORKFLOW_RUN_CACHE_PATH_ENV_VAR):
+            # One file per workflow
+            cache_path = Path(environ[WORKFLOW_RUN_CACHE_PATH_ENV_VAR])
+            backend = JsonFileIndexBackend(cache_path.with_name(f"{cache_path.stem}_{workflow_name}{cache_path.suffix}"))
+        else:
+            backend = InMemoryIndexBackend()
+
+        _WORKFLOW_RUN_CACHES[workflow_name] = WorkflowRunCache(
+            workflow_name=workflow_name,
+            backend=backend,
+            terminal_window=timedelta(days=float(environ.get(
+                WORKFLOW_RUN_CACHE_TERMINAL_WINDOW_DAYS_ENV_VAR,
+                DEFAULT_WORKFLOW_RUN_CACHE_TERMINAL_WINDOW_DAYS
+            ))),
+        )
+
+    return _WORKFLOW_RUN_CACHES[workflow_name]
+
+
+def set_workflow_run_cache(workflow_name: str, workflow_run_cache: Optional[WorkflowRunCache]):
+    """
+    Override the workflow run cache of a workflow for this lambda container, i.e. to use a shorter window in tests.
+    Set to None to reset to the default.
+    :param workflow_name:
+    :param workflow_run_cache:
+    :return:
+    """
+    if workflow_run_cache is None:
+        _WORKFLOW_RUN_CACHES.pop(workflow_name, None)
+        return
+    _WORKFLOW_RUN_CACHES[workflow_name] = workflow_run_cache
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+
+"""
+Workflow run index
+
+A secondary index from the payload attributes we link events on, to the workflow run they belong to.
+
+* basespaceRunId (payload.data.tags.basespaceRunId)
+* analysisId (payload.data.engineParameters.analysisId)
+* samplesheetChecksum (payload.data.tags.samplesheetChecksum, md5 checksums only)
+
+The index is written to by every lambda that creates the detail for a WorkflowRunUpdate event,
+so that finding the workflow run linked to an event costs a constant number of calls,
+rather than a scan over the payload of every bclconvert workflow run.
+
+The index is only ever a hint, a hit is always checked against the workflow manager
+and callers should fall back to a scan on a miss.
+"""
+
+# Standard library imports
+import logging
+from os import environ
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+# Layer imports
+from orcabus_api_tools.workflow import (
+    get_workflow_run_from_portal_run_id,
+    get_latest_payload_from_workflow_run,
+)
+
+# Local imports
+from .globals import (
+    DEFAULT_SAMPLESHEET_CHECKSUM_TYPE,
+    WORKFLOW_RUN_INDEX_PATH_ENV_VAR,
+    WORKFLOW_RUN_INDEX_TABLE_NAME_ENV_VAR,
+)
+from .index_backends import (
+    DynamoDbKeyValueBackend,
+    InMemoryKeyValueBackend,
+    JsonFileKeyValueBackend,
+    KeyValueBackend,
+)
+from .instrumentation import dependency_call
+from .models import WorkflowRunIndexEntry, WorkflowRunIndexKeyType
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Globals
+_WORKFLOW_RUN_INDEX: Optional['WorkflowRunIndex'] = None
+
+
+def get_workflow_run_index_keys_from_payload(
+        payload: Optional[Dict]
+) -> Dict[WorkflowRunIndexKeyType, Union[str, int]]:
+    """
+    Get the index keys present in a workflow run payload
+    :param payload:
+    :return:
+    """
+    if payload is None:
+        return {}
+
+    payload_data = payload.get("data", {})
+    tags = payload_data.get("tags", {})
+    engine_parameters = payload_data.get("engineParameters", {})
+
+    index_keys: Dict[WorkflowRunIndexKeyType, Union[str, int]] = {}
+    if tags.get("basespaceRunId") is not None:
+        index_keys["basespaceRunId"] = tags["basespaceRunId"]
+    if engine_parameters.get("analysisId") is not None:
+        index_keys["analysisId"] = engine_parameters["analysisId"]
+    if (
+            tags.get("samplesheetChecksum") is not None and
+            tags.get("samplesheetChecksumType") == DEFAULT_SAMPLESHEET_CHECKSUM_TYPE
+    ):
+        index_keys["samplesheetChecksum"] = tags["samplesheetChecksum"]
+
+    return index_keys
+
+
+class WorkflowRunIndex:
+    """
+    Index from payload attributes to portal run id
+    """
+
+    def __init__(self, backend: KeyValueBackend):
+        self.backend = backend
+
+    @staticmethod
+    def _get_key(key_type: WorkflowRunIndexKeyType, value: Union[str, int]) -> str:
+        return f"{key_type}#{value}"
+
+    def record_workflow_run(self, workflow_run_object: Dict):
+        """
+        Record the index keys of a workflow run we are about to emit a WorkflowRunUpdate event for.
+
+        Never raises, the index is only an optimisation so a failed write should not fail the handler.
+        :param workflow_run_object:
+        :return:
+        """
+        index_entry: WorkflowRunIndexEntry = {
+            "portalRunId": workflow_run_object["portalRunId"],
+            "orcabusId": workflow_run_object.get("orcabusId"),
+        }
+
+        for key_type, value in get_workflow_run_index_keys_from_payload(
+                workflow_run_object.get("payload")
+        ).items():
+            try:
+                self.backend.put(self._get_key(key_type, value), dict(index_entry))
+            except Exception as e:
+                logger.warning(f"Could not record '{key_type}' in the workflow run index: {e}")
+
+    def lookup(
+            self,
+            key_type: WorkflowRunIndexKeyType,
+            value: Union[str, int]
+    ) -> Optional[WorkflowRunIndexEntry]:
+        """
+        Get the index entry for a key, without checking it against the workflow manager
+        :param key_type:
+        :param value:
+        :return:
+        """
+        try:
+            return self.backend.get(self._get_key(key_type, value))
+        except Exception as e:
+            logger.warning(f"Could not read '{key_type}' from the workflow run index: {e}")
+            return None
+
+    def find_workflow_run(
+            self,
+            key_type: WorkflowRunIndexKeyType,
+            value: Union[str, int],
+            statuses: Optional[List[str]] = None,
+    ) -> Optional[Dict]:
+        """
+        Find the workflow run for a key.
+
+        A hit is only returned if the workflow run still exists,
+        is in one of the statuses (if provided), and its latest payload still has the key.
+        :param key_type:
+        :param value:
+        :param statuses:
+        :return:
+        """
+        index_entry = self.lookup(key_type, value)
+        if index_entry is None:
+            return None
+
+        try:
+            with dependency_call("workflowManager"):
+                workflow_run_object = get_workflow_run_from_portal_run_id(index_entry["portalRunId"])
+        except Exception as e:
+            # The WorkflowRunUpdate event may never have been processed by the workflow manager
+            logger.info(f"Could not get workflow run '{index_entry['portalRunId']}' from the index: {e}")
+            return None
+
+        if workflow_run_object is None:
+            return None
+
+        if (
+                statuses is not None and
+                workflow_run_object.get("currentState", {}).get("status") not in statuses
+        ):
+            return None
+
+        # Check the index entry is not stale
+        with dependency_call("workflowManager"):
+            latest_payload = get_latest_payload_from_workflow_run(workflow_run_object["orcabusId"])
+        if get_workflow_run_index_keys_from_payload(latest_payload).get(key_type) != value:
+            return None
+
+        return workflow_run_object
+
+
+def get_workflow_run_index() -> WorkflowRunIndex:
+    """
+    Get the workflow run index for this lambda container.
+    :return:
+    """
+    global _WORKFLOW_RUN_INDEX
+
+    if _WORKFLOW_RUN_INDEX is None:
+        if environ.get(WORKFLOW_RUN_INDEX_TABLE_NAME_ENV_VAR):
+            backend = DynamoDbKeyValueBackend(environ[WORKFLOW_RUN_INDEX_TABLE_NAME_ENV_VAR])
+        elif environ.get(WORKFLOW_RUN_INDEX_PATH_ENV_VAR):
+            backend = JsonFileKeyValueBackend(Path(environ[WORKFLOW_RUN_INDEX_PATH_ENV_VAR]))
+        else:
+            backend = InMemoryKeyValueBackend()
+
+        _WORKFLOW_RUN_INDEX = WorkflowRunIndex(backend=backend)
+
+    return _WORKFLOW_RUN_INDEX
+
+
+def set_workflow_run_index(workflow_run_index: Optional[WorkflowRunIndex]):
+    """
+    Override the workflow run index for this lambda container, i.e. to use an in-memory backend in tests.
+    Set to None to reset to the default.
+    :param workflow_run_index:
+    :return:
+    """
+    global _WORKFLOW_RUN_INDEX
+    _WORKFLOW_RUN_INDEX = workflow_run_index
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+"""
+Workflow run listing
+
+List the workflow runs for a workflow in any of a set of statuses.
+
+The workflow manager only filters on a single status per query,
+so we issue one query per status concurrently and stream the workflow runs back
+in the order of the statuses given, dropping any workflow run we have already yielded
+(a workflow run may change status between two queries).
+"""
+
+# Standard library imports
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Set
+
+# Layer imports
+from orcabus_api_tools.workflow import list_workflow_runs
+
+# Local imports
+from .instrumentation import dependency_call
+
+
+def _list_workflow_runs_by_status(
+        workflow_name: str,
+        status: str,
+) -> List[Dict]:
+    with dependency_call("workflowManager"):
+        return list_workflow_runs(
+            workflow_name=workflow_name,
+            current_status=status,
+        )
+
+
+def iter_workflow_runs_by_statuses(
+        workflow_name: str,
+        statuses: Iterable[str],
+) -> Iterator[Dict]:
+    """
+    Stream the workflow runs for a workflow in any of the statuses, de-duplicated by orcabus id
+    :param workflow_name:
+    :param statuses:
+    :return:
+    """
+    # Remove duplicate statuses, keeping the order given
+    statuses = list(dict.fromkeys(statuses))
+
+    if len(statuses) == 0:
+        return
+
+    seen_orcabus_ids: Set[str] = set()
+    with ThreadPoolExecutor(max_workers=len(statuses)) as executor:
+        futures: List[Future] = [
+            executor.submit(
+                _list_workflow_runs_by_status,
+                workflow_name=workflow_name,
+                status=status_iter_,
+            )
+            for status_iter_ in statuses
+        ]
+
+        for future in futures:
+            for workflow_run_object in future.result():
+                if workflow_run_object['orcabusId'] in seen_orcabus_ids:
+                    continue
+                seen_orcabus_ids.add(workflow_run_object['orcabusId'])
+                yield workflow_run_object
+
+
+def list_workflow_runs_by_statuses(
+        workflow_name: str,
+        statuses: Iterable[str],
+) -> List[Dict]:
+    """
+    List the workflow runs for a workflow in any of the statuses, de-duplicated by orcabus id
+    :param workflow_name:
+    :param statuses:
+    :return:
+    """
+    return list(iter_workflow_runs_by_statuses(workflow_name, statuses))
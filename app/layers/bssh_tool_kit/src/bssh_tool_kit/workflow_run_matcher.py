@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+"""
+Workflow run matcher
+
+Find the workflow runs whose latest payload matches a predicate.
+
+Payloads are fetched on a bounded thread pool, each payload is fetched exactly once,
+and workflow runs are always checked in priority order (by status, DRAFT first, then in the order given),
+so the same inputs always return the same match, however quickly each payload comes back.
+
+When only the first match is required, any payload requests that have not yet started
+are cancelled as soon as the match is found.
+"""
+
+# Standard library imports
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Layer imports
+from orcabus_api_tools.workflow import get_latest_payload_from_workflow_run
+
+# Local imports
+from .globals import (
+    WORKFLOW_RUN_MATCHER_MAX_WORKERS,
+    WORKFLOW_RUN_STATUS_PRIORITY,
+)
+from .instrumentation import dependency_call
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Type hints
+PayloadPredicate = Callable[[Dict], bool]
+# Called with the workflow run object and its latest payload (None if it has no payload)
+PayloadCallback = Callable[[Dict, Optional[Dict]], None]
+
+
+def get_workflow_run_status_priority(workflow_run_object: Dict) -> int:
+    """
+    Get the priority of a workflow run by its current status, lower is checked first.
+    Statuses not in the priority list are checked last.
+    :param workflow_run_object:
+    :return:
+    """
+    status = workflow_run_object.get("currentState", {}).get("status")
+    if status in WORKFLOW_RUN_STATUS_PRIORITY:
+        return WORKFLOW_RUN_STATUS_PRIORITY.index(status)
+    return len(WORKFLOW_RUN_STATUS_PRIORITY)
+
+
+def sort_workflow_runs_by_priority(workflow_run_objects: Iterable[Dict]) -> List[Dict]:
+    """
+    Sort workflow runs by status priority, runs with the same priority keep their original order
+    :param workflow_run_objects:
+    :return:
+    """
+    return sorted(workflow_run_objects, key=get_workflow_run_status_priority)
+
+
+def _payload_matches(
+        workflow_run_object: Dict,
+        payload_predicate: PayloadPredicate,
+        on_payload: Optional[PayloadCallback] = None,
+) -> bool:
+    # Fetch the payload (once) and check it
+    with dependency_call("workflowManager"):
+        payload = get_latest_payload_from_workflow_run(workflow_run_object['orcabusId'])
+    if on_payload is not None:
+        on_payload(workflow_run_object, payload)
+    if payload is None:
+        return False
+    return payload_predicate(payload)
+
+
+def _cancel_futures(futures: List[Future]):
+    # Cancel everything that has not started yet, in-flight requests finish on exit
+    for future in futures:
+        future.cancel()
+
+
+def find_workflow_runs_by_payload(
+        workflow_run_objects: Iterable[Dict],
+        payload_predicate: PayloadPredicate,
+        first_match_only: bool = False,
+        max_workers: int = WORKFLOW_RUN_MATCHER_MAX_WORKERS,
+        on_payload: Optional[PayloadCallback] = None,
+) -> List[Dict]:
+    """
+    Get the workflow runs whose latest payload matches the predicate, in priority order.
+
+    If the payload of a workflow run cannot be fetched before a match is found, any outstanding payload requests
+    are cancelled and the error is raised, as we cannot say that there is no match (i.e. so the caller is retried
+    rather than creating a duplicate workflow run).
+    :param workflow_run_objects:
+    :param payload_predicate:
+    :param first_match_only: Stop (and cancel any outstanding payload requests) at the first match
+    :param max_workers:
+    :param on_payload: Called (from the thread pool) with every payload fetched, i.e. to cache it
+    :return:
+    """
+    workflow_run_objects = sort_workflow_runs_by_priority(workflow_run_objects)
+
+    if len(workflow_run_objects) == 0:
+        return []
+
+    matched_workflow_run_objects = []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(workflow_run_objects))) as executor:
+        # Futures are submitted in priority order, so the executor also starts them in priority order
+        futures: List[Future] = [
+            executor.submit(_payload_matches, workflow_run_object, payload_predicate, on_payload)
+            for workflow_run_object in workflow_run_objects
+        ]
+
+        # Collect in priority order so that the results are deterministic
+        for workflow_run_object, future in zip(workflow_run_objects, futures):
+            try:
+                is_match = future.result()
+            except Exception as e:
+                logger.error(f"Could not check the payload of workflow run '{workflow_run_object['orcabusId']}': {e}")
+                _cancel_futures(futures)
+                raise
+
+            if not is_match:
+                continue
+
+            matched_workflow_run_objects.append(workflow_run_object)
+
+            if first_match_only:
+                _cancel_futures(futures)
+                break
+
+    return matched_workflow_run_objects
+
+
+def find_first_workflow_run_by_payload(
+        workflow_run_objects: Iterable[Dict],
+        payload_predicate: PayloadPredicate,
+        max_workers: int = WORKFLOW_RUN_MATCHER_MAX_WORKERS,
+        on_payload: Optional[PayloadCallback] = None,
+) -> Optional[Dict]:
+    """
+    Get the highest priority workflow run whose latest payload matches the predicate
+    :param workflow_run_objects:
+    :param payload_predicate:
+    :param max_workers:
+    :param on_payload: Called with every payload fetched
+    :return:
+    """
+    matched_workflow_run_objects = find_workflow_runs_by_payload(
+        workflow_run_objects,
+        payload_predicate,
+        first_match_only=True,
+        max_workers=max_workers,
+        on_payload=on_payload,
+    )
+
+    if len(matched_workflow_run_objects) == 0:
+        return None
+
+    return matched_workflow_run_objects[0]
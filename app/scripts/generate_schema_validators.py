@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+
+"""
+Generate schema validators
+
+Compile the event schemas in app/event-schemas into plain python validation modules (in the style of fastjsonschema),
+so that the lambdas that validate against them do not need to import jsonschema (and referencing, rpds etc.)
+at cold start.
+
+The generated modules yield the same errors as the jsonschema Draft202012Validator,
+with the same messages, instance paths and schema paths, in the same order.
+
+Each module records the digest of the schema it was generated from.
+The schema registry remains the source of truth, the lambda compares the registry schema's digest
+against the module's and falls back to jsonschema if they differ.
+
+Only the keywords our schemas use are supported, generation fails on any other keyword
+so that a schema change cannot silently weaken the validator.
+
+Usage (from the app directory):
+
+    # Regenerate the validators after changing a schema
+    python scripts/generate_schema_validators.py
+
+    # Check the generated validators are up to date (run by pre-commit)
+    python scripts/generate_schema_validators.py --check
+
+    # Compare the generated validators against jsonschema over generated valid and invalid payloads
+    # (needs jsonschema installed)
+    python scripts/generate_schema_validators.py --differential-test
+"""
+
+# Standard library imports
+import argparse
+import hashlib
+import inspect
+import json
+import random
+import re
+import sys
+from copy import deepcopy
+from importlib.util import module_from_spec, spec_from_file_location
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Globals
+APP_DIR = Path(__file__).absolute().parents[1]
+EVENT_SCHEMAS_DIR = APP_DIR / "event-schemas"
+LAMBDAS_DIR = APP_DIR / "lambdas"
+
+# Schema file -> generated module
+SCHEMA_VALIDATORS: Dict[Path, Path] = {
+    EVENT_SCHEMAS_DIR / "complete-data-draft-schema.json": (
+        LAMBDAS_DIR / "validate_draft_data_complete_schema_py" / "complete_data_draft_schema_validator.py"
+    ),
+}
+
+# Keywords that do not affect validation
+ANNOTATION_KEYWORDS = [
+    "$schema",
+    "$id",
+    "$defs",
+    "$comment",
+    "title",
+    "description",
+    "examples",
+    "default",
+]
+
+# JSON schema type -> python expression that is true if the instance is of that type (as per jsonschema)
+TYPE_CHECKS = {
+    "object": "isinstance(instance, dict)",
+    "array": "isinstance(instance, list)",
+    "string": "isinstance(instance, str)",
+    "number": "(isinstance(instance, Number) and not isinstance(instance, bool))",
+    "integer": (
+        "((isinstance(instance, int) and not isinstance(instance, bool)) or "
+        "(isinstance(instance, float) and instance.is_integer()))"
+    ),
+    "boolean": "isinstance(instance, bool)",
+    "null": "instance is None",
+}
+
+DIFFERENTIAL_TEST_SEED = 20250101
+DIFFERENTIAL_TEST_RANDOM_PAYLOADS = 2000
+# Values swapped in for each value of a payload
+DIFFERENTIAL_TEST_REPLACEMENT_VALUES = [
+    None,
+    True,
+    False,
+    0,
+    1,
+    1.5,
+    2.0,
+    "",
+    "md5",
+    "sha256",
+    "icav2://",
+    "icav2://project/path",
+    "icav2://project/path/",
+    "icav2://project-id_01/some.dir/sub_dir/",
+    "icav2://project id/path/",
+    "s3://bucket/key/",
+    [],
+    ["icav2://project/path/"],
+    {},
+    {"key": "value"},
+]
+
+
+def get_schema_digest(schema: Dict) -> str:
+    """
+    Get the digest of a schema, independent of its formatting and key order
+    :param schema:
+    :return:
+    """
+    return "sha256:" + hashlib.sha256(
+        json.dumps(schema, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+    ).hexdigest()
+
+
+def camel_case_to_snake_case(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+class ValidatorGenerator:
+    """
+    Generate the source of a validation module for a single schema,
+    with one function per sub-schema
+    """
+
+    def __init__(self, schema: Dict, schema_file_name: str):
+        self.schema = schema
+        self.schema_file_name = schema_file_name
+        # JSON pointer -> function name
+        self.function_names: Dict[str, str] = {}
+        self.functions: List[List[str]] = []
+        # Pattern -> global name of the compiled pattern
+        self.patterns: Dict[str, str] = {}
+
+    def resolve_ref(self, ref: str) -> Tuple[List[str], Dict]:
+        """
+        Resolve a local reference, i.e. '#/$defs/tags'
+        :param ref:
+        :return: The pointer tokens and the sub-schema
+        """
+        if not ref.startswith("#/"):
+            raise NotImplementedError(f"Only local references are supported, got '{ref}'")
+
+        tokens = list(map(
+            lambda token_iter_: token_iter_.replace("~1", "/").replace("~0", "~"),
+            ref[len("#/"):].split("/")
+        ))
+        sub_schema = self.schema
+        for token in tokens:
+            sub_schema = sub_schema[token]
+        return tokens, sub_schema
+
+    def get_function_name(self, tokens: List[str]) -> str:
+        if len(tokens) == 0:
+            return "_validate_root"
+
+        function_name = "_validate_" + "_".join(map(
+            lambda token_iter_: re.sub(r"[^a-z0-9_]", "_", camel_case_to_snake_case(token_iter_.lstrip("$"))),
+            tokens
+        ))
+
+        # Keep function names unique
+        suffix = 1
+        unique_function_name = function_name
+        while unique_function_name in self.function_names.values():
+            suffix += 1
+            unique_function_name = f"{function_name}_{suffix}"
+
+        return unique_function_name
+
+    def get_pattern_name(self, pattern: str) -> str:
+        if pattern not in self.patterns:
+            self.patterns[pattern] = f"_PATTERN_{len(self.patterns) + 1}"
+        return self.patterns[pattern]
+
+    def compile_schema(self, tokens: List[str], sub_schema: Any) -> str:
+        """
+        Compile a sub-schema into a function, returning the name of the function
+        :param tokens: The JSON pointer tokens of the sub-schema
+        :param sub_schema:
+        :return:
+        """
+        pointer = "#/" + "/".join(tokens)
+        if pointer in self.function_names:
+            return self.function_names[pointer]
+
+        if not isinstance(sub_schema, dict):
+            raise NotImplementedError(f"Boolean schemas are not supported, got {sub_schema!r} at '{pointer}'")
+
+        function_name = self.get_function_name(tokens)
+        self.function_names[pointer] = function_name
+
+        body: List[str] = []
+        for keyword, value in sub_schema.items():
+            if keyword in ANNOTATION_KEYWORDS:
+                continue
+            body.extend(self.compile_keyword(tokens, keyword, value))
+
+        # Nothing to validate
+        if len(body) == 0:
+            body = ["return", "yield"]
+
+        self.functions.append([
+            f"def {function_name}(instance: Any, path: List, schema_path: List) -> Iterator[SchemaValidationError]:",
+            f"    # {pointer}",
+            *map(lambda line_iter_: f"    {line_iter_}", body),
+        ])
+
+        return function_name
+
+    def compile_keyword(self, tokens: List[str], keyword: str, value: Any) -> List[str]:
+        """
+        Compile a single keyword of a sub-schema into the lines of its function body
+        :param tokens:
+        :param keyword:
+        :param value:
+        :return:
+        """
+        if keyword == "type":
+            types = value if isinstance(value, list) else [value]
+            unknown_types = set(types) - set(TYPE_CHECKS)
+            if unknown_types:
+                raise NotImplementedError(f"Unknown types {sorted(unknown_types)} at '#/{'/'.join(tokens)}'")
+            types_repr = ", ".join(map(repr, types))
+            type_check = " or ".join(map(lambda type_iter_: TYPE_CHECKS[type_iter_], types))
+            return [
+                f"if not ({type_check}):" if len(types) > 1 else f"if not {type_check}:",
+                f"    yield _get_error(\"type\", f\"{{instance!r}} is not of type {types_repr}\", path, [*schema_path, \"type\"])",
+            ]
+
+        if keyword == "properties":
+            lines = ["if isinstance(instance, dict):"]
+            for property_name, property_schema in value.items():
+                property_function_name = self.compile_schema([*tokens, "properties", property_name], property_schema)
+                lines.extend([
+                    f"    if {property_name!r} in instance:",
+                    f"        yield from {property_function_name}(",
+                    f"            instance[{property_name!r}],",
+                    f"            [*path, {property_name!r}],",
+                    f"            [*schema_path, \"properties\", {property_name!r}],",
+                    f"        )",
+                ])
+            if len(value) == 0:
+                lines.append("    pass")
+            return lines
+
+        if keyword == "required":
+            return [
+                "if isinstance(instance, dict):",
+                f"    for property_name in {tuple(value)!r}:",
+                "        if property_name not in instance:",
+                "            yield _get_error(\"required\", f\"{property_name!r} is a required property\", path, [*schema_path, \"required\"])",
+            ]
+
+        if keyword == "pattern":
+            pattern_name = self.get_pattern_name(value)
+            return [
+                f"if isinstance(instance, str) and not {pattern_name}.search(instance):",
+                f"    yield _get_error(\"pattern\", f\"{{instance!r}} does not match {value!r}\", path, [*schema_path, \"pattern\"])",
+            ]
+
+        if keyword == "enum":
+            # jsonschema's equality differs from python's for booleans and numbers, we only need strings
+            if not all(map(lambda enum_iter_: isinstance(enum_iter_, str) or enum_iter_ is None, value)):
+                raise NotImplementedError(f"Only string enums are supported, got {value!r}")
+            return [
+                f"if instance not in {tuple(value)!r}:",
+                f"    yield _get_error(\"enum\", f\"{{instance!r}} is not one of {value!r}\", path, [*schema_path, \"enum\"])",
+            ]
+
+        if keyword == "$ref":
+            # References are transparent in jsonschema's schema paths
+            ref_tokens, ref_schema = self.resolve_ref(value)
+            return [
+                f"yield from {self.compile_schema(ref_tokens, ref_schema)}(instance, path, schema_path)",
+            ]
+
+        raise NotImplementedError(f"Unsupported keyword '{keyword}' at '#/{'/'.join(tokens)}'")
+
+    def generate(self) -> str:
+        root_function_name = self.compile_schema([], self.schema)
+        assert root_function_name == "_validate_root"
+
+        lines = [
+            "#!/usr/bin/env python3",
+            "",
+            '"""',
+            f"Validator for {self.schema_file_name}",
+            "",
+            "Generated by app/scripts/generate_schema_validators.py, do not edit.",
+            "",
+            "Yields the same errors (messages, paths and schema paths) as the jsonschema Draft202012Validator.",
+            "Compare get_schema_digest of the schema in use against SCHEMA_DIGEST before relying on it.",
+            '"""',
+            "",
+            "# Standard library imports",
+            "import hashlib",
+            "import json",
+            "import re",
+            "from numbers import Number",
+            "from typing import Any, Dict, Iterator, List, TypedDict, Union",
+            "",
+            "# Globals",
+            f"SCHEMA_DIGEST = {get_schema_digest(self.schema)!r}  # pragma: allowlist secret",
+            "",
+            *map(
+                lambda pattern_iter_: f"{pattern_iter_[1]} = re.compile({pattern_iter_[0]!r})",
+                self.patterns.items()
+            ),
+            "",
+            "",
+            "class SchemaValidationError(TypedDict):",
+            "    validator: str",
+            "    message: str",
+            "    path: List[Union[str, int]]",
+            "    schemaPath: List[Union[str, int]]",
+            "",
+            "",
+            inspect.getsource(get_schema_digest).rstrip(),
+            "",
+            "",
+            "def _get_error(validator: str, message: str, path: List, schema_path: List) -> SchemaValidationError:",
+            "    return {",
+            "        \"validator\": validator,",
+            "        \"message\": message,",
+            "        \"path\": path,",
+            "        \"schemaPath\": schema_path,",
+            "    }",
+        ]
+
+        # Sub-schemas before the schemas that use them
+        for function_lines in self.functions:
+            lines.extend(["", "", *function_lines])
+
+        lines.extend([
+            "",
+            "",
+            "def iter_errors(instance: Any) -> Iterator[SchemaValidationError]:",
+            '    """',
+            "    Iterate over the errors of the instance, in the same order as jsonschema",
+            "    :param instance:",
+            "    :return:",
+            '    """',
+            "    return _validate_root(instance, [], [])",
+            "",
+            "",
+            "def is_valid(instance: Any) -> bool:",
+            "    return next(iter_errors(instance), None) is None",
+        ])
+
+        return "\n".join(lines) + "\n"
+
+
+def generate_validator_source(schema_path: Path) -> str:
+    return ValidatorGenerator(
+        schema=json.loads(schema_path.read_text()),
+        schema_file_name=schema_path.name,
+    ).generate()
+
+
+def import_validator_module(module_path: Path) -> ModuleType:
+    spec = spec_from_file_location(module_path.stem, module_path)
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def iter_value_paths(value: Any, path: Tuple = ()) -> Iterator[Tuple]:
+    """
+    Iterate over the path of every value in a payload (including the payload itself)
+    :param value:
+    :param path:
+    :return:
+    """
+    yield path
+    if isinstance(value, dict):
+        for key, sub_value in value.items():
+            yield from iter_value_paths(sub_value, (*path, key))
+    elif isinstance(value, list):
+        for index, sub_value in enumerate(value):
+            yield from iter_value_paths(sub_value, (*path, index))
+
+
+def set_value(payload: Any, path: Tuple, value: Any) -> Any:
+    if len(path) == 0:
+        return value
+    parent = payload
+    for key in path[:-1]:
+        parent = parent[key]
+    parent[path[-1]] = value
+    return payload
+
+
+def delete_value(payload: Any, path: Tuple) -> Any:
+    parent = payload
+    for key in path[:-1]:
+        parent = parent[key]
+    del parent[path[-1]]
+    return payload
+
+
+def iter_example_payloads(schema: Dict) -> Iterator[Any]:
+    """
+    Build a valid payload from the schema (from each property's first example, or a value of its type / pattern),
+    then mutate it, one value at a time, then many at a time with a fixed seed.
+    Mutations replace a value, delete it, or add an unknown property.
+    :param schema:
+    :return:
+    """
+    def _get_example(sub_schema: Dict) -> Any:
+        if "$ref" in sub_schema:
+            ref_schema = schema
+            for token in sub_schema["$ref"][len("#/"):].split("/"):
+                ref_schema = ref_schema[token]
+            return _get_example(ref_schema)
+        if "examples" in sub_schema:
+            return sub_schema["examples"][0]
+        if "enum" in sub_schema:
+            return sub_schema["enum"][0]
+        if sub_schema.get("type") == "object":
+            return dict(map(
+                lambda property_iter_: (property_iter_[0], _get_example(property_iter_[1])),
+                sub_schema.get("properties", {}).items()
+            ))
+        if "pattern" in sub_schema:
+            return "icav2://project/path/"
+        return {
+            "string": "value",
+            "number": 1,
+            "integer": 1,
+            "boolean": True,
+            "array": [],
+            "null": None,
+        }[sub_schema.get("type", "null")]
+
+    valid_payload = _get_example(schema)
+    yield valid_payload
+
+    value_paths = list(iter_value_paths(valid_payload))
+
+    # One mutation at a time
+    for value_path in value_paths:
+        for replacement_value in DIFFERENTIAL_TEST_REPLACEMENT_VALUES:
+            yield set_value(deepcopy(valid_payload), value_path, deepcopy(replacement_value))
+        if len(value_path) > 0:
+            yield delete_value(deepcopy(valid_payload), value_path)
+            yield set_value(deepcopy(valid_payload), (*value_path[:-1], "unknownProperty"), "value")
+
+    # Many mutations at a time
+    random_generator = random.Random(DIFFERENTIAL_TEST_SEED)
+    for _ in range(DIFFERENTIAL_TEST_RANDOM_PAYLOADS):
+        payload = deepcopy(valid_payload)
+        for _ in range(random_generator.randint(1, 4)):
+            # The payload may have lost the value at this path already
+            value_path = random_generator.choice(list(iter_value_paths(payload)))
+            if len(value_path) > 0 and random_generator.random() < 0.25:
+                payload = delete_value(payload, value_path)
+            else:
+                payload = set_value(payload, value_path, deepcopy(
+                    random_generator.choice(DIFFERENTIAL_TEST_REPLACEMENT_VALUES)
+                ))
+        yield payload
+
+
+def run_differential_test(schema_path: Path, module_path: Path) -> List[str]:
+    """
+    Compare the errors of the generated validator against the jsonschema Draft202012Validator
+    :param schema_path:
+    :param module_path:
+    :return: A description of each payload where they differ
+    """
+    from jsonschema import Draft202012Validator
+
+    schema = json.loads(schema_path.read_text())
+    jsonschema_validator = Draft202012Validator(schema)
+    generated_validator = import_validator_module(module_path)
+
+    mismatches = []
+    payload_count = 0
+    invalid_payload_count = 0
+    for payload in iter_example_payloads(schema):
+        payload_count += 1
+        expected_errors = list(map(
+            lambda error_iter_: (
+                error_iter_.validator,
+                error_iter_.message,
+                list(error_iter_.absolute_path),
+                list(error_iter_.absolute_schema_path),
+            ),
+            jsonschema_validator.iter_errors(payload)
+        ))
+        generated_errors = list(map(
+            lambda error_iter_: (
+                error_iter_["validator"],
+                error_iter_["message"],
+                error_iter_["path"],
+                error_iter_["schemaPath"],
+            ),
+            generated_validator.iter_errors(payload)
+        ))
+        if len(expected_errors) > 0:
+            invalid_payload_count += 1
+        if generated_errors != expected_errors or generated_validator.is_valid(payload) != (len(expected_errors) == 0):
+            mismatches.append(
+                f"{json.dumps(payload)}\n  jsonschema: {expected_errors}\n  generated:  {generated_errors}"
+            )
+
+    print(
+        f"{schema_path.name}: {payload_count} payloads ({invalid_payload_count} invalid), {len(mismatches)} mismatches",
+        file=sys.stderr
+    )
+    return mismatches
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate the schema validators")
+    parser.add_argument(
+        "--check", action="store_true",
+        help="Exit 1 if a generated validator is out of date, rather than writing it"
+    )
+    parser.add_argument(
+        "--differential-test", action="store_true",
+        help="Compare the generated validators against jsonschema, exit 1 on any difference"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    failures: List[str] = []
+    for schema_path, module_path in SCHEMA_VALIDATORS.items():
+        if args.differential_test:
+            failures.extend(run_differential_test(schema_path, module_path))
+            continue
+
+        validator_source = generate_validator_source(schema_path)
+        if args.check:
+            if not module_path.is_file() or module_path.read_text() != validator_source:
+                failures.append(
+                    f"{module_path.relative_to(APP_DIR)} is out of date with {schema_path.relative_to(APP_DIR)}, "
+                    f"run 'python scripts/generate_schema_validators.py' from the app directory"
+                )
+            continue
+
+        module_path.write_text(validator_source)
+        print(f"Wrote {module_path.relative_to(APP_DIR)}", file=sys.stderr)
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+
+    if len(failures) > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
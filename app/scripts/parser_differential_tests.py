@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+
+"""
+Parser differential tests
+
+The bssh_tool_kit layer reads RunInfo.xml files and the library ids of samplesheets with its own parsers
+rather than the v2 samplesheet maker readers they replaced,
+so compare the two over generated files, in the style of the schema validator differential test.
+
+* run_info: read_run_info_summary against the run_info_xml_reader fields,
+  over RunInfo.xml files with namespaces, comments, padded, reordered, empty and missing fields,
+  and fields past the ranged read, fed whole and in chunks of several sizes.
+  Where the ranged read of the head of the file reports the summary as complete,
+  it must also match.
+* samplesheet: read_bclconvert_data_sample_ids against the (de-duplicated) sample ids of the
+  v2_samplesheet_reader bclconvert_data section, over single and multi-lane samplesheets,
+  with blank and all-comma lines, Cloud_* sections (whose Cloud_Data also has a Sample_ID column),
+  reordered columns, Windows line endings and a byte order mark.
+  The samplesheet is read from a file, as it was before the layer had its own parser.
+
+Usage (from the app directory):
+
+    # Needs v2_samplesheet_maker installed
+    python scripts/parser_differential_tests.py
+
+    # Only some of the parsers
+    python scripts/parser_differential_tests.py --targets run_info
+"""
+
+# Standard library imports
+import argparse
+import json
+import logging
+import sys
+import warnings
+from io import StringIO
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Globals
+APP_DIR = Path(__file__).absolute().parents[1]
+LAYER_SRC_DIR = APP_DIR / "layers" / "bssh_tool_kit" / "src"
+
+INSTRUMENT_RUN_ID = "250101_A01052_0001_AHXXXDSXY"
+FLOWCELL_ID = "HXXXDSXY"
+INSTRUMENT_ID = "A01052"
+RUN_DATE = "1/1/2025 1:00:00 AM"
+
+# Chunk sizes to feed the streaming reader, None for the whole file at once
+RUN_INFO_CHUNK_SIZES: List[Optional[int]] = [None, 1, 7, 64, 4096]
+
+LIBRARY_COUNT = 24
+LANE_COUNT = 4
+
+# Summary key -> run_info_xml_reader Run key
+RUN_INFO_SUMMARY_KEYS: Dict[str, str] = {
+    "instrumentRunId": "@Id",
+    "flowcellId": "Flowcell",
+    "instrumentId": "Instrument",
+    "runDate": "Date",
+}
+
+
+def get_reads_xml() -> str:
+    return (
+        '    <Reads>\n'
+        '      <Read Number="1" NumCycles="151" IsIndexedRead="N"/>\n'
+        '      <Read Number="2" NumCycles="10" IsIndexedRead="Y"/>\n'
+        '      <Read Number="3" NumCycles="10" IsIndexedRead="Y"/>\n'
+        '      <Read Number="4" NumCycles="151" IsIndexedRead="N"/>\n'
+        '    </Reads>\n'
+    )
+
+
+def get_flowcell_layout_xml(lane_count: int = 8) -> str:
+    tiles = "".join(
+        f"<Tile>{lane}_{tile}</Tile>"
+        for lane in range(1, lane_count + 1)
+        for tile in range(1101, 1179)
+    )
+    return (
+        f'    <FlowcellLayout LaneCount="{lane_count}" SurfaceCount="2" SwathCount="6" TileCount="78">'
+        f'<TileSet TileNamingConvention="FourDigit"><Tiles>{tiles}</Tiles></TileSet></FlowcellLayout>\n'
+    )
+
+
+def build_run_info_xml(
+        run_children: List[str],
+        run_attributes: str = f'Id="{INSTRUMENT_RUN_ID}" Number="1"',
+        run_info_attributes: str = 'Version="6"',
+        declaration: str = '<?xml version="1.0"?>\n',
+) -> bytes:
+    return (
+        declaration +
+        f'<RunInfo {run_info_attributes}>\n'
+        f'  <Run {run_attributes}>\n' +
+        "".join(run_children) +
+        '  </Run>\n'
+        '</RunInfo>\n'
+    ).encode()
+
+
+def iter_run_info_xml_files() -> Iterator[Tuple[str, bytes]]:
+    """
+    Yield a description and the contents of each RunInfo.xml file to compare the readers over
+    :return:
+    """
+    flowcell = f'    <Flowcell>{FLOWCELL_ID}</Flowcell>\n'
+    instrument = f'    <Instrument>{INSTRUMENT_ID}</Instrument>\n'
+    date = f'    <Date>{RUN_DATE}</Date>\n'
+    reads = get_reads_xml()
+    flowcell_layout = get_flowcell_layout_xml()
+
+    yield "novaseq", build_run_info_xml([flowcell, instrument, date, reads, flowcell_layout])
+    yield "namespaces", build_run_info_xml(
+        [flowcell, instrument, date, reads, flowcell_layout],
+        run_info_attributes=(
+            'xmlns:xsd="http://www.w3.org/2001/XMLSchema" '
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" Version="6"'
+        ),
+    )
+    yield "encoding declaration", build_run_info_xml(
+        [flowcell, instrument, date, reads, flowcell_layout],
+        declaration='<?xml version="1.0" encoding="utf-8"?>\n',
+    )
+    yield "reordered fields", build_run_info_xml([date, instrument, flowcell, reads, flowcell_layout])
+    yield "comment between fields", build_run_info_xml(
+        [flowcell, instrument, "    <!-- " + "p" * 8192 + " -->\n", date, reads, flowcell_layout]
+    )
+    yield "fields after the flowcell layout", build_run_info_xml(
+        [flowcell, reads, flowcell_layout, instrument, date]
+    )
+    yield "field nested in another element", build_run_info_xml(
+        [flowcell, instrument, '    <Setup><Date>not the run date</Date></Setup>\n', date, reads, flowcell_layout]
+    )
+    yield "missing date", build_run_info_xml([flowcell, instrument, reads, flowcell_layout])
+    yield "missing every field", build_run_info_xml([reads, flowcell_layout])
+    yield "empty date", build_run_info_xml([flowcell, instrument, '    <Date/>\n', reads, flowcell_layout])
+    yield "escaped text", build_run_info_xml([
+        flowcell, '    <Instrument>A01052 &amp; co</Instrument>\n', date, reads, flowcell_layout
+    ])
+    yield "padded text", build_run_info_xml([
+        f'    <Flowcell>\n      {FLOWCELL_ID}\n    </Flowcell>\n', instrument, date, reads, flowcell_layout
+    ])
+    yield "whitespace only date", build_run_info_xml([
+        flowcell, instrument, '    <Date>\n    </Date>\n', reads, flowcell_layout
+    ])
+    yield "run attributes reordered", build_run_info_xml(
+        [flowcell, instrument, date, reads, flowcell_layout],
+        run_attributes=f'Number="1" Id="{INSTRUMENT_RUN_ID}"',
+    )
+    yield "single line", build_run_info_xml([
+        flowcell.strip(), instrument.strip(), date.strip(), reads.replace("\n", "").replace("  ", ""),
+        flowcell_layout.strip()
+    ])
+
+
+def iter_chunks(data: bytes, chunk_size: Optional[int]) -> Iterator[bytes]:
+    if chunk_size is None:
+        yield data
+        return
+    for offset in range(0, len(data), chunk_size):
+        yield data[offset:offset + chunk_size]
+
+
+def get_expected_run_info_summary(run_info_xml: bytes) -> Dict:
+    from v2_samplesheet_maker.functions.run_info_reader import run_info_xml_reader
+
+    run = run_info_xml_reader(StringIO(run_info_xml.decode()))["RunInfo"]["Run"]
+    return dict(map(
+        lambda summary_key_iter_: (summary_key_iter_[0], run.get(summary_key_iter_[1])),
+        RUN_INFO_SUMMARY_KEYS.items()
+    ))
+
+
+def run_run_info_differential_test() -> List[str]:
+    """
+    Compare the streaming RunInfo.xml reader against run_info_xml_reader
+    :return: A description of each file (and chunk size) where they differ
+    """
+    from bssh_tool_kit.globals import RUN_INFO_XML_HEAD_BYTES
+    from bssh_tool_kit.run_info import _parse_run_info_summary, read_run_info_summary
+
+    mismatches = []
+    file_count = 0
+    for description, run_info_xml in iter_run_info_xml_files():
+        file_count += 1
+        expected_summary = get_expected_run_info_summary(run_info_xml)
+
+        for chunk_size in RUN_INFO_CHUNK_SIZES:
+            summary = read_run_info_summary(iter_chunks(run_info_xml, chunk_size))
+            if summary != expected_summary:
+                mismatches.append(
+                    f"run_info '{description}' (chunk size {chunk_size})\n"
+                    f"  run_info_xml_reader: {json.dumps(expected_summary)}\n"
+                    f"  streaming:           {json.dumps(summary)}"
+                )
+
+        # The ranged read, trusted as is if it reports the summary as complete
+        head_summary, is_complete = _parse_run_info_summary([run_info_xml[:RUN_INFO_XML_HEAD_BYTES]])
+        if is_complete and head_summary != expected_summary:
+            mismatches.append(
+                f"run_info '{description}' (first {RUN_INFO_XML_HEAD_BYTES} bytes)\n"
+                f"  run_info_xml_reader: {json.dumps(expected_summary)}\n"
+                f"  streaming:           {json.dumps(head_summary)}"
+            )
+
+    print(f"run_info: {file_count} files, {len(mismatches)} mismatches", file=sys.stderr)
+    return mismatches
+
+
+def get_library_ids(library_count: int = LIBRARY_COUNT) -> List[str]:
+    return [f"L25{library_iter:05d}" for library_iter in range(1, library_count + 1)]
+
+
+def get_indexes(library_iter: int) -> Tuple[str, str]:
+    # Unique 10 base indexes from the binary library number
+    return (
+        format(library_iter, "010b").replace("0", "A").replace("1", "C"),
+        format(library_iter, "010b").replace("0", "G").replace("1", "T"),
+    )
+
+
+def get_bclconvert_data_lines(
+        library_ids: List[str],
+        lanes: Optional[List[int]] = None,
+        columns: Tuple[str, ...] = ("Lane", "Sample_ID", "index", "index2"),
+) -> List[str]:
+    """
+    Get the lines of a BCLConvert_Data section, with every library on every lane
+    :param library_ids:
+    :param lanes: None for no Lane column
+    :param columns: The column order, Lane is dropped if there are no lanes
+    :return:
+    """
+    if lanes is None:
+        columns = tuple(filter(lambda column_iter_: column_iter_ != "Lane", columns))
+
+    rows = []
+    for lane in (lanes or [None]):
+        for library_iter, library_id in enumerate(library_ids):
+            index, index2 = get_indexes(library_iter)
+            row = {"Lane": str(lane), "Sample_ID": library_id, "index": index, "index2": index2}
+            rows.append(",".join(map(lambda column_iter_: row[column_iter_], columns)))
+
+    return [",".join(columns), *rows]
+
+
+def get_cloud_sections(library_ids: List[str]) -> List[Tuple[str, List[str]]]:
+    return [
+        ("Cloud_Settings", [
+            "GeneratedVersion,0.0.0",
+            "Cloud_Workflow,ica_workflow_1",
+            "BCLConvert_Pipeline,urn:ilmn:ica:pipeline:bf93b5cf-cb27-4dfa-846e-acd6eb081aca#BclConvert_v4_2_7",
+        ]),
+        ("Cloud_Data", [
+            "Sample_ID,ProjectName,LibraryName,LibraryPrepKitName,IndexAdapterKitName",
+            *map(
+                lambda library_item_iter_: (
+                    f"{library_item_iter_[1]},proj,"
+                    f"{library_item_iter_[1]}_{'_'.join(get_indexes(library_item_iter_[0]))},,"
+                ),
+                enumerate(library_ids)
+            ),
+        ]),
+    ]
+
+
+def build_samplesheet(
+        bclconvert_data_lines: List[str],
+        extra_sections: Optional[List[Tuple[str, List[str]]]] = None,
+        extra_sections_first: bool = False,
+        pad_to_columns: Optional[int] = None,
+        blank_line: str = "",
+        line_ending: str = "\n",
+        byte_order_mark: bool = False,
+) -> bytes:
+    """
+    Build a v2 samplesheet
+    :param bclconvert_data_lines:
+    :param extra_sections: Any other sections, i.e. the Cloud_* sections
+    :param extra_sections_first: Put the extra sections before the BCLConvert sections
+    :param pad_to_columns: Pad every line with commas to this many columns, as spreadsheet editors do
+    :param blank_line: The line between sections
+    :param line_ending:
+    :param byte_order_mark:
+    :return:
+    """
+    sections = [
+        ("Header", ["FileFormatVersion,2", "RunName,test", "InstrumentType,NovaSeq"]),
+        ("Reads", ["Read1Cycles,151", "Read2Cycles,151", "Index1Cycles,10", "Index2Cycles,10"]),
+    ]
+    bclconvert_sections = [
+        ("BCLConvert_Settings", ["SoftwareVersion,4.2.7"]),
+        ("BCLConvert_Data", bclconvert_data_lines),
+    ]
+    if extra_sections_first:
+        sections += (extra_sections or []) + bclconvert_sections
+    else:
+        sections += bclconvert_sections + (extra_sections or [])
+
+    lines = []
+    for section_name, section_lines in sections:
+        lines.extend([f"[{section_name}]", *section_lines, blank_line])
+
+    if pad_to_columns is not None:
+        lines = list(map(
+            lambda line_iter_: line_iter_ + "," * max(0, pad_to_columns - 1 - line_iter_.count(",")),
+            lines
+        ))
+
+    samplesheet = line_ending.join(lines).encode()
+    if byte_order_mark:
+        samplesheet = b"\xef\xbb\xbf" + samplesheet
+    return samplesheet
+
+
+def iter_samplesheets() -> Iterator[Tuple[str, bytes]]:
+    """
+    Yield a description and the contents of each samplesheet to compare the readers over
+    :return:
+    """
+    library_ids = get_library_ids()
+    lanes = list(range(1, LANE_COUNT + 1))
+
+    yield "single lane", build_samplesheet(get_bclconvert_data_lines(library_ids, lanes=[1]))
+    yield "no lane column", build_samplesheet(get_bclconvert_data_lines(library_ids))
+    yield "multi-lane", build_samplesheet(get_bclconvert_data_lines(library_ids, lanes=lanes))
+    yield "multi-lane, libraries on different lanes", build_samplesheet(
+        get_bclconvert_data_lines(library_ids[:12], lanes=[1, 2])[:-1] +
+        get_bclconvert_data_lines(library_ids[6:], lanes=[3, 4])[1:]
+    )
+    yield "reordered columns", build_samplesheet(
+        get_bclconvert_data_lines(library_ids, lanes=lanes, columns=("index", "index2", "Sample_ID", "Lane"))
+    )
+    yield "blank lines", build_samplesheet(
+        get_bclconvert_data_lines(library_ids, lanes=lanes), blank_line="\n"
+    )
+    yield "all-comma lines", build_samplesheet(
+        get_bclconvert_data_lines(library_ids, lanes=lanes), blank_line=",,,,"
+    )
+    yield "padded with commas", build_samplesheet(
+        get_bclconvert_data_lines(library_ids, lanes=lanes), pad_to_columns=6
+    )
+    yield "cloud sections", build_samplesheet(
+        get_bclconvert_data_lines(library_ids, lanes=lanes), extra_sections=get_cloud_sections(library_ids)
+    )
+    yield "cloud sections first", build_samplesheet(
+        get_bclconvert_data_lines(library_ids, lanes=lanes),
+        extra_sections=get_cloud_sections(library_ids[::-1]),
+        extra_sections_first=True,
+    )
+    yield "cloud sections, padded with commas", build_samplesheet(
+        get_bclconvert_data_lines(library_ids, lanes=lanes),
+        extra_sections=get_cloud_sections(library_ids),
+        pad_to_columns=6,
+        blank_line=",,,,,",
+    )
+    yield "windows line endings", build_samplesheet(
+        get_bclconvert_data_lines(library_ids, lanes=lanes),
+        extra_sections=get_cloud_sections(library_ids),
+        line_ending="\r\n",
+    )
+    yield "byte order mark", build_samplesheet(
+        get_bclconvert_data_lines(library_ids, lanes=lanes),
+        extra_sections=get_cloud_sections(library_ids),
+        byte_order_mark=True,
+    )
+
+
+def get_expected_sample_ids(samplesheet: bytes) -> List[str]:
+    from v2_samplesheet_maker.functions.v2_samplesheet_reader import v2_samplesheet_reader
+
+    # The reader warns (and logs) about the unnamed columns of lines padded with commas
+    with NamedTemporaryFile(suffix=".csv") as samplesheet_file_h, warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        logging.disable(logging.WARNING)
+        samplesheet_file_h.write(samplesheet)
+        samplesheet_file_h.flush()
+        try:
+            bclconvert_data = v2_samplesheet_reader(Path(samplesheet_file_h.name))["bclconvert_data"]
+        finally:
+            logging.disable(logging.NOTSET)
+
+    # In the order they first appear, without duplicates
+    return list(dict.fromkeys(map(
+        lambda bclconvert_data_row_iter_: str(bclconvert_data_row_iter_["sample_id"]),
+        bclconvert_data
+    )))
+
+
+def run_samplesheet_differential_test() -> List[str]:
+    """
+    Compare the BCLConvert_Data sample id scanner against v2_samplesheet_reader
+    :return: A description of each samplesheet where they differ
+    """
+    from bssh_tool_kit.parsers import read_bclconvert_data_sample_ids
+
+    mismatches = []
+    samplesheet_count = 0
+    for description, samplesheet in iter_samplesheets():
+        samplesheet_count += 1
+        expected_sample_ids = get_expected_sample_ids(samplesheet)
+
+        try:
+            sample_ids = read_bclconvert_data_sample_ids(samplesheet)
+        except Exception as e:
+            sample_ids = f"{type(e).__name__}: {e}"
+
+        if sample_ids != expected_sample_ids:
+            mismatches.append(
+                f"samplesheet '{description}'\n"
+                f"  v2_samplesheet_reader: {json.dumps(expected_sample_ids)}\n"
+                f"  scanner:               {json.dumps(sample_ids)}"
+            )
+
+    print(f"samplesheet: {samplesheet_count} samplesheets, {len(mismatches)} mismatches", file=sys.stderr)
+    return mismatches
+
+
+DIFFERENTIAL_TESTS: Dict[str, Callable[[], List[str]]] = {
+    "run_info": run_run_info_differential_test,
+    "samplesheet": run_samplesheet_differential_test,
+}
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare the layer's parsers against the v2 samplesheet maker")
+    parser.add_argument(
+        "--targets", nargs="+", choices=list(DIFFERENTIAL_TESTS), default=list(DIFFERENTIAL_TESTS),
+        help="Parsers to compare, defaults to every parser"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    # Import the layer from source
+    sys.path.insert(0, str(LAYER_SRC_DIR))
+
+    failures: List[str] = []
+    for target in args.targets:
+        failures.extend(DIFFERENTIAL_TESTS[target]())
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+
+    if len(failures) > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ import {
   SSM_PARAMETER_PATH_PAYLOAD_VERSION,
   BASESPACE_ACCESS_TOKEN_SECRET_ID,
   BASESPACE_API_URL_SSM_PARAMETER_NAME,
+  WORKFLOW_RUN_INDEX_TABLE_NAME,
 } from './constants';
 import { SsmParameterPaths, SsmParameterValues } from './ssm/interfaces';
 
@@ -52,6 +53,7 @@ export const getStatefulStackProps = (stage: StageName): StatefulApplicationStac
   return {
     ssmParameterValues: getSsmParameterValues(stage),
     ssmParameterPaths: getSsmParameterPaths(),
+    workflowRunIndexTableName: WORKFLOW_RUN_INDEX_TABLE_NAME,
   };
 };
 
@@ -67,5 +69,7 @@ export const getStatelessStackProps = (stage: StageName): StatelessApplicationSt
     // Basespace parameters
     basespaceBaseUrlSsmParameterName: BASESPACE_API_URL_SSM_PARAMETER_NAME,
     basespaceAccessTokenSecretId: BASESPACE_ACCESS_TOKEN_SECRET_ID,
+    // DynamoDB
+    workflowRunIndexTableName: WORKFLOW_RUN_INDEX_TABLE_NAME,
   };
 };
@@ -64,6 +64,9 @@ export const ICA_QUEUE_VIZ_TIMEOUT = Duration.seconds(300); // 5 minutes - durat
 export const DLQ_ALARM_THRESHOLD = 1;
 export const ICA_AWS_ACCOUNT_NUMBER = '079623148045';
 
+/* DynamoDB constants */
+export const WORKFLOW_RUN_INDEX_TABLE_NAME = 'BclConvertWorkflowRunIndexTable';
+
 // External SSMs/ Secrets
 export const BASESPACE_API_URL_SSM_PARAMETER_NAME = '/manual/BaseSpaceApiUrl'; // "https://api.aps2.sh.basespace.illumina.com"
 export const BASESPACE_ACCESS_TOKEN_SECRET_ID = '/manual/BaseSpaceAccessTokenSecret';
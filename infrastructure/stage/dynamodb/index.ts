@@ -0,0 +1,28 @@
+import { Construct } from 'constructs';
+import { BuildWorkflowRunIndexTableProps } from './interfaces';
+import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
+import { RemovalPolicy } from 'aws-cdk-lib';
+
+export function buildWorkflowRunIndexTable(
+  scope: Construct,
+  props: BuildWorkflowRunIndexTableProps
+): dynamodb.ITableV2 {
+  /**
+   * Index from the workflow run payload attributes we link events on
+   * (basespace run id, analysis id, samplesheet checksum) to the portal run id.
+   *
+   * Every item is keyed on '<keyType>#<value>', see the bssh tool kit layer workflow_run_index module.
+   */
+  return new dynamodb.TableV2(scope, 'workflow-run-index-table', {
+    tableName: props.tableName,
+    partitionKey: {
+      name: 'id',
+      type: dynamodb.AttributeType.STRING,
+    },
+    billing: dynamodb.Billing.onDemand(),
+    pointInTimeRecoverySpecification: {
+      pointInTimeRecoveryEnabled: true,
+    },
+    removalPolicy: RemovalPolicy.RETAIN_ON_UPDATE_OR_DELETE,
+  });
+}
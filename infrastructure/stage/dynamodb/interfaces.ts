@@ -0,0 +1,4 @@
+export interface BuildWorkflowRunIndexTableProps {
+  /* The name of the workflow run index table */
+  tableName: string;
+}
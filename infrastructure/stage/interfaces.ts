@@ -12,6 +12,9 @@ export interface StatefulApplicationStackConfig {
 
   // Keys
   ssmParameterPaths: SsmParameterPaths;
+
+  // DynamoDB
+  workflowRunIndexTableName: string;
 }
 
 /**
@@ -30,4 +33,7 @@ export interface StatelessApplicationStackConfig {
   // Basespace Stuff
   basespaceBaseUrlSsmParameterName: string;
   basespaceAccessTokenSecretId: string;
+
+  // DynamoDB
+  workflowRunIndexTableName: string;
 }
@@ -145,6 +145,11 @@ function buildLambda(scope: Construct, props: LambdaInput): LambdaObject {
   }
 
   if (lambdaRequirements.needsBsshToolsLayer) {
+    /* Add the bssh tools layer */
+    lambdaFunction.addLayers(props.bsshToolsLayer);
+  }
+
+  if (lambdaRequirements.needsBasespaceAccess) {
     /* Give the lambda function access to BaseSpace */
     /* Set the environment variables as required */
     props.basespaceUrlParameterObject.grantRead(lambdaFunction.currentVersion);
@@ -157,9 +162,15 @@ function buildLambda(scope: Construct, props: LambdaInput): LambdaObject {
       'BASESPACE_ACCESS_TOKEN_SECRET_ID',
       props.basespaceAccessTokenSecretObject.secretName
     );
+  }
 
-    /* Add the bssh tools layer */
-    lambdaFunction.addLayers(props.bsshToolsLayer);
+  if (lambdaRequirements.needsWorkflowRunIndexTableAccess) {
+    /* Give the lambda function access to the workflow run index table */
+    props.workflowRunIndexTableObject.grantReadWriteData(lambdaFunction.currentVersion);
+    lambdaFunction.addEnvironment(
+      'WORKFLOW_RUN_INDEX_TABLE_NAME',
+      props.workflowRunIndexTableObject.tableName
+    );
   }
 
   /*
@@ -2,6 +2,7 @@ import { PythonUvFunction } from '@orcabus/platform-cdk-constructs/lambda';
 import { IStringParameter } from 'aws-cdk-lib/aws-ssm';
 import { ISecret } from 'aws-cdk-lib/aws-secretsmanager';
 import { PythonLayerVersion } from '@aws-cdk/aws-lambda-python-alpha';
+import { ITableV2 } from 'aws-cdk-lib/aws-dynamodb';
 
 export type LambdaName =
   // SRM SampleSheet State Change
@@ -37,6 +38,8 @@ export interface LambdaRequirements {
   needsSsmParametersAccess?: boolean;
   needsSchemaRegistryAccess?: boolean;
   needsBsshToolsLayer?: boolean;
+  needsBasespaceAccess?: boolean;
+  needsWorkflowRunIndexTableAccess?: boolean;
   needsExtendedTimeout?: boolean;
 }
 
@@ -48,11 +51,15 @@ export const lambdaRequirementsMap: Record<LambdaName, LambdaRequirements> = {
     needsIcav2Tools: true,
     needsSsmParametersAccess: true,
     needsBsshToolsLayer: true,
+    needsBasespaceAccess: true,
+    needsWorkflowRunIndexTableAccess: true,
   },
   findWorkflowsByInstrumentRunId: {
     needsOrcabusApiTools: true,
     needsIcav2Tools: true,
     needsBsshToolsLayer: true,
+    needsBasespaceAccess: true,
+    needsWorkflowRunIndexTableAccess: true,
     needsExtendedTimeout: true,
   },
   // ICA State Change lambdas
@@ -60,30 +67,41 @@ export const lambdaRequirementsMap: Record<LambdaName, LambdaRequirements> = {
     needsOrcabusApiTools: true,
     needsIcav2Tools: true,
     needsBsshToolsLayer: true,
+    needsBasespaceAccess: true,
   },
   checkSamplesheetInSrm: {
     needsOrcabusApiTools: true,
     needsIcav2Tools: true,
     needsBsshToolsLayer: true,
+    needsBasespaceAccess: true,
   },
   createNewWorkflowRunObject: {
     needsOrcabusApiTools: true,
     needsIcav2Tools: true,
     needsBsshToolsLayer: true,
+    needsBasespaceAccess: true,
+    needsWorkflowRunIndexTableAccess: true,
     needsSsmParametersAccess: true,
   },
   findWorkflow: {
     needsOrcabusApiTools: true,
     needsIcav2Tools: true,
     needsBsshToolsLayer: true,
+    needsBasespaceAccess: true,
+    needsWorkflowRunIndexTableAccess: true,
   },
   updateWorkflowRunObject: {
     needsOrcabusApiTools: true,
     needsIcav2Tools: true,
     needsBsshToolsLayer: true,
+    needsBasespaceAccess: true,
+    needsWorkflowRunIndexTableAccess: true,
   },
   // Shared - validation lambdas
   validateDraftDataCompleteSchema: {
+    // The bssh tools layer provides the shared ssm parameter cache,
+    // the bssh tools layer imports lazily so we don't need the orcabus api tools or icav2 tools layers
+    needsBsshToolsLayer: true,
     needsSchemaRegistryAccess: true,
     needsSsmParametersAccess: true,
   },
@@ -96,6 +114,9 @@ export interface LambdaInputs {
   /* basespace Parameters */
   basespaceUrlParameterObject: IStringParameter;
   basespaceAccessTokenSecretObject: ISecret;
+
+  /* Workflow run index */
+  workflowRunIndexTableObject: ITableV2;
 }
 
 export interface LambdaInput extends LambdaInputs {
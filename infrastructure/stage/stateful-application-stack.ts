@@ -4,6 +4,7 @@ import { StatefulApplicationStackConfig } from './interfaces';
 import { buildSsmParameters } from './ssm';
 import { buildSchemasAndRegistry } from './event-schemas';
 import { createEventBridgePipe, getTopicArnFromTopicName } from './sqs';
+import { buildWorkflowRunIndexTable } from './dynamodb';
 import {
   DLQ_ALARM_THRESHOLD,
   EVENT_PIPE_NAME,
@@ -35,6 +36,11 @@ export class StatefulApplicationStack extends GitStack {
     // Add to the schema registry
     buildSchemasAndRegistry(this);
 
+    // Build the workflow run index table
+    buildWorkflowRunIndexTable(this, {
+      tableName: props.workflowRunIndexTableName,
+    });
+
     // Build the event sqs pipe
     // Create the event pipe to join the ICA SQS queue to the event bus
     createEventBridgePipe(this, {
@@ -2,6 +2,7 @@ import * as cdk from 'aws-cdk-lib';
 import * as events from 'aws-cdk-lib/aws-events';
 import * as ssm from 'aws-cdk-lib/aws-ssm';
 import * as secretsManager from 'aws-cdk-lib/aws-secretsmanager';
+import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
 import { Construct } from 'constructs';
 import { StatelessApplicationStackConfig } from './interfaces';
 import { buildAllLambdas, buildBsshToolsLayer } from './lambda';
@@ -48,6 +49,13 @@ export class StatelessApplicationStack extends GitStack {
       props.basespaceAccessTokenSecretId
     );
 
+    // Get the workflow run index table (built in the stateful stack)
+    const workflowRunIndexTableObject = dynamodb.TableV2.fromTableName(
+      this,
+      'workflowRunIndexTable',
+      props.workflowRunIndexTableName
+    );
+
     // Build the bssh lambda layer
     // Build BSSH Tools Layer
     const bsshToolsLayer = buildBsshToolsLayer(this);
@@ -57,6 +65,7 @@ export class StatelessApplicationStack extends GitStack {
       bsshToolsLayer: bsshToolsLayer,
       basespaceUrlParameterObject: basespaceSsmParameterObject,
       basespaceAccessTokenSecretObject: basespaceAccessTokenSecretObject,
+      workflowRunIndexTableObject: workflowRunIndexTableObject,
     });
 
     // Build the state machines